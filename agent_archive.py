@@ -0,0 +1,288 @@
+"""
+Streaming export and import of agents as tar archives
+Export renders one agent at a time into a tar stream (plain, gzip or zstd); import parses the
+uploaded stream as it arrives, deduplicating by content hash before anything is written
+"""
+import io
+import json
+import os
+import queue
+import re
+import tarfile
+import time
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional
+
+from agent_store import content_hash, split_header
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# format -> (tarfile mode, file suffix, media type)
+FORMATS = {
+    "tar": ("w|", ".tar", "application/x-tar"),
+    "tar.gz": ("w|gz", ".tar.gz", "application/gzip"),
+    "tar.zst": ("w|", ".tar.zst", "application/zstd"),
+}
+METADATA_NAME = "operator-export.json"
+AGENT_NAME = re.compile(r"^agents/([\w-][\w.-]*\.py)$")
+# The platform's own agents; an archive may not replace them
+RESERVED_AGENTS = {"__init__.py", "git-push-agent.py", "hello-github-push-agent.py"}
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+MAX_MEMBER_BYTES = int(os.getenv("AGENT_IMPORT_MAX_BYTES", 1024 * 1024))
+MAX_MEMBERS = int(os.getenv("AGENT_IMPORT_MAX_FILES", 10000))
+
+
+class ChunkWriter:
+    """Write target that collects output until the generator hands it on"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _member(name: str, data: bytes, mtime: float) -> tuple:
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(mtime)
+    info.mode = 0o644
+    return info, io.BytesIO(data)
+
+
+def check_format(compression: str):
+    """Raise ValueError for formats this instance cannot write"""
+    if compression not in FORMATS:
+        raise ValueError(f"Unknown archive format '{compression}', expected one of {list(FORMATS)}")
+    if compression == "tar.zst" and zstandard is None:
+        raise ValueError("tar.zst export requires the zstandard package")
+
+
+def export_archive(store, names: Optional[List[str]] = None, compression: str = "tar.gz",
+                   registry: Optional[List[dict]] = None) -> Iterator[bytes]:
+    """Yield the archive in chunks: operator-export.json first, then agents/<name> per agent
+
+    Only one agent's source is in memory at a time; the metadata pass renders each agent
+    once to hash it and the content pass renders it again.
+    """
+    check_format(compression)
+    names = sorted(store.manifest) if names is None else names
+
+    agents = {}
+    for name in names:
+        source = store.get(name)
+        if source is None:
+            continue
+        header, _ = split_header(source)
+        record = store.manifest[name]
+        agents[name] = {"hash": content_hash(source), "size": len(source.encode("utf-8")),
+                        "prompt": header["prompt"] if header else None,
+                        "generated_on": header["generated_on"] if header else None,
+                        "template": record.get("template"), "version": record.get("version")}
+    metadata = {"format": 1, "exported_at": datetime.now().isoformat(), "agents": agents,
+                "registry": registry or []}
+
+    writer = ChunkWriter()
+    target = writer
+    compressor = None
+    if compression == "tar.zst":
+        compressor = target = zstandard.ZstdCompressor(level=10).stream_writer(writer, closefd=False)
+    now = time.time()
+    with tarfile.open(fileobj=target, mode=FORMATS[compression][0]) as tar:
+        tar.addfile(*_member(METADATA_NAME, json.dumps(metadata, indent=1, default=str).encode("utf-8"), now))
+        yield writer.drain()
+        for name in agents:
+            source = store.get(name)
+            if source is None:
+                continue
+            tar.addfile(*_member(f"agents/{name}", source.encode("utf-8"), now))
+            data = writer.drain()
+            if data:
+                yield data
+    if compressor is not None:
+        compressor.close()
+    yield writer.drain()
+
+
+class ChunkReader(io.RawIOBase):
+    """Blocking file object over byte chunks fed from another thread (an upload's body)
+
+    `feed` gives up once the reader is closed, so a failed parse never blocks the producer.
+    """
+
+    def __init__(self, max_chunks: int = 16):
+        super().__init__()
+        self.queue: queue.Queue = queue.Queue(maxsize=max_chunks)
+        self.buffer = b""
+        self.offset = 0
+        self.eof = False
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def feed(self, chunk: Optional[bytes]) -> bool:
+        """Hand over a chunk (None marks the end); False once the reader is closed"""
+        while not self.closed:
+            try:
+                self.queue.put(chunk, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fill(self) -> bool:
+        while self.offset >= len(self.buffer):
+            if self.eof:
+                return False
+            chunk = self.queue.get()
+            if chunk is None:
+                self.eof = True
+                return False
+            self.buffer, self.offset = chunk, 0
+        return True
+
+    def peek(self, size: int) -> bytes:
+        while len(self.buffer) - self.offset < size and not self.eof:
+            chunk = self.queue.get()
+            if chunk is None:
+                self.eof = True
+            else:
+                self.buffer = self.buffer[self.offset:] + chunk
+                self.offset = 0
+        return self.buffer[self.offset:self.offset + size]
+
+    def readinto(self, target) -> int:
+        if not self._fill():
+            return 0
+        size = min(len(target), len(self.buffer) - self.offset)
+        target[:size] = self.buffer[self.offset:self.offset + size]
+        self.offset += size
+        self.bytes_read += size
+        return size
+
+
+def read_metadata(data: bytes, check_registry: Optional[Callable[[dict], List[str]]] = None) -> dict:
+    """Parse operator-export.json, raising ValueError unless it and every registry entry are well-formed"""
+    metadata = json.loads(data.decode("utf-8"))
+    if not isinstance(metadata, dict):
+        raise ValueError(f"{METADATA_NAME} must be a JSON object")
+    registry = metadata.get("registry", [])
+    if not isinstance(registry, list):
+        raise ValueError(f"{METADATA_NAME}: registry must be a list")
+    for index, entry in enumerate(registry):
+        if not isinstance(entry, dict):
+            problems = ["not an object"]
+        else:
+            problems = check_registry(entry) if check_registry else []
+        if problems:
+            raise ValueError(f"{METADATA_NAME}: registry entry {index}: {'; '.join(problems)}")
+    return metadata
+
+
+def import_archive(store, reader: ChunkReader, check: Optional[Callable[[str], List[str]]] = None,
+                   meta: Optional[dict] = None,
+                   check_registry: Optional[Callable[[dict], List[str]]] = None) -> dict:
+    """Ingest agents/<name>.py members of a tar stream (plain, gzip, bzip2, xz or zstd) into the store
+
+    Files identical to the stored agent of the same name are skipped; content already stored
+    under another name is counted as deduplicated (the store keeps a single blob). `check`
+    returns reasons to reject a source and `check_registry` reasons to reject a registry entry of
+    the metadata, which must come before any agent so a bad one fails the import before anything
+    is stored. The manifest is saved once at the end; nothing is materialized here, so the
+    caller controls when files appear in agents/.
+    """
+    result = {"added": [], "updated": [], "unchanged": [], "deduplicated": [], "rejected": [],
+              "metadata": None, "bytes": 0}
+    # Manifest records and version counts replaced so far, restored if the archive turns out to be bad
+    replaced = {}
+    try:
+        # content hash -> first agent with it, and each agent's current hash
+        existing, current = {}, {}
+        for name in list(store.manifest):
+            source = store.get(name)
+            if source is not None:
+                current[name] = content_hash(source)
+                existing.setdefault(current[name], name)
+
+        # Also leaves enough bytes buffered for tarfile's own compression sniffing
+        if reader.peek(8)[:4] == ZSTD_MAGIC:
+            if zstandard is None:
+                raise ValueError("zstd archives require the zstandard package")
+            tar = tarfile.open(fileobj=zstandard.ZstdDecompressor().stream_reader(reader), mode="r|")
+        else:
+            tar = tarfile.open(fileobj=reader, mode="r|*")
+
+        members = agents = 0
+        with tar:
+            for member in tar:
+                members += 1
+                if members > MAX_MEMBERS:
+                    raise ValueError(f"Archive has more than {MAX_MEMBERS} members")
+                if not member.isfile():
+                    continue
+                if member.name == METADATA_NAME:
+                    if agents:
+                        raise ValueError(f"{METADATA_NAME} must come before the agent files")
+                    if member.size > MAX_MEMBER_BYTES:
+                        raise ValueError(f"{METADATA_NAME} is larger than {MAX_MEMBER_BYTES} bytes")
+                    result["metadata"] = read_metadata(tar.extractfile(member).read(), check_registry)
+                    continue
+                found = AGENT_NAME.match(member.name)
+                if not found:
+                    continue
+                name = found.group(1)
+                agents += 1
+                if member.size > MAX_MEMBER_BYTES:
+                    result["rejected"].append({"agent": name, "reason": f"larger than {MAX_MEMBER_BYTES} bytes"})
+                    continue
+                try:
+                    source = tar.extractfile(member).read().decode("utf-8")
+                except UnicodeDecodeError:
+                    result["rejected"].append({"agent": name, "reason": "not UTF-8 text"})
+                    continue
+
+                digest = content_hash(source)
+                if current.get(name) == digest:
+                    result["unchanged"].append(name)
+                    continue
+                if name in RESERVED_AGENTS:
+                    result["rejected"].append({"agent": name, "reason": "reserved name"})
+                    continue
+                problems = check(source) if check else []
+                if problems:
+                    result["rejected"].append({"agent": name, "reason": "; ".join(problems)})
+                    continue
+                if digest in existing:
+                    result["deduplicated"].append({"agent": name, "same_as": existing[digest]})
+                result["updated" if name in store.manifest else "added"].append(name)
+                replaced.setdefault(name, (store.manifest.get(name), store.versions.latest(name)))
+                store.put(name, source, save=False, meta=meta)
+                existing.setdefault(digest, name)
+                current[name] = digest
+    except BaseException:
+        for name, (record, version) in replaced.items():
+            if record is None:
+                store.manifest.pop(name, None)
+            else:
+                store.manifest[name] = record
+            store.versions.truncate(name, version)
+        raise
+    finally:
+        result["bytes"] = reader.bytes_read
+        reader.close()
+    if replaced:
+        store.flush()
+    return result
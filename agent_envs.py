@@ -0,0 +1,307 @@
+"""
+Shared dependency environments for agents
+Third-party imports are read from each agent's AST and mapped to distributions; agents needing the
+same packages share one virtualenv, keyed by the hash of that set and installed from a local wheel cache
+"""
+import ast
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import venv
+from collections import OrderedDict
+from datetime import datetime
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DATA_DIR = Path(os.getenv("OPERATOR_DATA_DIR", "data"))
+
+# Install only from the wheel cache by default; 0 lets a cache miss download binary wheels from the index
+OFFLINE = os.getenv("AGENT_WHEELS_OFFLINE", "1") != "0"
+INSTALL_TIMEOUT = float(os.getenv("AGENT_ENV_INSTALL_TIMEOUT", 300))
+# A failed build is not retried on every run, only after this many seconds
+RETRY_AFTER = 300.0
+PLAN_CACHE_SIZE = 1024
+
+# Import names whose distribution is named differently, for packages the host does not have
+KNOWN_DISTRIBUTIONS = {
+    "bs4": "beautifulsoup4",
+    "cv2": "opencv-python",
+    "dateutil": "python-dateutil",
+    "docx": "python-docx",
+    "dotenv": "python-dotenv",
+    "fitz": "pymupdf",
+    "git": "GitPython",
+    "github": "PyGithub",
+    "jwt": "PyJWT",
+    "magic": "python-magic",
+    "MySQLdb": "mysqlclient",
+    "OpenSSL": "pyOpenSSL",
+    "PIL": "pillow",
+    "psycopg2": "psycopg2-binary",
+    "serial": "pyserial",
+    "sklearn": "scikit-learn",
+    "slack_sdk": "slack-sdk",
+    "telegram": "python-telegram-bot",
+    "yaml": "pyyaml",
+}
+IMPORT_ERRORS = {"ImportError", "ModuleNotFoundError", "Exception", "BaseException"}
+
+
+def _catches_import_error(node: ast.Try) -> bool:
+    for handler in node.handlers:
+        if handler.type is None:
+            return True
+        types = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+        if any(isinstance(t, ast.Name) and t.id in IMPORT_ERRORS for t in types):
+            return True
+    return False
+
+
+def find_imports(source: str) -> Tuple[List[str], List[str]]:
+    """Top-level modules imported by source, as (required, optional)
+
+    Imports inside a try that handles ImportError are optional: the agent runs without them.
+    Raises SyntaxError for unparsable source.
+    """
+    required, optional = set(), set()
+
+    def visit(node: ast.AST, guarded: bool):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names = [node.module]
+        else:
+            names = []
+        for name in names:
+            (optional if guarded else required).add(name.split(".")[0])
+
+        if isinstance(node, ast.Try):
+            for child in node.body:
+                visit(child, guarded or _catches_import_error(node))
+            for child in node.handlers + node.orelse + node.finalbody:
+                visit(child, guarded)
+            return
+        for child in ast.iter_child_nodes(node):
+            visit(child, guarded)
+
+    visit(ast.parse(source), False)
+    required = {name for name in required if name not in sys.stdlib_module_names and name != "__future__"}
+    optional = {name for name in optional - required if name not in sys.stdlib_module_names}
+    return sorted(required), sorted(optional)
+
+
+class AgentEnvironments:
+    """Resolves the interpreter an agent runs with, building shared virtualenvs as needed
+
+    Agents whose third-party imports are all installed on the host run with the host interpreter
+    (and the fork server). Otherwise the missing distributions form the environment's key; the
+    virtualenv sees the host's site-packages, so it only holds what the host lacks.
+    """
+
+    def __init__(self, root=None, wheels=None, python: str = sys.executable, offline: bool = OFFLINE,
+                 project_root=None):
+        self.root = Path(root) if root else DATA_DIR / "envs"
+        # Its modules (tracing, log_pipeline, ...) are importable by agents and never installed
+        self.project_root = Path(project_root) if project_root else Path(__file__).resolve().parent
+        self._project_modules: Optional[set] = None
+        self.wheels = Path(wheels or os.getenv("AGENT_WHEEL_CACHE") or DATA_DIR / "wheels")
+        self.python = python
+        self.offline = offline
+        # (path, mtime_ns, size) -> plan, so repeat runs skip parsing
+        self.plans: "OrderedDict[tuple, dict]" = OrderedDict()
+        # key -> agents last seen using the environment
+        self.users: Dict[str, set] = {}
+        self.failures: Dict[str, Tuple[float, str]] = {}
+        self.counts = {"host": 0, "reused": 0, "built": 0, "failed": 0}
+        self._distributions: Optional[Dict[str, List[str]]] = None
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def distribution(self, module: str) -> Tuple[str, Optional[str]]:
+        """(distribution name, installed version or None) providing a top-level module"""
+        with self._lock:
+            if self._distributions is None:
+                # Scans every installed distribution's metadata; done once
+                self._distributions = metadata.packages_distributions()
+            installed = self._distributions.get(module)
+        if installed:
+            try:
+                return installed[0], metadata.version(installed[0])
+            except metadata.PackageNotFoundError:
+                pass
+        return KNOWN_DISTRIBUTIONS.get(module, module.replace("_", "-")), None
+
+    def plan(self, source: str, local_modules: Iterable[str] = ()) -> dict:
+        """Imports of an agent, the distributions they need and which of those the host lacks"""
+        required, optional = find_imports(source)
+        local = set(local_modules)
+        requirements, missing = [], []
+        for module in required:
+            if module in local:
+                continue
+            name, version = self.distribution(module)
+            requirements.append(f"{name}=={version}" if version else name)
+            if version is None:
+                missing.append(name)
+        missing = sorted(set(missing), key=str.lower)
+        return {"imports": required, "optional": [m for m in optional if m not in local],
+                "requirements": requirements, "missing": missing,
+                "key": self.key(missing) if missing else None}
+
+    def key(self, requirements: List[str]) -> str:
+        """Environment key: the dependency set plus the interpreter it is built for"""
+        spec = "\n".join(sorted({r.lower() for r in requirements}))
+        tag = f"{sys.implementation.name}-{sys.version_info.major}.{sys.version_info.minor}-{sys.platform}"
+        return hashlib.sha256(f"{tag}\n{spec}".encode("utf-8")).hexdigest()[:16]
+
+    def plan_file(self, path: Path) -> dict:
+        path = Path(path)
+        stat = path.stat()
+        cache_key = (str(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self.plans.get(cache_key)
+            if cached is not None:
+                self.plans.move_to_end(cache_key)
+                return cached
+        plan = self.plan(path.read_text(encoding="utf-8", errors="replace"),
+                         self.local_modules(path.parent) | self.project_modules())
+        with self._lock:
+            self.plans[cache_key] = plan
+            while len(self.plans) > PLAN_CACHE_SIZE:
+                self.plans.popitem(last=False)
+        return plan
+
+    @staticmethod
+    def local_modules(folder: Path) -> set:
+        """Names importable from a folder: its .py files and its directories"""
+        return {p.stem for p in folder.glob("*.py")} | {p.name for p in folder.iterdir() if p.is_dir()}
+
+    def project_modules(self) -> set:
+        if self._project_modules is None:
+            self._project_modules = self.local_modules(self.project_root)
+        return self._project_modules
+
+    def env_path(self, key: str) -> Path:
+        return self.root / key
+
+    def env_python(self, key: str) -> Path:
+        if os.name == "nt":
+            return self.env_path(key) / "Scripts" / "python.exe"
+        return self.env_path(key) / "bin" / "python"
+
+    def is_ready(self, key: str) -> bool:
+        return (self.env_path(key) / "env.json").exists()
+
+    def python_for(self, path: Path) -> Tuple[str, dict]:
+        """Interpreter to run an agent file with, building its environment on first use
+
+        Raises RuntimeError (or SyntaxError for unparsable agents) when no environment can be had.
+        """
+        plan = self.plan_file(path)
+        if plan["key"] is None:
+            self.counts["host"] += 1
+            return self.python, plan
+        with self._lock:
+            self.users.setdefault(plan["key"], set()).add(Path(path).name)
+        return str(self.ensure(plan["missing"], plan["key"])), plan
+
+    def prepare(self, path: Path) -> Optional[dict]:
+        """Build an agent's environment ahead of its first run; errors are logged, not raised"""
+        try:
+            return self.python_for(path)[1]
+        except (OSError, SyntaxError, RuntimeError) as e:
+            print(f"Environment for {Path(path).name} not prepared: {e}")
+            return None
+
+    def ensure(self, requirements: List[str], key: Optional[str] = None) -> Path:
+        """Python of the environment for requirements, creating it if needed"""
+        key = key or self.key(requirements)
+        if self.is_ready(key):
+            self.counts["reused"] += 1
+            return self.env_python(key)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another run may have built it while this one waited
+            if self.is_ready(key):
+                self.counts["reused"] += 1
+                return self.env_python(key)
+            failed = self.failures.get(key)
+            if failed and time.time() - failed[0] < RETRY_AFTER:
+                raise RuntimeError(failed[1])
+            try:
+                self._build(key, requirements)
+            except (OSError, subprocess.SubprocessError, RuntimeError) as e:
+                self.counts["failed"] += 1
+                self.failures[key] = (time.time(), f"Building environment {key} failed: {e}")
+                shutil.rmtree(self.env_path(key), ignore_errors=True)
+                raise RuntimeError(self.failures[key][1]) from e
+            self.failures.pop(key, None)
+            self.counts["built"] += 1
+        return self.env_python(key)
+
+    def _pip(self, *args: str):
+        result = subprocess.run([self.python, "-m", "pip", "--disable-pip-version-check", "--no-input", *args],
+                                capture_output=True, text=True, timeout=INSTALL_TIMEOUT)
+        if result.returncode != 0:
+            lines = (result.stderr or result.stdout).strip().splitlines()
+            raise RuntimeError(lines[-1] if lines else f"pip exited with {result.returncode}")
+        return result
+
+    def _build(self, key: str, requirements: List[str]):
+        started = time.perf_counter()
+        path = self.env_path(key)
+        shutil.rmtree(path, ignore_errors=True)
+        # No pip of its own: the host's pip installs into it via --python
+        venv.EnvBuilder(system_site_packages=True, with_pip=False, symlinks=os.name != "nt").create(path)
+        self.wheels.mkdir(parents=True, exist_ok=True)
+        install = ["--python", str(self.env_python(key)), "install", "--no-index",
+                   "--find-links", str(self.wheels), *requirements]
+        try:
+            self._pip(*install)
+        except RuntimeError:
+            if self.offline:
+                raise
+            # Fill the cache (dependencies included) from the index, then install from it alone;
+            # binary wheels only, since building an sdist runs its setup code
+            self._pip("wheel", "--only-binary", ":all:", "--wheel-dir", str(self.wheels),
+                      "--find-links", str(self.wheels), *requirements)
+            self._pip(*install)
+        frozen = self._pip("--python", str(self.env_python(key)), "list", "--local", "--format", "json").stdout
+        info = {"key": key, "requirements": sorted(requirements), "installed": json.loads(frozen),
+                "python": sys.version.split()[0], "created": datetime.now().isoformat(),
+                "build_seconds": round(time.perf_counter() - started, 2)}
+        # Written last: its presence marks the environment usable
+        tmp = path / "env.json.tmp"
+        tmp.write_text(json.dumps(info, indent=1), encoding="utf-8")
+        os.replace(tmp, path / "env.json")
+
+    def describe(self, key: str) -> Optional[dict]:
+        try:
+            info = json.loads((self.env_path(key) / "env.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            info["agents"] = sorted(self.users.get(key, ()))
+        return info
+
+    def stats(self) -> dict:
+        """Environments on disk, wheel cache size and how runs were served"""
+        envs = []
+        if self.root.exists():
+            for path in sorted(self.root.iterdir()):
+                info = self.describe(path.name)
+                if info is not None:
+                    envs.append({k: info[k] for k in ("key", "requirements", "agents", "created", "build_seconds")})
+        wheels = list(self.wheels.glob("*.whl")) if self.wheels.exists() else []
+        with self._lock:
+            failures = {key: error for key, (_, error) in self.failures.items()}
+        return {"environments": envs, "wheels": len(wheels),
+                "wheel_bytes": sum(wheel.stat().st_size for wheel in wheels),
+                "offline": self.offline, "runs": dict(self.counts), "failures": failures}
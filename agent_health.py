@@ -0,0 +1,125 @@
+"""
+Resource sampling for running agent processes
+Reads CPU time, RSS, open file descriptors and thread counts from /proc into per-agent ring buffers
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+SAMPLE_INTERVAL = float(os.getenv("AGENT_HEALTH_INTERVAL", 2.0))
+SAMPLES_PER_AGENT = int(os.getenv("AGENT_HEALTH_SAMPLES", 300))
+
+PROC = "/proc"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def proc_available() -> bool:
+    return os.path.isdir(os.path.join(PROC, "self"))
+
+
+def sample_process(pid: int) -> Optional[dict]:
+    """Read one process's resource usage from /proc; None if it has exited"""
+    try:
+        with open(f"{PROC}/{pid}/stat", "rb") as f:
+            stat = f.read().decode("ascii", errors="replace")
+        # The command name may contain spaces, so split after its closing parenthesis
+        fields = stat[stat.rindex(")") + 2:].split()
+        open_fds = len(os.listdir(f"{PROC}/{pid}/fd"))
+    except (OSError, ValueError):
+        return None
+
+    # fields[0] is field 3 (state) of proc(5)
+    return {
+        "state": fields[0],
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / CLOCK_TICKS,
+        "threads": int(fields[17]),
+        "rss_bytes": int(fields[21]) * PAGE_SIZE,
+        "open_fds": open_fds,
+    }
+
+
+class HealthMonitor:
+    """Periodically samples every running agent process"""
+
+    def __init__(self, runner, interval: float = SAMPLE_INTERVAL, samples: int = SAMPLES_PER_AGENT):
+        self.runner = runner
+        self.interval = interval
+        self.samples: Dict[str, deque] = {}
+        self.max_samples = samples
+        self.available = proc_available()
+        self._previous: Dict[int, tuple] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.available and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            targets = [(run.agent, run.run_id, run.pid) for run in self.runner.running_runs() if run.pid]
+            if targets:
+                for agent, sample in await asyncio.to_thread(self.collect, targets):
+                    self.samples.setdefault(agent, deque(maxlen=self.max_samples)).append(sample)
+            await asyncio.sleep(self.interval)
+
+    def collect(self, targets: List[tuple]) -> List[tuple]:
+        """Sample (agent, run_id, pid) targets; CPU percent is relative to the previous sample"""
+        now = time.time()
+        results = []
+        seen = set()
+        for agent, run_id, pid in targets:
+            sample = sample_process(pid)
+            if sample is None:
+                continue
+            seen.add(pid)
+            previous = self._previous.get(pid)
+            cpu_percent = None
+            if previous and now > previous[0]:
+                cpu_percent = round(100 * (sample["cpu_seconds"] - previous[1]) / (now - previous[0]), 1)
+            self._previous[pid] = (now, sample["cpu_seconds"])
+            results.append((agent, dict(sample, run_id=run_id, pid=pid, timestamp=now, cpu_percent=cpu_percent)))
+        for pid in set(self._previous) - seen:
+            del self._previous[pid]
+        return results
+
+    def health(self, agent: str, limit: Optional[int] = None) -> dict:
+        """Latest sample per running process plus the retained history for an agent"""
+        history = list(self.samples.get(agent, ()))
+        if limit is not None:
+            history = history[-limit:]
+        running = {run.run_id for run in self.runner.running_runs() if run.agent == agent}
+        latest = {}
+        for sample in history:
+            if sample["run_id"] in running:
+                latest[sample["run_id"]] = sample
+        return {
+            "agent": agent,
+            "monitoring": self.available,
+            "interval": self.interval,
+            "running": len(running),
+            "latest": list(latest.values()),
+            "peak_rss_bytes": max((s["rss_bytes"] for s in history), default=None),
+            "samples": history,
+        }
+
+    def overview(self) -> List[dict]:
+        """Most recent sample of every running process, heaviest CPU first"""
+        running = {run.run_id for run in self.runner.running_runs()}
+        latest = {}
+        for agent, history in self.samples.items():
+            for sample in reversed(history):
+                if sample["run_id"] in running and sample["run_id"] not in latest:
+                    latest[sample["run_id"]] = dict(sample, agent=agent)
+        return sorted(latest.values(), key=lambda s: (s["cpu_percent"] or 0, s["rss_bytes"]), reverse=True)
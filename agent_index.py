@@ -0,0 +1,189 @@
+"""
+Static-analysis index of agent code
+AST-derived summary of every file in agents/, persisted and refreshed by content hash
+"""
+import ast
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DATA_DIR = Path(os.getenv("OPERATOR_DATA_DIR", "data"))
+INDEX_VERSION = 1
+# Queries within this window reuse the last directory scan
+REFRESH_INTERVAL = 1.0
+
+
+def analyze_source(source: str) -> dict:
+    """Extract classes, functions, imports and entry points from agent source"""
+    entry = {
+        "classes": [],
+        "functions": [],
+        "imports": [],
+        "has_main": False,
+        "has_run": False,
+        "has_stop": False,
+        "lines": source.count("\n") + 1,
+        "error": None,
+    }
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as e:
+        entry["error"] = f"SyntaxError: {e.msg} (line {e.lineno})"
+        return entry
+
+    methods = set()
+    imports = set()
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            entry["classes"].append(node.name)
+            methods.update(n.name for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef)))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            entry["functions"].append(node.name)
+
+    # Imports may live inside functions (lazy imports), so walk the whole tree
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            imports.add(node.module)
+
+    entry["imports"] = sorted(imports)
+    entry["has_main"] = "main" in entry["functions"]
+    entry["has_run"] = "run" in entry["functions"] or "run" in methods
+    entry["has_stop"] = "stop" in entry["functions"] or "stop" in methods
+    return entry
+
+
+class AgentIndex:
+    """Incrementally maintained index over agents/*.py"""
+
+    def __init__(self, agents_folder="agents", index_file=None):
+        self.agents_folder = Path(agents_folder)
+        self.index_file = Path(index_file) if index_file else DATA_DIR / "agent_index.json"
+        self.entries: Dict[str, dict] = {}
+        self.by_import: Dict[str, set] = {}
+        self.last_refresh = 0.0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load the persisted index, ignoring it if missing or from an older version"""
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.entries = data.get("entries", {})
+        except (OSError, ValueError):
+            self.entries = {}
+        self._rebuild_reverse_index()
+
+    def save(self):
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "entries": self.entries}, f)
+        os.replace(tmp, self.index_file)
+
+    def _rebuild_reverse_index(self):
+        by_import: Dict[str, set] = {}
+        for name, entry in self.entries.items():
+            for module in entry["imports"]:
+                by_import.setdefault(module, set()).add(name)
+                top = module.split(".")[0]
+                if top != module:
+                    by_import.setdefault(top, set()).add(name)
+        self.by_import = by_import
+
+    def _index_file(self, path: Path, stat: os.stat_result) -> bool:
+        """(Re)index one file; returns True if its entry changed"""
+        previous = self.entries.get(path.name)
+        if previous and previous["mtime"] == stat.st_mtime and previous["size"] == stat.st_size:
+            return False
+
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if previous and previous["hash"] == digest:
+            previous["mtime"] = stat.st_mtime
+            previous["size"] = stat.st_size
+            return True
+
+        entry = analyze_source(data.decode("utf-8", errors="replace"))
+        entry.update({"file": f"{self.agents_folder.name}/{path.name}", "hash": digest,
+                      "mtime": stat.st_mtime, "size": stat.st_size})
+        self.entries[path.name] = entry
+        return True
+
+    def refresh(self, force: bool = False) -> bool:
+        """Bring the index in line with the agents folder; only changed files are parsed"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self.last_refresh < REFRESH_INTERVAL:
+                return False
+            self.last_refresh = now
+
+            changed = False
+            seen = set()
+            if self.agents_folder.exists():
+                with os.scandir(self.agents_folder) as it:
+                    for item in it:
+                        if not item.name.endswith(".py") or item.name == "__init__.py" or not item.is_file():
+                            continue
+                        seen.add(item.name)
+                        changed |= self._index_file(Path(item.path), item.stat())
+
+            for name in set(self.entries) - seen:
+                del self.entries[name]
+                changed = True
+
+            if changed:
+                self._rebuild_reverse_index()
+                self.save()
+            return changed
+
+    def update_file(self, path):
+        """Index a single file right after it is written"""
+        path = Path(path)
+        with self._lock:
+            if self._index_file(path, path.stat()):
+                self._rebuild_reverse_index()
+                self.save()
+
+    def search(self, imports: Optional[str] = None, defines: Optional[str] = None,
+               has: Optional[List[str]] = None, lacks: Optional[List[str]] = None) -> List[dict]:
+        """Return entries matching every given filter
+
+        imports: module name (top-level package matches submodules)
+        defines: class or top-level function name
+        has / lacks: entry points among main, run, stop
+        """
+        self.refresh()
+        with self._lock:
+            if imports:
+                names = sorted(self.by_import.get(imports, ()))
+            else:
+                names = sorted(self.entries)
+
+            results = []
+            for name in names:
+                entry = self.entries[name]
+                if defines and defines not in entry["classes"] and defines not in entry["functions"]:
+                    continue
+                if has and not all(entry.get(f"has_{point}") for point in has):
+                    continue
+                if lacks and any(entry.get(f"has_{point}") for point in lacks):
+                    continue
+                results.append(entry)
+            return results
+
+    def summary(self) -> dict:
+        self.refresh()
+        with self._lock:
+            return {
+                "files": len(self.entries),
+                "parse_errors": sum(1 for e in self.entries.values() if e["error"]),
+                "imports": {module: len(files) for module, files in sorted(self.by_import.items())},
+            }
@@ -0,0 +1,267 @@
+"""
+Agent execution layer
+Launches agent files as processes (through the fork server when available, or with the shared
+dependency environment an agent needs) and tracks their runs
+"""
+import asyncio
+import os
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from forkserver import ForkServer
+from run_stream import RunOutputBuffer
+
+# Finished runs kept in memory for status queries
+RUN_HISTORY = 1000
+# Longer output lines are split; StreamReader.readline would raise on them instead
+MAX_LINE_BYTES = 64 * 1024
+READ_CHUNK = 64 * 1024
+
+
+class AgentRun:
+    """State of one agent execution"""
+
+    def __init__(self, agent: str, trigger: str = "manual"):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.agent = agent
+        self.trigger = trigger
+        self.status = "starting"
+        self.pid: Optional[int] = None
+        self.exit_code: Optional[int] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.duration: Optional[float] = None
+        self.output = RunOutputBuffer()
+        self.done = asyncio.Event()
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "agent": self.agent,
+            "trigger": self.trigger,
+            "status": self.status,
+            "pid": self.pid,
+            "exit_code": self.exit_code,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration": self.duration,
+        }
+
+    def record(self) -> dict:
+        """Full result for the run history store, including buffered output"""
+        return dict(
+            self.to_dict(),
+            output=[{"stream": stream, "line": line} for _, stream, line, _ in self.output.lines],
+            output_lines=self.output.next_seq,
+            output_truncated=self.output.first_seq,
+        )
+
+
+class AgentRunner:
+    """Starts agent processes and follows them to completion on the event loop"""
+
+    def __init__(self, agents_folder="agents", store=None, use_forkserver: Optional[bool] = None,
+                 environments=None):
+        self.agents_folder = Path(agents_folder)
+        self.store = store
+        # AgentEnvironments choosing the interpreter per agent; None runs everything on the host
+        self.environments = environments
+        if use_forkserver is None:
+            use_forkserver = os.name == "posix" and os.getenv("AGENT_FORKSERVER", "1") != "0"
+        self.forkserver = ForkServer() if use_forkserver else None
+        self.runs: "OrderedDict[str, AgentRun]" = OrderedDict()
+        self.active: Dict[str, set] = {}
+        # Callbacks invoked with each finished AgentRun
+        self.on_finish: List[Callable[[AgentRun], None]] = []
+
+    def resolve(self, agent: str) -> Path:
+        """Return the agent file, materializing it from the store if needed"""
+        name = agent if agent.endswith(".py") else f"{agent}.py"
+        if "/" in name or "\\" in name or name.startswith("."):
+            raise ValueError(f"Invalid agent name: {agent}")
+        path = self.agents_folder / name
+        if not path.exists() and self.store is not None and name in self.store.manifest:
+            path = self.store.materialize(name)
+        if not path.exists():
+            raise FileNotFoundError(f"Agent not found: {agent}")
+        return path
+
+    def running_count(self, agent: str) -> int:
+        return len(self.active.get(agent, ()))
+
+    def running_runs(self) -> List[AgentRun]:
+        return [self.runs[run_id] for ids in self.active.values() for run_id in ids if run_id in self.runs]
+
+    def get(self, run_id: str) -> Optional[AgentRun]:
+        return self.runs.get(run_id)
+
+    def track(self, run: AgentRun):
+        """Keep a run in the bounded history so it can be looked up by id"""
+        self.runs[run.run_id] = run
+        while len(self.runs) > RUN_HISTORY:
+            oldest_id, oldest = next(iter(self.runs.items()))
+            if not oldest.done.is_set():
+                break
+            del self.runs[oldest_id]
+
+    async def start_run(self, agent: str, trigger: str = "manual", run: Optional[AgentRun] = None) -> AgentRun:
+        """Launch an agent and return immediately; completion is tracked in the background
+
+        A run created ahead of time (e.g. while queued) can be passed in to be started.
+        """
+        path = self.resolve(agent)
+        if run is None:
+            run = AgentRun(path.stem, trigger)
+            self.track(run)
+        self.active.setdefault(run.agent, set()).add(run.run_id)
+        try:
+            python = await self._python_for(run, path)
+            process = await self._launch(path, python)
+        except Exception as e:
+            self.fail(run, f"launch failed: {e}")
+            raise
+        run.pid = process["pid"]
+        run.status = "running"
+        run.started_at = datetime.now()
+        asyncio.create_task(self._follow(run, process, time.perf_counter()))
+        return run
+
+    async def _python_for(self, run: AgentRun, path: Path) -> str:
+        """Interpreter for the agent; the first run of a new dependency set waits for its install"""
+        if self.environments is None:
+            return sys.executable
+        try:
+            python, _ = await asyncio.get_running_loop().run_in_executor(None, self.environments.python_for, path)
+        except (RuntimeError, SyntaxError) as e:
+            # Run anyway: the agent reports its own ImportError or SyntaxError
+            run.output.append("stderr", f"dependency environment unavailable, using the host interpreter: {e}")
+            return sys.executable
+        return python
+
+    async def _launch(self, path: Path, python: str = sys.executable) -> dict:
+        """Start the process and return its pid, output streams and exit waiter"""
+        # The fork server's children share the host interpreter's imports
+        proc = await self._fork(path) if python == sys.executable else None
+        if proc is not None:
+            return {
+                "pid": proc.pid,
+                "stdout": await self._pipe_reader(proc.stdout),
+                "stderr": await self._pipe_reader(proc.stderr),
+                "wait": proc.wait_async,
+                "process": proc,
+            }
+
+        proc = await asyncio.create_subprocess_exec(
+            python, str(path),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        return {"pid": proc.pid, "stdout": proc.stdout, "stderr": proc.stderr, "wait": proc.wait, "process": proc}
+
+    async def _fork(self, path: Path):
+        """Launch through the fork server; None when there is none or it cannot start"""
+        if self.forkserver is None:
+            return None
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self.forkserver.launch, str(path), (), os.getcwd())
+        except RuntimeError as e:
+            if self.forkserver.running:
+                raise
+            # A server that failed to start would fail again on every run
+            print(f"Fork server unavailable, launching agents as plain subprocesses: {e}")
+            self.forkserver = None
+            return None
+
+    @staticmethod
+    async def _pipe_reader(fileobj) -> asyncio.StreamReader:
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), fileobj)
+        return reader
+
+    async def _drain(self, run: AgentRun, stream: asyncio.StreamReader, name: str):
+        pending = b""
+        # Set after an over-long line was flushed early; its newline must not add an empty line
+        flushed = False
+        while True:
+            chunk = await stream.read(READ_CHUNK)
+            if not chunk:
+                break
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            if flushed and lines:
+                if not lines[0]:
+                    lines.pop(0)
+                flushed = False
+            if len(pending) > MAX_LINE_BYTES:
+                lines.append(pending)
+                pending = b""
+                flushed = True
+            for line in lines:
+                for start in range(0, max(len(line), 1), MAX_LINE_BYTES):
+                    self.on_output(run, name, line[start:start + MAX_LINE_BYTES].decode("utf-8", errors="replace"))
+        if pending:
+            self.on_output(run, name, pending.decode("utf-8", errors="replace"))
+
+    def on_output(self, run: AgentRun, stream: str, line: str):
+        """Called for every output line of a run"""
+        run.output.append(stream, line)
+
+    async def _follow(self, run: AgentRun, process: dict, started: float):
+        exit_code = -1
+        try:
+            try:
+                await asyncio.gather(
+                    self._drain(run, process["stdout"], "stdout"),
+                    self._drain(run, process["stderr"], "stderr"),
+                )
+            except Exception as e:
+                # Nobody reads its pipes any more, so the process could block forever
+                run.output.append("stderr", f"output capture failed: {e}")
+                try:
+                    process["process"].kill()
+                except (OSError, ProcessLookupError):
+                    pass
+            exit_code = await process["wait"]()
+        finally:
+            run.duration = round(time.perf_counter() - started, 3)
+            self._finish(run, exit_code)
+
+    def fail(self, run: AgentRun, message: str):
+        """Finish a run that never got a process, e.g. its agent disappeared while it was queued"""
+        if run.done.is_set():
+            return
+        run.output.append("stderr", message)
+        self._finish(run, -1)
+
+    def _finish(self, run: AgentRun, exit_code: int):
+        run.exit_code = exit_code
+        run.status = "succeeded" if exit_code == 0 else "failed"
+        run.finished_at = datetime.now()
+        self.active.get(run.agent, set()).discard(run.run_id)
+        run.output.close()
+        run.done.set()
+        for callback in self.on_finish:
+            try:
+                callback(run)
+            except Exception as e:
+                print(f"Run finish callback failed: {e}")
+
+    async def run(self, agent: str, trigger: str = "manual") -> AgentRun:
+        """Launch an agent and wait for it to finish"""
+        run = await self.start_run(agent, trigger)
+        await run.done.wait()
+        return run
+
+    def shutdown(self):
+        if self.forkserver is not None:
+            self.forkserver.stop()
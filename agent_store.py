@@ -0,0 +1,189 @@
+"""
+Content-addressed storage for agent source
+Blobs are keyed by a normalized-content hash; fallback and blueprint agents are kept as template parameters
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Optional
+
+from agent_versions import AgentVersions
+from blueprints import BY_ID as BLUEPRINTS, fallback
+
+DATA_DIR = Path(os.getenv("OPERATOR_DATA_DIR", "data"))
+
+# Templates an agent body can be stored as instead of a blob
+TEMPLATES = {fallback.TEMPLATE_ID: fallback, **BLUEPRINTS}
+
+HEADER_PATTERN = re.compile(
+    r"\A# Agent generated from prompt: (?P<prompt>.*)\n# Generated on: (?P<generated_on>.*)\n\n"
+)
+
+
+def normalize(source: str) -> str:
+    """Canonical form used for hashing: LF line endings (the deploy header is split off separately)"""
+    return source.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def content_hash(source: str) -> str:
+    return hashlib.sha256(normalize(source).encode("utf-8")).hexdigest()
+
+
+def split_header(source: str):
+    """Separate the deploy header comment from the agent body"""
+    found = HEADER_PATTERN.match(source)
+    if not found:
+        return None, source
+    return found.groupdict(), source[found.end():]
+
+
+def render_header(header: Optional[dict]) -> str:
+    if not header:
+        return ""
+    return f"# Agent generated from prompt: {header['prompt']}\n# Generated on: {header['generated_on']}\n\n"
+
+
+class AgentStore:
+    """Deduplicated agent source store with on-demand materialization into agents/"""
+
+    def __init__(self, root=None, agents_folder="agents"):
+        self.root = Path(root) if root else DATA_DIR / "agent_store"
+        self.blob_dir = self.root / "blobs"
+        self.manifest_file = self.root / "manifest.json"
+        self.agents_folder = Path(agents_folder)
+        self.manifest: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.versions = AgentVersions(self)
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.manifest_file, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    def save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp, self.manifest_file)
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / f"{digest}.z"
+
+    def flush(self):
+        """Save the manifest after a batch of put(..., save=False)"""
+        with self._lock:
+            self.save()
+
+    def put_blob(self, source: str) -> str:
+        """Store normalized source once and return its hash"""
+        text = normalize(source)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                f.write(zlib.compress(text.encode("utf-8"), 9))
+            os.replace(tmp, path)
+        return digest
+
+    def get_blob(self, digest: str) -> str:
+        with open(self._blob_path(digest), "rb") as f:
+            return zlib.decompress(f.read()).decode("utf-8")
+
+    def put(self, name: str, source: str, save: bool = True, meta: Optional[dict] = None) -> dict:
+        """Store an agent file and record a version if it changed; template agents keep only their parameters
+
+        `meta` (e.g. the deploy id) is kept with the version.
+        """
+        header, body = split_header(source)
+        record = {"header": header, "size": len(source.encode("utf-8"))}
+
+        for template_id, template in TEMPLATES.items():
+            params = template.match(body)
+            if params is not None:
+                record.update({"template": template_id, "params": params})
+                break
+        else:
+            record["blob"] = self.put_blob(body)
+
+        meta = dict(meta or {})
+        if header:
+            meta.setdefault("prompt", header["prompt"][:200])
+        entry = self.versions.record(name, source, record, meta)
+        record["version"] = entry["version"] if entry else self.versions.latest(name)
+
+        with self._lock:
+            self.manifest[name] = record
+            if save:
+                self.save()
+        return record
+
+    def render(self, record: dict) -> str:
+        if "template" in record:
+            body = TEMPLATES[record["template"]].render(**record["params"])
+        else:
+            body = self.get_blob(record["blob"])
+        return render_header(record.get("header")) + body
+
+    def get(self, name: str) -> Optional[str]:
+        """Render an agent's source from the store"""
+        record = self.manifest.get(name)
+        if record is None:
+            return None
+        return self.render(record)
+
+    def materialize(self, name: str) -> Path:
+        """Write agents/<name> from the store if it is missing or stale"""
+        source = self.get(name)
+        if source is None:
+            raise KeyError(name)
+        path = self.agents_folder / name
+        if path.exists() and content_hash(path.read_text(encoding="utf-8")) == content_hash(source):
+            return path
+        self.agents_folder.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(source)
+        return path
+
+    def ingest_folder(self) -> int:
+        """Add agent files not yet in the store; returns the number ingested"""
+        added = 0
+        if not self.agents_folder.exists():
+            return added
+        for path in sorted(self.agents_folder.glob("*.py")):
+            if path.name == "__init__.py" or path.name in self.manifest:
+                continue
+            self.put(path.name, path.read_text(encoding="utf-8"), save=False)
+            added += 1
+        if added:
+            with self._lock:
+                self.save()
+        return added
+
+    def stats(self) -> dict:
+        """Logical vs stored bytes and the resulting dedup ratio"""
+        with self._lock:
+            records = list(self.manifest.values())
+        blobs = {r["blob"] for r in records if "blob" in r}
+        stored = sum(self._blob_path(d).stat().st_size for d in blobs if self._blob_path(d).exists())
+        if self.manifest_file.exists():
+            stored += self.manifest_file.stat().st_size
+        logical = sum(r["size"] for r in records)
+        return {
+            "agents": len(records),
+            "template_agents": sum(1 for r in records if "template" in r),
+            "unique_blobs": len(blobs),
+            "logical_bytes": logical,
+            "stored_bytes": stored,
+            "dedup_ratio": round(logical / stored, 2) if stored else 0.0,
+            "history": self.versions.stats(),
+        }
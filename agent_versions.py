@@ -0,0 +1,208 @@
+"""
+Agent version history
+Every change to an agent file becomes a version stored as a line delta against the previous one,
+with periodic full keyframes so any version rebuilds from at most KEYFRAME_INTERVAL - 1 deltas
+"""
+import difflib
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+KEYFRAME_INTERVAL = int(os.getenv("AGENT_VERSION_KEYFRAME", 10))
+# A delta this close to the full size is not worth the reconstruction work
+DELTA_MAX_RATIO = 0.8
+CACHE_SIZE = 64
+
+
+def compute_delta(base: List[str], target: List[str]) -> tuple:
+    """Ops rebuilding target from base: [start, end] copies base lines, a string is a new line
+
+    Returns (ops, lines added, lines removed).
+    """
+    ops = []
+    added = removed = 0
+    matcher = difflib.SequenceMatcher(None, base, target, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+            continue
+        removed += i2 - i1
+        added += j2 - j1
+        ops.extend(target[j1:j2])
+    return ops, added, removed
+
+
+def apply_delta(base: List[str], ops: list) -> List[str]:
+    lines = []
+    for op in ops:
+        if isinstance(op, list):
+            lines.extend(base[op[0]:op[1]])
+        else:
+            lines.append(op)
+    return lines
+
+
+class AgentVersions:
+    """Append-only version log per agent in <store>/versions/<name>.jsonl
+
+    Entries are one of: {"kind": "template"} (the store's template record), {"kind": "full"}
+    (a content-addressed blob) or {"kind": "delta"} (ops against the previous version).
+    """
+
+    def __init__(self, store, root: Optional[Path] = None, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.store = store
+        self.root = Path(root) if root else store.root / "versions"
+        self.keyframe_interval = keyframe_interval
+        self.logs: Dict[str, List[dict]] = {}
+        # (name, version) -> lines of recently rebuilt versions, each agent's latest included
+        self._texts: "OrderedDict[tuple, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _log_path(self, name: str) -> Path:
+        return self.root / f"{name}.jsonl"
+
+    def _entries(self, name: str) -> List[dict]:
+        entries = self.logs.get(name)
+        if entries is None:
+            entries = []
+            try:
+                with open(self._log_path(name), "r", encoding="utf-8") as f:
+                    entries = [json.loads(line) for line in f if line.strip()]
+            except (OSError, ValueError):
+                pass
+            self.logs[name] = entries
+        return entries
+
+    def _remember(self, name: str, version: int, lines: List[str]):
+        self._texts[(name, version)] = lines
+        self._texts.move_to_end((name, version))
+        while len(self._texts) > CACHE_SIZE:
+            self._texts.popitem(last=False)
+
+    def _lines(self, name: str, version: int) -> List[str]:
+        cached = self._texts.get((name, version))
+        if cached is not None:
+            return cached
+        entries = self._entries(name)
+        # Walk back to the nearest keyframe (or cached version), then replay deltas forward
+        start = version
+        while entries[start - 1]["kind"] == "delta" and (name, start) not in self._texts:
+            start -= 1
+        if (name, start) in self._texts:
+            lines = self._texts[(name, start)]
+        else:
+            lines = self._keyframe(entries[start - 1])
+        for entry in entries[start:version]:
+            lines = apply_delta(lines, entry["ops"])
+        self._remember(name, version, lines)
+        return lines
+
+    def _keyframe(self, entry: dict) -> List[str]:
+        if entry["kind"] == "template":
+            source = self.store.render(entry["record"])
+        else:
+            source = self.store.get_blob(entry["blob"])
+        return source.splitlines(keepends=True)
+
+    def record(self, name: str, source: str, record: dict, meta: Optional[dict] = None) -> Optional[dict]:
+        """Add a version if source differs from the latest one; returns the new entry"""
+        lines = source.splitlines(keepends=True)
+        with self._lock:
+            entries = self._entries(name)
+            previous = self._lines(name, len(entries)) if entries else None
+            if previous == lines:
+                return None
+            version = len(entries) + 1
+            entry = {"version": version, "created": datetime.now().isoformat(),
+                     "size": len(source.encode("utf-8")),
+                     "hash": hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]}
+            entry.update(meta or {})
+            if previous is not None:
+                ops, entry["added"], entry["removed"] = compute_delta(previous, lines)
+            else:
+                ops, entry["added"], entry["removed"] = None, len(lines), 0
+
+            if "template" in record:
+                # Parameters are smaller than any delta
+                entry.update(kind="template", record=dict(record))
+            elif (ops is not None and (version - 1) % self.keyframe_interval
+                  and len(json.dumps(ops)) < entry["size"] * DELTA_MAX_RATIO):
+                entry.update(kind="delta", ops=ops)
+            else:
+                entry.update(kind="full", blob=self.store.put_blob(source))
+
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self._log_path(name), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            entries.append(entry)
+            self._remember(name, version, lines)
+        return entry
+
+    def truncate(self, name: str, version: int):
+        """Drop versions after `version`, e.g. ones recorded for an import that was rolled back"""
+        with self._lock:
+            entries = self._entries(name)
+            if len(entries) <= version:
+                return
+            del entries[version:]
+            for key in [key for key in self._texts if key[0] == name and key[1] > version]:
+                del self._texts[key]
+            path = self._log_path(name)
+            if not entries:
+                path.unlink(missing_ok=True)
+                return
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in entries)
+            os.replace(tmp, path)
+
+    def list(self, name: str) -> List[dict]:
+        with self._lock:
+            entries = list(self._entries(name))
+        return [{key: value for key, value in entry.items() if key not in ("ops", "record", "blob")}
+                for entry in entries]
+
+    def latest(self, name: str) -> int:
+        with self._lock:
+            return len(self._entries(name))
+
+    def get(self, name: str, version: int) -> Optional[str]:
+        with self._lock:
+            if not 1 <= version <= len(self._entries(name)):
+                return None
+            return "".join(self._lines(name, version))
+
+    def diff(self, name: str, version: int, against: Optional[int] = None, context: int = 3) -> Optional[str]:
+        """Unified diff from `against` (default: the previous version) to `version`"""
+        against = version - 1 if against is None else against
+        target = self.get(name, version)
+        if target is None or (against and self.get(name, against) is None):
+            return None
+        base = self.get(name, against) if against else ""
+        return "".join(difflib.unified_diff(
+            base.splitlines(keepends=True), target.splitlines(keepends=True),
+            fromfile=f"{name}@{against}" if against else "/dev/null", tofile=f"{name}@{version}", n=context))
+
+    def stats(self) -> dict:
+        """Version counts by kind and bytes on disk (logs plus keyframe blobs)"""
+        kinds = {"template": 0, "full": 0, "delta": 0}
+        stored = 0
+        blobs = set()
+        with self._lock:
+            for path in self.root.glob("*.jsonl") if self.root.exists() else []:
+                stored += path.stat().st_size
+                for entry in self._entries(path.name[:-len(".jsonl")]):
+                    kinds[entry["kind"]] += 1
+                    if entry["kind"] == "full":
+                        blobs.add(entry["blob"])
+        for digest in blobs:
+            try:
+                stored += self.store._blob_path(digest).stat().st_size
+            except OSError:
+                pass
+        return {"versions": sum(kinds.values()), **kinds, "stored_bytes": stored}
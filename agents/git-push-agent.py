@@ -5,23 +5,41 @@ Automatically detects new agent files and pushes changes to GitHub
 """
 
 import os
+import sys
+import shlex
 import subprocess
 import time
 import threading
-from datetime import datetime
 from pathlib import Path
-import logging
+
+try:
+    import log_pipeline
+except ImportError:
+    # Run directly as `python agents/git-push-agent.py`
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    import log_pipeline
+import tracing
+from instrumentation import span
 
 class GitPushAgent:
     """Autonomous agent for Git operations when new agents are generated"""
     
-    def __init__(self):
+    def __init__(self, on_event=None):
         self.agents_folder = Path("agents")
         self.logs_folder = Path("logs")
         self.git_log_file = self.logs_folder / "git_push.log"
         self.known_files = set()
+        # Files claimed for a batch commit that the monitor has not seen on disk yet
+        self.claimed = set()
+        # Guards known_files and claimed: claims come from import workers, scans from the monitor
+        self.files_lock = threading.Lock()
+        # New agent files detected but not yet committed and pushed
+        self.pending = 0
         self.running = False
         self.monitor_thread = None
+        # Per-file processing and batch commits must not interleave git commands
+        self.git_lock = threading.Lock()
+        self.on_event = on_event
         
         # Ensure directories exist
         self.agents_folder.mkdir(exist_ok=True)
@@ -36,35 +54,28 @@ class GitPushAgent:
         self.log("INFO", "GitPushAgent initialized and ready")
     
     def setup_logging(self):
-        """Setup logging configuration"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - GitPushAgent - %(levelname)s - %(message)s'
-        )
-        self.logger = logging.getLogger('GitPushAgent')
+        """Attach to the shared queue pipeline (logs/git_push.log plus the configured sinks)"""
+        self.logger = log_pipeline.get_logger("git_push")
     
-    def log(self, level, message):
-        """Log message to both file and console"""
-        timestamp = datetime.now().isoformat()
-        log_entry = f"[{timestamp}] {level}: {message}"
-        
-        # Write to log file
+    def log(self, level, message, **fields):
+        """Enqueue a log record; structured fields (agent, git_op, duration, returncode) ride along"""
+        trace_id = tracing.current_trace_id()
+        if trace_id:
+            # Traces are keyed by the deploy that wrote the agent
+            fields.setdefault("deploy_id", trace_id)
+        self.logger.log(log_pipeline.level_number(level), message, extra=fields)
+    
+    def emit(self, event_type, **data):
+        """Publish a progress event to the host application, if one is listening"""
+        if self.on_event is None:
+            return
+        trace_id = tracing.current_trace_id()
+        if trace_id:
+            data.setdefault("deploy_id", trace_id)
         try:
-            with open(self.git_log_file, "a", encoding="utf-8") as f:
-                f.write(log_entry + "\n")
+            self.on_event(event_type, source="GitPushAgent", **data)
         except Exception as e:
-            print(f"Failed to write to log file: {e}")
-        
-        # Console output
-        print(f"🤖 GitPushAgent - {message}")
-        
-        # Standard logging
-        if level == "INFO":
-            self.logger.info(message)
-        elif level == "ERROR":
-            self.logger.error(message)
-        elif level == "SUCCESS":
-            self.logger.info(f"SUCCESS: {message}")
+            self.log("WARNING", f"Failed to publish GitPushAgent event: {e}")
     
     def scan_existing_files(self):
         """Scan existing agent files to establish baseline"""
@@ -91,11 +102,13 @@ class GitPushAgent:
                 if file_path.name != "__init__.py":
                     current_files.add(file_path.name)
             
-            # Find new files
-            new_files = list(current_files - self.known_files)
-            
-            # Update known files
-            self.known_files = current_files
+            with self.files_lock:
+                # Find new files
+                new_files = list(current_files - self.known_files - self.claimed)
+                
+                # Update known files; claims not on disk yet stay known until a scan sees them
+                self.claimed -= current_files
+                self.known_files = current_files | self.claimed
             
         except Exception as e:
             self.log("ERROR", f"Failed to detect new files: {e}")
@@ -104,6 +117,14 @@ class GitPushAgent:
     
     def run_git_command(self, command):
         """Execute Git command and return result"""
+        started = time.perf_counter()
+        # Stage histogram per git subcommand, e.g. git_push; also a span of the deploy's trace
+        with span(f"git_{command.split()[1]}"):
+            result = self._run_git_command(command)
+        result["duration"] = round(time.perf_counter() - started, 3)
+        return result
+    
+    def _run_git_command(self, command):
         try:
             result = subprocess.run(
                 command,
@@ -134,12 +155,20 @@ class GitPushAgent:
                 "returncode": -1
             }
     
-    def check_git_status(self):
-        """Check if there are changes to commit"""
-        result = self.run_git_command("git status --porcelain")
+    @staticmethod
+    def git_fields(git_op, result):
+        return {"git_op": git_op, "duration": result.get("duration"), "returncode": result["returncode"]}
+    
+    @staticmethod
+    def pathspec(paths):
+        return " -- " + " ".join(shlex.quote(str(path)) for path in paths) if paths else ""
+    
+    def check_git_status(self, paths=None):
+        """Check if there are changes to commit (only under paths, when given)"""
+        result = self.run_git_command("git status --porcelain" + self.pathspec(paths))
         
         if not result["success"]:
-            self.log("ERROR", f"Failed to check git status: {result['stderr']}")
+            self.log("ERROR", f"Failed to check git status: {result['stderr']}", **self.git_fields("status", result))
             return False
         
         # If output is empty, no changes to commit
@@ -151,29 +180,39 @@ class GitPushAgent:
         result = self.run_git_command("git add .")
         
         if result["success"]:
-            self.log("INFO", "Successfully staged all changes")
+            self.log("INFO", "Successfully staged all changes", **self.git_fields("add", result))
             return True
         else:
-            self.log("ERROR", f"Failed to stage changes: {result['stderr']}")
+            self.log("ERROR", f"Failed to stage changes: {result['stderr']}", **self.git_fields("add", result))
             return False
     
-    def git_commit(self, agent_name):
-        """Commit changes with agent-specific message"""
-        commit_message = f"Add agent: {agent_name}"
-        command = f'git commit -m "{commit_message}"'
+    def git_add_paths(self, paths):
+        """Stage only the given files"""
+        result = self.run_git_command("git add" + self.pathspec(paths))
+        
+        if result["success"]:
+            self.log("INFO", f"Successfully staged {len(paths)} files", **self.git_fields("add", result))
+            return True
+        self.log("ERROR", f"Failed to stage changes: {result['stderr']}", **self.git_fields("add", result))
+        return False
+    
+    def git_commit(self, agent_name, commit_message=None, paths=None):
+        """Commit changes with agent-specific message; with paths, only those files are committed"""
+        commit_message = commit_message or f"Add agent: {agent_name}"
+        command = f"git commit -m {shlex.quote(commit_message)}" + self.pathspec(paths)
         
         result = self.run_git_command(command)
         
         if result["success"]:
-            self.log("SUCCESS", f"Successfully committed: {commit_message}")
+            self.log("SUCCESS", f"Successfully committed: {commit_message}", agent=agent_name, **self.git_fields("commit", result))
             return True
         else:
             # Check if it's a "nothing to commit" scenario
             if "nothing to commit" in result["stdout"].lower():
-                self.log("INFO", "No changes to commit")
+                self.log("INFO", "No changes to commit", agent=agent_name, **self.git_fields("commit", result))
                 return True
             else:
-                self.log("ERROR", f"Failed to commit: {result['stderr']}")
+                self.log("ERROR", f"Failed to commit: {result['stderr']}", agent=agent_name, **self.git_fields("commit", result))
                 return False
     
     def git_push(self):
@@ -181,23 +220,57 @@ class GitPushAgent:
         result = self.run_git_command("git push origin main")
         
         if result["success"]:
-            self.log("SUCCESS", "Successfully pushed to GitHub")
+            self.log("SUCCESS", "Successfully pushed to GitHub", **self.git_fields("push", result))
             return True
         else:
             # Try pushing to master branch as fallback
             master_result = self.run_git_command("git push origin master")
             if master_result["success"]:
-                self.log("SUCCESS", "Successfully pushed to GitHub (master branch)")
+                self.log("SUCCESS", "Successfully pushed to GitHub (master branch)", **self.git_fields("push", master_result))
                 return True
             else:
-                self.log("ERROR", f"Failed to push to GitHub: {result['stderr']}")
+                self.log("ERROR", f"Failed to push to GitHub: {result['stderr']}", **self.git_fields("push", result))
                 return False
     
     def process_new_agent(self, agent_filename):
-        """Process a newly detected agent file"""
+        """Process a newly detected agent file, continuing the trace of the deploy that wrote it"""
+        with tracing.resume(tracing.adopt(agent_filename), "git_push_agent", agent_file=agent_filename), self.git_lock:
+            self._process_new_agent(agent_filename)
+    
+    def claim(self, filenames):
+        """Take files out of per-file processing, e.g. before they are written for a batch commit"""
+        with self.files_lock:
+            self.claimed.update(filenames)
+            self.known_files.update(filenames)
+    
+    def commit_batch(self, filenames, commit_message):
+        """Commit and push several agent files as one commit"""
+        with self.git_lock:
+            self.log("INFO", f"Processing batch of {len(filenames)} agent files: {commit_message}")
+            self.emit("detected", agent_files=filenames, agent=commit_message)
+            # Only the batch's own files: logs, data or unrelated edits stay out of the commit
+            paths = [self.agents_folder / name for name in filenames]
+            if not self.check_git_status(paths):
+                self.log("INFO", "No Git changes detected for batch")
+                return False
+            if not self.git_add_paths(paths):
+                return False
+            if not self.git_commit(commit_message, commit_message, paths):
+                self.emit("commit_failed", agent_files=filenames, agent=commit_message)
+                return False
+            self.emit("committed", agent_files=filenames, agent=commit_message)
+            if self.git_push():
+                self.log("SUCCESS", f"🚀 Batch '{commit_message}' successfully pushed to GitHub!")
+                self.emit("pushed", agent_files=filenames, agent=commit_message)
+                return True
+            self.emit("push_failed", agent_files=filenames, agent=commit_message)
+            return False
+    
+    def _process_new_agent(self, agent_filename):
         agent_name = agent_filename.replace(".py", "").replace("-", " ").title()
         
         self.log("INFO", f"Processing new agent: {agent_name}")
+        self.emit("detected", agent_file=agent_filename, agent=agent_name)
         
         # Check if there are actually changes to commit
         if not self.check_git_status():
@@ -210,14 +283,16 @@ class GitPushAgent:
         
         # Commit changes
         if not self.git_commit(agent_name):
+            self.emit("commit_failed", agent_file=agent_filename, agent=agent_name)
             return
+        self.emit("committed", agent_file=agent_filename, agent=agent_name)
         
         # Push to GitHub
         if self.git_push():
-            self.log("SUCCESS", f"🚀 Agent '{agent_name}' successfully pushed to GitHub!")
-            print(f"\n✅ SUCCESS: Agent '{agent_name}' is now live on GitHub!")
+            self.log("SUCCESS", f"🚀 Agent '{agent_name}' successfully pushed to GitHub!", agent=agent_name)
+            self.emit("pushed", agent_file=agent_filename, agent=agent_name)
         else:
-            print(f"\n❌ ERROR: Failed to push agent '{agent_name}' to GitHub")
+            self.emit("push_failed", agent_file=agent_filename, agent=agent_name)
     
     def monitor_loop(self):
         """Main monitoring loop"""
@@ -227,10 +302,12 @@ class GitPushAgent:
             try:
                 # Check for new files
                 new_files = self.detect_new_files()
+                self.pending = len(new_files)
                 
                 # Process each new file
                 for new_file in new_files:
                     self.process_new_agent(new_file)
+                    self.pending -= 1
                 
                 # Wait before next check
                 time.sleep(2)  # Check every 2 seconds
@@ -252,7 +329,6 @@ class GitPushAgent:
         self.monitor_thread.start()
         
         self.log("INFO", "GitPushAgent started successfully")
-        print("🤖 GitPushAgent is now monitoring for new agents...")
     
     def stop(self):
         """Stop the GitPushAgent"""
@@ -266,7 +342,6 @@ class GitPushAgent:
             self.monitor_thread.join(timeout=5)
         
         self.log("INFO", "GitPushAgent stopped")
-        print("🤖 GitPushAgent has been stopped")
     
     def status(self):
         """Get current status"""
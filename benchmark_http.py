@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+End-to-end HTTP benchmark for main.app
+Drives the public endpoints in-process (ASGI transport) and/or against a real uvicorn,
+reporting throughput, p50/p95/p99 latency and event-loop lag per endpoint as JSON
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+REPO = Path(__file__).resolve().parent
+
+# name -> (method, path, json body factory or None)
+ENDPOINTS = {
+    "index": ("GET", "/", None),
+    "stats": ("GET", "/api/stats", None),
+    "agents": ("GET", "/api/agents", None),
+    "agent": ("GET", "/api/agents/1", None),
+    "deploy": ("POST", "/api/deploy", lambda i: {"prompt": f"Create a benchmark agent number {i}"}),
+    "deployments": ("POST", "/api/deployments", lambda i: {"prompt": f"Create a deployments benchmark agent {i}"}),
+}
+# Deploys write agent files and call the model, so they get fewer requests by default
+HEAVY = {"deploy", "deployments"}
+
+LAG_INTERVAL = 0.01
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port} after {timeout:.0f}s")
+
+
+class LagMonitor:
+    """Measures how late a periodic sleep wakes up on the current event loop"""
+
+    def __init__(self, interval: float = LAG_INTERVAL):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def start(self):
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+async def bench_endpoint(client: httpx.AsyncClient, name: str, requests: int, concurrency: int) -> dict:
+    method, path, body = ENDPOINTS[name]
+    latencies = []
+    statuses = {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body(i) if body else None)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    lag = LagMonitor()
+    lag.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    elapsed = time.perf_counter() - started
+    await lag.stop()
+
+    def ms(value):
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "max_ms": ms(max(latencies, default=None)),
+        "statuses": statuses,
+        "loop_lag_p50_ms": ms(percentile(lag.samples, 0.50)),
+        "loop_lag_p99_ms": ms(percentile(lag.samples, 0.99)),
+        "loop_lag_max_ms": ms(max(lag.samples, default=None)),
+    }
+
+
+async def run_suite(client: httpx.AsyncClient, args) -> dict:
+    results = {}
+    for name in args.endpoints:
+        count = args.deploy_requests if name in HEAVY else args.requests
+        # Warm caches, templates and connection pools before measuring
+        await bench_endpoint(client, name, min(count, args.warmup), args.concurrency)
+        results[name] = await bench_endpoint(client, name, count, args.concurrency)
+        print(format_row(name, results[name]))
+    return results
+
+
+def format_row(name: str, stats: dict) -> str:
+    return (f"  {name:<12} {stats['throughput_rps'] or 0:9.1f} req/s   p50 {stats['p50_ms']:8.2f}   "
+            f"p95 {stats['p95_ms']:8.2f}   p99 {stats['p99_ms']:8.2f} ms   "
+            f"lag p99 {stats['loop_lag_p99_ms'] or 0:6.2f} ms   {stats['statuses']}")
+
+
+async def bench_asgi(args) -> dict:
+    """In-process: the app and the load generator share one event loop, so lag is the app's"""
+    sys.path.insert(0, str(REPO))
+    import main
+    app = main.app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            return await run_suite(client, args)
+
+
+async def bench_uvicorn(args, env: dict) -> dict:
+    """Real server in a child process; lag here is the load generator's own loop"""
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--app-dir", str(REPO)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120) as client:
+            return await run_suite(client, args)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def prepare_workdir(path: Path):
+    """Scratch copy of what the app reads from its working directory
+
+    Deploys write agents/ and GitPushAgent commits what it finds, so never run in the repo itself.
+    """
+    for name in ("agents", "templates", "static"):
+        source = REPO / name
+        if source.exists():
+            shutil.copytree(source, path / name, dirs_exist_ok=True)
+    (path / "logs").mkdir(exist_ok=True)
+
+
+def start_stub(args) -> tuple:
+    port = free_port()
+    stub = subprocess.Popen(
+        [sys.executable, str(REPO / "openai_stub.py"), "--port", str(port), "--latency", args.stub_latency,
+         "--tokens-per-second", str(args.stub_tokens_per_second)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    wait_for_port(port)
+    return stub, f"http://127.0.0.1:{port}/v1"
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(previous_file: str, current: dict):
+    with open(previous_file, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+    print(f"Compared with {previous['meta'].get('commit')} ({previous_file}):")
+    for mode, endpoints in current["results"].items():
+        for name, stats in endpoints.items():
+            before = previous.get("results", {}).get(mode, {}).get(name)
+            if not before or not before.get("p95_ms") or not before.get("throughput_rps"):
+                continue
+            print(f"  {mode:<8} {name:<12} throughput {stats['throughput_rps'] / before['throughput_rps'] - 1:+7.1%}   "
+                  f"p95 {stats['p95_ms'] / before['p95_ms'] - 1:+7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark main.app end to end")
+    parser.add_argument("--mode", choices=("asgi", "uvicorn", "both"), default="both")
+    parser.add_argument("--endpoints", nargs="+", choices=sorted(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=500, help="Requests per read endpoint")
+    parser.add_argument("--deploy-requests", type=int, default=20, help="Requests per deploy endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--openai-base-url", help="Model endpoint (defaults to a local openai_stub.py)")
+    parser.add_argument("--stub-latency", default="lognormal:300:0.3")
+    parser.add_argument("--stub-tokens-per-second", type=float, default=0)
+    parser.add_argument("--output", help="Results file (defaults to data/benchmarks/http-<commit>-<time>.json)")
+    parser.add_argument("--compare", help="Earlier results file to diff against")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    output = Path(args.output) if args.output else \
+        REPO / "data" / "benchmarks" / f"http-{commit}-{datetime.now():%Y%m%dT%H%M%S}.json"
+    output = output.resolve()
+
+    stub = None
+    base_url = args.openai_base_url
+    if base_url is None:
+        stub, base_url = start_stub(args)
+    os.environ.update(OPENAI_BASE_URL=base_url, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY") or "benchmark",
+                      LOG_SINKS="file")
+
+    print("🚀 HTTP benchmark")
+    print("=" * 50)
+    print(f"Commit: {commit}   concurrency: {args.concurrency}   model endpoint: {base_url}")
+
+    workdir = Path(tempfile.mkdtemp(prefix="operator-bench-"))
+    original_cwd = os.getcwd()
+    results = {}
+    try:
+        prepare_workdir(workdir)
+        os.chdir(workdir)
+        if args.mode in ("uvicorn", "both"):
+            print("uvicorn:")
+            results["uvicorn"] = asyncio.run(bench_uvicorn(args, dict(os.environ)))
+        if args.mode in ("asgi", "both"):
+            print("asgi:")
+            results["asgi"] = asyncio.run(bench_asgi(args))
+    finally:
+        os.chdir(original_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+        if stub is not None:
+            stub.terminate()
+
+    report = {
+        "meta": {"commit": commit, "timestamp": datetime.now().isoformat(), "python": sys.version.split()[0],
+                 "concurrency": args.concurrency, "requests": args.requests,
+                 "deploy_requests": args.deploy_requests, "model_endpoint": base_url,
+                 "stub_latency": args.stub_latency if stub is not None else None},
+        "results": results,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print("-" * 50)
+    print(f"Results saved to {output}")
+    if args.compare:
+        compare(args.compare, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for agent runs
+Compares plain subprocess launches with the fork-server warm pool
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from forkserver import ForkServer, preload_modules_from_env
+
+BENCH_AGENT = '''
+import json
+import requests
+import bs4
+import openai
+
+def main():
+    print("ready")
+
+if __name__ == "__main__":
+    main()
+'''
+
+
+def summarize(samples):
+    """Return mean/p50/p95 in milliseconds"""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {
+        "mean_ms": statistics.mean(ordered) * 1000,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": p95 * 1000,
+    }
+
+
+def bench_subprocess(script, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script], capture_output=True, check=True)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_forkserver(server, script, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = server.launch(script)
+        proc.stdout.read()
+        proc.stderr.read()
+        if proc.wait() != 0:
+            raise RuntimeError("forked benchmark agent failed")
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare agent cold-start latency")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--script", help="Agent file to launch (defaults to a synthetic agent)")
+    args = parser.parse_args()
+
+    script = args.script
+    if script is None:
+        handle = tempfile.NamedTemporaryFile("w", suffix=".py", delete=False)
+        handle.write(BENCH_AGENT)
+        handle.close()
+        script = handle.name
+
+    print("🚀 Agent startup benchmark")
+    print("=" * 50)
+    print(f"Script: {script}")
+    print(f"Runs: {args.runs}")
+
+    server = ForkServer(preload_modules_from_env())
+    warm_start = time.perf_counter()
+    server.start()
+    print(f"Fork server ready in {(time.perf_counter() - warm_start) * 1000:.1f} ms "
+          f"(preloaded: {', '.join(server.loaded) or 'nothing'})")
+
+    try:
+        results = {
+            "subprocess": summarize(bench_subprocess(script, args.runs)),
+            "forkserver": summarize(bench_forkserver(server, script, args.runs)),
+        }
+    finally:
+        server.stop()
+        if args.script is None:
+            os.unlink(script)
+
+    print("-" * 50)
+    for name, stats in results.items():
+        print(f"{name:<12} mean {stats['mean_ms']:8.1f} ms   p50 {stats['p50_ms']:8.1f} ms   p95 {stats['p95_ms']:8.1f} ms")
+    speedup = results["subprocess"]["mean_ms"] / max(results["forkserver"]["mean_ms"], 1e-9)
+    print(f"⚡ Fork server speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
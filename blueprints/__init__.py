@@ -1,2 +1,14 @@
 # Blueprints module for OperatorGPT
-# This directory contains agent blueprints and specifications
\ No newline at end of file
+# This directory contains agent blueprints and specifications
+from typing import Dict, Optional
+
+from blueprints import emailer, log_analyzer, monitor, scheduler, scraper
+from blueprints.engine import Blueprint, PromptMatch, match_prompt as _match_prompt
+
+BLUEPRINTS = [scraper.BLUEPRINT, scheduler.BLUEPRINT, monitor.BLUEPRINT, log_analyzer.BLUEPRINT, emailer.BLUEPRINT]
+BY_ID: Dict[str, Blueprint] = {blueprint.id: blueprint for blueprint in BLUEPRINTS}
+
+
+def match_prompt(prompt: str) -> Optional[PromptMatch]:
+    """Blueprint and parameters for a prompt, or None when it should go to the model"""
+    return _match_prompt(prompt, BLUEPRINTS)
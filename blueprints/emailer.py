@@ -0,0 +1,114 @@
+"""
+Email blueprint
+Sends a templated message over SMTP once or on an interval; SMTP settings come from the environment
+"""
+from blueprints.engine import Blueprint, Param, find_emails, find_interval, find_quoted
+
+TEMPLATE = '''#!/usr/bin/env python3
+"""
+Email agent (blueprint email-v1)
+Sends a message over SMTP once or on an interval; prints it instead when SMTP_HOST is unset
+"""
+import os
+import smtplib
+import socket
+import time
+from datetime import datetime
+from email.message import EmailMessage
+
+PROMPT = $prompt
+RECIPIENTS = $recipients
+SUBJECT = $subject
+BODY = $body
+INTERVAL_SECONDS = $interval
+
+SMTP_HOST = os.getenv("SMTP_HOST", "")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER = os.getenv("SMTP_USER", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+SMTP_FROM = os.getenv("SMTP_FROM", SMTP_USER or f"operator@{socket.gethostname()}")
+
+
+class EmailAgent:
+    """Sends SUBJECT/BODY to RECIPIENTS; {date} and {time} in either are filled in at send time"""
+
+    def __init__(self, recipients=RECIPIENTS, subject=SUBJECT, body=BODY, interval=INTERVAL_SECONDS):
+        self.recipients = recipients
+        self.subject = subject
+        self.body = body
+        self.interval = interval
+        self.sent = 0
+        self.running = False
+
+    def build(self):
+        now = datetime.now()
+        fields = {"date": now.strftime("%Y-%m-%d"), "time": now.strftime("%H:%M")}
+        message = EmailMessage()
+        message["From"] = SMTP_FROM
+        message["To"] = ", ".join(self.recipients)
+        message["Subject"] = self.subject.format(**fields)
+        message.set_content(self.body.format(**fields))
+        return message
+
+    def send(self):
+        message = self.build()
+        if not self.recipients:
+            print("No recipients configured")
+            return False
+        if not SMTP_HOST:
+            print(f"SMTP_HOST not set; would send:\\n{message}")
+            return False
+        try:
+            with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30) as smtp:
+                smtp.starttls()
+                if SMTP_USER:
+                    smtp.login(SMTP_USER, SMTP_PASSWORD)
+                smtp.send_message(message)
+        except (smtplib.SMTPException, OSError) as e:
+            print(f"Failed to send email: {e}")
+            return False
+        self.sent += 1
+        print(f"Sent '{message['Subject']}' to {message['To']}")
+        return True
+
+    def run(self):
+        self.running = True
+        while self.running:
+            self.send()
+            if not self.interval:
+                break
+            time.sleep(self.interval)
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+
+def main():
+    agent = EmailAgent()
+    try:
+        agent.run()
+    except KeyboardInterrupt:
+        agent.stop()
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+BLUEPRINT = Blueprint(
+    blueprint_id="email-v1",
+    name="Email sender",
+    description="Sends a templated email over SMTP once or on an interval",
+    keywords={"email": 3, "e-mail": 3, "mail": 2, "smtp": 3, "newsletter": 2, "send": 0.5,
+              "notify": 0.5, "recipient": 1},
+    params=[
+        Param("recipients", list, [], "Addresses to send to", find_emails),
+        Param("subject", str, "Report for {date}", "Subject line; {date} and {time} are filled in",
+              find_quoted("subject", "titled", "called")),
+        Param("body", str, "Automated message sent at {time} on {date}.", "Message text",
+              find_quoted("body", "saying", "message", "text")),
+        Param("interval", int, 0, "Seconds between sends, 0 to send once", find_interval),
+    ],
+    template=TEMPLATE,
+)
@@ -0,0 +1,227 @@
+"""
+Blueprint engine
+Parameterized agent templates compiled once; parameters are typed, extracted from the prompt
+and rendered as Python literals, so a matching prompt becomes an agent without an API call
+"""
+import ast
+import os
+import re
+import string
+from typing import Any, Callable, Dict, List, Optional
+
+MIN_SCORE = float(os.getenv("BLUEPRINT_MIN_SCORE", 2.0))
+# The best blueprint must beat the runner-up by this much, otherwise the prompt is ambiguous
+MIN_MARGIN = float(os.getenv("BLUEPRINT_MIN_MARGIN", 1.0))
+# Longer prompts carry requirements a template would silently drop; leave them to the model
+MAX_WORDS = int(os.getenv("BLUEPRINT_MAX_WORDS", 30))
+
+WORD = re.compile(r"[a-z0-9]+")
+URL = re.compile(r"\bhttps?://[^\s,'\"<>()]+|\b(?:[a-z0-9-]+\.)+(?:com|org|net|io|dev|ai|co|gov|edu)\b(?:/[^\s,'\"<>()]*)?",
+                 re.IGNORECASE)
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+LOG_PATH = re.compile(r"(?:[\w.~-]*/)*[\w-]+\.(?:log|txt|jsonl|json)\b")
+DURATION = re.compile(r"\bevery\s+(\d+(?:\.\d+)?\s*)?(second|sec|minute|min|hour|hr|day|week)s?\b", re.IGNORECASE)
+PERIODS = {"second": 1, "sec": 1, "minute": 60, "min": 60, "hour": 3600, "hr": 3600, "day": 86400, "week": 604800}
+ADVERBS = {"hourly": 3600, "daily": 86400, "nightly": 86400, "weekly": 604800}
+CLOCK = re.compile(r"\bat\s+(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\b", re.IGNORECASE)
+
+TYPES = (str, int, float, bool, list)
+
+
+def words(text: str) -> set:
+    """Lowercase word set with plurals folded (alerts -> alert)"""
+    return {w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+            for w in WORD.findall(text.lower())}
+
+
+def find_urls(prompt: str) -> Optional[list]:
+    # Email domains are not sites to fetch
+    urls = [found.rstrip(".;:!?") for found in URL.findall(EMAIL.sub(" ", prompt))]
+    return [url if "://" in url else f"https://{url}" for url in urls] or None
+
+
+def find_emails(prompt: str) -> Optional[list]:
+    return EMAIL.findall(prompt) or None
+
+
+def find_log_path(prompt: str) -> Optional[str]:
+    found = LOG_PATH.search(URL.sub(" ", prompt))
+    return found.group(0) if found else None
+
+
+def find_interval(prompt: str) -> Optional[int]:
+    """Seconds between runs from "every 5 minutes", "every hour", "hourly", ..."""
+    found = DURATION.search(prompt)
+    if found:
+        amount = float(found.group(1)) if found.group(1) else 1.0
+        return max(1, int(amount * PERIODS[found.group(2).lower()]))
+    for adverb, seconds in ADVERBS.items():
+        if re.search(rf"\b{adverb}\b", prompt, re.IGNORECASE):
+            return seconds
+    return None
+
+
+def find_clock(prompt: str) -> Optional[str]:
+    """"at 2:30 pm" -> "14:30" """
+    found = CLOCK.search(prompt)
+    if not found:
+        return None
+    hour, minute = int(found.group(1)), int(found.group(2) or 0)
+    suffix = (found.group(3) or "").lower()
+    if suffix == "pm" and hour < 12:
+        hour += 12
+    elif suffix == "am" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return f"{hour:02d}:{minute:02d}"
+
+
+def find_quoted(*lead_words: str) -> Callable[[str], Optional[str]]:
+    """Quoted text following one of `lead_words`, e.g. subject "Nightly report" """
+    pattern = re.compile(rf"\b(?:{'|'.join(lead_words)})\b\s*[:=]?\s*['\"]([^'\"]+)['\"]", re.IGNORECASE)
+
+    def extract(prompt: str) -> Optional[str]:
+        found = pattern.search(prompt)
+        return found.group(1) if found else None
+    return extract
+
+
+def find_keyword(mapping: Dict[str, Any]) -> Callable[[str], Any]:
+    """Value of the first mapping key present in the prompt's words"""
+    def extract(prompt: str):
+        present = words(prompt)
+        for keyword, value in mapping.items():
+            if keyword in present:
+                return value
+        return None
+    return extract
+
+
+class Param:
+    """A typed template parameter with an optional extractor run against the prompt"""
+
+    def __init__(self, name: str, type: type, default: Any, description: str = "",
+                 extract: Optional[Callable[[str], Any]] = None):
+        if type not in TYPES:
+            raise ValueError(f"Unsupported parameter type {type.__name__} for {name}")
+        self.name = name
+        self.type = type
+        self.default = default
+        self.description = description
+        self.extract = extract
+
+    def check(self, value: Any) -> Any:
+        # bool is an int subclass; keep the two apart
+        if type(value) is not self.type and not (self.type is float and type(value) is int):
+            raise TypeError(f"Blueprint parameter {self.name} must be {self.type.__name__}, "
+                            f"got {type(value).__name__}")
+        if self.type is list and not all(isinstance(item, str) for item in value):
+            raise TypeError(f"Blueprint parameter {self.name} must be a list of strings")
+        return value
+
+    def value_from(self, prompt: str) -> Any:
+        value = self.extract(prompt) if self.extract else None
+        return self.check(value if value is not None else self.default)
+
+    def describe(self) -> dict:
+        return {"name": self.name, "type": self.type.__name__, "default": self.default,
+                "description": self.description}
+
+
+class Blueprint:
+    """A compiled agent template
+
+    The template is string.Template source where every $placeholder is a parameter rendered
+    as a Python literal. It offers the same render/match pair as the fallback template, so
+    the agent store keeps blueprint agents as parameters instead of blobs.
+    """
+
+    def __init__(self, blueprint_id: str, name: str, description: str, keywords: Dict[str, float],
+                 params: List[Param], template: str):
+        self.id = blueprint_id
+        self.name = name
+        self.description = description
+        self.keywords = keywords
+        self.params = [Param("prompt", str, "", "Prompt the agent was generated from")] + params
+        self.template = string.Template(template)
+        names = {p.name for p in self.params}
+        used = set()
+        pattern = []
+        position = 0
+        for found in self.template.pattern.finditer(template):
+            pattern.append(re.escape(template[position:found.start()]))
+            position = found.end()
+            if found.group("escaped") is not None:
+                pattern.append(re.escape("$"))
+                continue
+            placeholder = found.group("named") or found.group("braced")
+            if placeholder not in names:
+                raise ValueError(f"Blueprint {blueprint_id} uses unknown parameter ${placeholder}")
+            # Literals are single-line reprs; repeats must render identically
+            pattern.append(f"(?P={placeholder})" if placeholder in used else f"(?P<{placeholder}>[^\\n]*?)")
+            used.add(placeholder)
+        pattern.append(re.escape(template[position:]))
+        self.inverse = re.compile("".join(pattern))
+
+    def extract(self, prompt: str) -> dict:
+        params = {p.name: p.value_from(prompt) for p in self.params}
+        params["prompt"] = prompt
+        return params
+
+    def render(self, **params) -> str:
+        values = {}
+        for param in self.params:
+            values[param.name] = repr(param.check(params.get(param.name, param.default)))
+        return self.template.substitute(values)
+
+    def match(self, source: str) -> Optional[dict]:
+        """Return the parameters if source is exactly this blueprint's output, else None"""
+        found = self.inverse.fullmatch(source)
+        if not found:
+            return None
+        try:
+            params = {name: ast.literal_eval(literal) for name, literal in found.groupdict().items()}
+            if self.render(**params) != source:
+                return None
+        except (ValueError, SyntaxError, TypeError):
+            return None
+        return params
+
+    def score(self, prompt: str) -> float:
+        present = words(prompt)
+        text = prompt.lower()
+        return sum(weight for keyword, weight in self.keywords.items()
+                   if (keyword in text if " " in keyword else keyword in present))
+
+    def describe(self) -> dict:
+        return {"id": self.id, "name": self.name, "description": self.description,
+                "params": [p.describe() for p in self.params[1:]]}
+
+
+class PromptMatch:
+    def __init__(self, blueprint: Blueprint, params: dict, score: float):
+        self.blueprint = blueprint
+        self.params = params
+        self.score = score
+
+    def render(self) -> str:
+        return self.blueprint.render(**self.params)
+
+    def describe(self) -> dict:
+        params = {k: v for k, v in self.params.items() if k != "prompt"}
+        return {"blueprint": self.blueprint.id, "score": round(self.score, 2), "params": params}
+
+
+def match_prompt(prompt: str, blueprints: List[Blueprint], min_score: float = MIN_SCORE,
+                 min_margin: float = MIN_MARGIN, max_words: int = MAX_WORDS) -> Optional[PromptMatch]:
+    """Best blueprint for a prompt with its extracted parameters, or None to use the model"""
+    if len(WORD.findall(prompt)) > max_words:
+        return None
+    scored = sorted(((bp.score(prompt), bp) for bp in blueprints), key=lambda item: item[0], reverse=True)
+    if not scored or scored[0][0] < min_score:
+        return None
+    if len(scored) > 1 and scored[0][0] - scored[1][0] < min_margin:
+        return None
+    score, blueprint = scored[0]
+    return PromptMatch(blueprint, blueprint.extract(prompt), score)
@@ -0,0 +1,74 @@
+"""
+Fallback agent template
+Used when OpenAI is unavailable or generated code fails validation
+"""
+import re
+from typing import Optional
+
+TEMPLATE_ID = "fallback-v1"
+
+PROMPT_PATTERN = re.compile(r'^"""\nAgent: (.*)\nGenerated as fallback template', re.MULTILINE)
+
+
+def render(prompt: str) -> str:
+    """Render the basic template agent for a prompt"""
+    return f'''#!/usr/bin/env python3
+"""
+Agent: {prompt}
+Generated as fallback template when OpenAI API unavailable
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+class Agent:
+    """Autonomous agent for: {prompt}"""
+    
+    def __init__(self):
+        self.name = "{prompt}"
+        self.status = "initialized"
+        self.created_at = datetime.now()
+    
+    def run(self):
+        """Main agent execution loop"""
+        print(f"Agent {{self.name}} starting...")
+        self.status = "running"
+        
+        # TODO: Implement agent logic here
+        print(f"Executing: {{self.name}}")
+        
+        self.status = "completed"
+        print(f"Agent {{self.name}} completed successfully")
+    
+    def stop(self):
+        """Stop agent execution"""
+        self.status = "stopped"
+        print(f"Agent {{self.name}} stopped")
+
+def main():
+    """Entry point for agent execution"""
+    agent = Agent()
+    try:
+        agent.run()
+    except KeyboardInterrupt:
+        agent.stop()
+    except Exception as e:
+        print(f"Agent error: {{e}}")
+        agent.status = "error"
+
+if __name__ == "__main__":
+    main()
+'''
+
+
+def match(source: str) -> Optional[dict]:
+    """Return the template parameters if source is exactly this template, else None"""
+    found = PROMPT_PATTERN.search(source)
+    if not found:
+        return None
+    params = {"prompt": found.group(1)}
+    if render(**params) != source:
+        return None
+    return params
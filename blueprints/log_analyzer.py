@@ -0,0 +1,116 @@
+"""
+Log analyzer blueprint
+Counts levels and groups recurring messages of a log file, optionally following it
+"""
+from blueprints.engine import Blueprint, Param, find_interval, find_keyword, find_log_path
+
+TEMPLATE = '''#!/usr/bin/env python3
+"""
+Log analyzer agent (blueprint log-analyzer-v1)
+Counts log levels and groups recurring messages by shape (numbers and ids masked)
+"""
+import re
+import time
+from collections import Counter
+from datetime import datetime
+
+PROMPT = $prompt
+LOG_FILE = $path
+LEVELS = $levels
+TOP_MESSAGES = $top
+FOLLOW_SECONDS = $follow
+
+LEVEL_PATTERN = re.compile(r"\\b(" + "|".join(LEVELS) + r")\\b")
+VARIABLE_PARTS = re.compile(r"0x[0-9a-f]+|[0-9a-f]{8,}|\\d+", re.I)
+
+
+class LogAnalyzerAgent:
+    """Reports level counts and the most frequent message shapes of LOG_FILE"""
+
+    def __init__(self, path=LOG_FILE, follow=FOLLOW_SECONDS):
+        self.path = path
+        self.follow = follow
+        self.offset = 0
+        self.levels = Counter()
+        self.messages = Counter()
+        self.running = False
+
+    def read_new_lines(self):
+        try:
+            with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+                f.seek(0, 2)
+                if f.tell() < self.offset:
+                    # Rotated or truncated: start over
+                    self.offset = 0
+                f.seek(self.offset)
+                lines = f.readlines()
+                self.offset = f.tell()
+        except FileNotFoundError:
+            print(f"{self.path} does not exist yet")
+            return []
+        return lines
+
+    def analyze(self, lines):
+        for line in lines:
+            found = LEVEL_PATTERN.search(line)
+            if not found:
+                continue
+            level = found.group(1)
+            self.levels[level] += 1
+            message = line[found.end():].strip(" :-]\\n")
+            self.messages[(level, VARIABLE_PARTS.sub("#", message)[:200])] += 1
+
+    def report(self):
+        print(f"[{datetime.now().isoformat()}] {self.path}: " +
+              (", ".join(f"{level} {self.levels[level]}" for level in LEVELS) or "no entries"))
+        for (level, message), count in self.messages.most_common(TOP_MESSAGES):
+            print(f"  {count:6d}  {level:<8} {message}")
+
+    def run(self):
+        self.running = True
+        while self.running:
+            self.analyze(self.read_new_lines())
+            self.report()
+            if not self.follow:
+                break
+            time.sleep(self.follow)
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+
+def main():
+    agent = LogAnalyzerAgent()
+    try:
+        agent.run()
+    except KeyboardInterrupt:
+        agent.stop()
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+LEVEL_SETS = {
+    "critical": ["CRITICAL", "ERROR"],
+    "error": ["ERROR", "CRITICAL"],
+    "warning": ["WARNING", "ERROR", "CRITICAL"],
+}
+
+BLUEPRINT = Blueprint(
+    blueprint_id="log-analyzer-v1",
+    name="Log analyzer",
+    description="Counts log levels and groups recurring messages, once or following the file",
+    keywords={"log": 2, "analyzer": 1.5, "analyze": 1.5, "analyse": 1.5, "parse": 1,
+              "error": 0.5, "pattern": 0.5, "tail": 1},
+    params=[
+        Param("path", str, "logs/deployments.log", "Log file to analyze", find_log_path),
+        Param("levels", list, ["ERROR", "WARNING", "INFO"], "Levels to count, most important first",
+              find_keyword(LEVEL_SETS)),
+        Param("top", int, 10, "Recurring messages to list"),
+        Param("follow", int, 0, "Seconds between re-reads when following the file, 0 to analyze once",
+              find_interval),
+    ],
+    template=TEMPLATE,
+)
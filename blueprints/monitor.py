@@ -0,0 +1,146 @@
+"""
+Monitor blueprint
+Checks HTTP endpoints plus local disk and load, alerting on failures and recoveries
+"""
+import re
+
+from blueprints.engine import Blueprint, Param, find_interval, find_urls
+
+TEMPLATE = '''#!/usr/bin/env python3
+"""
+Monitoring agent (blueprint monitor-v1)
+Checks HTTP endpoints, disk usage and load average; alerts on state changes
+"""
+import json
+import os
+import shutil
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+PROMPT = $prompt
+URLS = $urls
+INTERVAL_SECONDS = $interval
+TIMEOUT_SECONDS = $timeout
+DISK_THRESHOLD_PERCENT = $disk_threshold
+# Optional: POST alerts as JSON to this URL (e.g. a Slack or Discord webhook)
+ALERT_WEBHOOK_URL = os.getenv("ALERT_WEBHOOK_URL", "")
+
+
+class MonitorAgent:
+    """Runs every check each INTERVAL_SECONDS and reports only transitions"""
+
+    def __init__(self, urls=URLS, interval=INTERVAL_SECONDS, timeout=TIMEOUT_SECONDS,
+                 disk_threshold=DISK_THRESHOLD_PERCENT):
+        self.urls = urls
+        self.interval = interval
+        self.timeout = timeout
+        self.disk_threshold = disk_threshold
+        self.state = {}
+        self.running = False
+
+    def check_url(self, url):
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except (urllib.error.URLError, OSError) as e:
+            return False, f"unreachable ({e})"
+        elapsed = (time.perf_counter() - started) * 1000
+        return status < 400, f"HTTP {status} in {elapsed:.0f} ms"
+
+    def check_disk(self):
+        usage = shutil.disk_usage("/")
+        percent = usage.used / usage.total * 100
+        return percent < self.disk_threshold, f"disk {percent:.1f}% used"
+
+    def check_load(self):
+        if not hasattr(os, "getloadavg"):
+            return True, "load average unavailable"
+        load = os.getloadavg()[0]
+        cpus = os.cpu_count() or 1
+        return load < cpus * 2, f"load {load:.2f} on {cpus} CPUs"
+
+    def alert(self, name, healthy, detail):
+        message = f"{'RECOVERED' if healthy else 'ALERT'}: {name} - {detail}"
+        print(f"[{datetime.now().isoformat()}] {message}")
+        if ALERT_WEBHOOK_URL:
+            body = json.dumps({"text": message}).encode("utf-8")
+            request = urllib.request.Request(ALERT_WEBHOOK_URL, data=body,
+                                             headers={"Content-Type": "application/json"})
+            try:
+                urllib.request.urlopen(request, timeout=10).close()
+            except (urllib.error.URLError, OSError) as e:
+                print(f"Failed to deliver alert: {e}")
+
+    def check_all(self):
+        checks = {url: (lambda url=url: self.check_url(url)) for url in self.urls}
+        checks["disk"] = self.check_disk
+        checks["load"] = self.check_load
+        results = {}
+        for name, check in checks.items():
+            healthy, detail = check()
+            previous = self.state.get(name)
+            # The first failure alerts; the first success after a failure reports recovery
+            if healthy != previous and (previous is not None or not healthy):
+                self.alert(name, healthy, detail)
+            self.state[name] = healthy
+            results[name] = {"healthy": healthy, "detail": detail}
+        return results
+
+    def run(self):
+        self.running = True
+        print(f"Monitoring {len(self.urls)} endpoint(s), disk and load every {self.interval}s")
+        while self.running:
+            results = self.check_all()
+            healthy = sum(1 for result in results.values() if result["healthy"])
+            print(f"[{datetime.now().isoformat()}] {healthy}/{len(results)} checks healthy")
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.running = False
+
+
+def main():
+    agent = MonitorAgent()
+    try:
+        agent.run()
+    except KeyboardInterrupt:
+        agent.stop()
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+TIMEOUT = re.compile(r"\btimeout (?:of )?(\d+(?:\.\d+)?)\s*(?:s|sec|second)s?\b", re.IGNORECASE)
+PERCENT = re.compile(r"\b(\d{1,2})\s*%")
+
+
+def find_timeout(prompt: str):
+    found = TIMEOUT.search(prompt)
+    return float(found.group(1)) if found else None
+
+
+def find_disk_threshold(prompt: str):
+    found = PERCENT.search(prompt) if "disk" in prompt.lower() else None
+    return int(found.group(1)) if found else None
+
+
+BLUEPRINT = Blueprint(
+    blueprint_id="monitor-v1",
+    name="Monitor",
+    description="Checks HTTP endpoints, disk usage and load, alerting when a check fails or recovers",
+    keywords={"monitor": 3, "monitoring": 3, "uptime": 3, "health check": 2, "healthcheck": 2,
+              "alert": 1, "down": 1, "availability": 1, "disk": 1, "ping": 1, "status": 0.5},
+    params=[
+        Param("urls", list, [], "HTTP endpoints to check", find_urls),
+        Param("interval", int, 60, "Seconds between check rounds", find_interval),
+        Param("timeout", float, 10.0, "HTTP timeout in seconds", find_timeout),
+        Param("disk_threshold", int, 90, "Disk usage percent that triggers an alert", find_disk_threshold),
+    ],
+    template=TEMPLATE,
+)
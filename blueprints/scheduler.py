@@ -0,0 +1,105 @@
+"""
+Task scheduler blueprint
+Runs a shell command (or a heartbeat) on a fixed interval or daily at a clock time
+"""
+from blueprints.engine import Blueprint, Param, find_clock, find_interval, find_quoted
+
+TEMPLATE = '''#!/usr/bin/env python3
+"""
+Task scheduler agent (blueprint scheduler-v1)
+Runs a command on a fixed interval, or once a day at a given time
+"""
+import subprocess
+import time
+from datetime import datetime, timedelta
+
+PROMPT = $prompt
+TASK_NAME = $task
+COMMAND = $command
+INTERVAL_SECONDS = $interval
+DAILY_AT = $daily_at
+COMMAND_TIMEOUT = 3600
+
+
+class SchedulerAgent:
+    """Runs COMMAND daily at DAILY_AT ("HH:MM") or else every INTERVAL_SECONDS"""
+
+    def __init__(self, command=COMMAND, interval=INTERVAL_SECONDS, daily_at=DAILY_AT):
+        self.command = command
+        self.interval = interval
+        self.daily_at = daily_at
+        self.running = False
+        self.runs = 0
+
+    def next_run(self, now):
+        if self.daily_at:
+            hour, minute = (int(part) for part in self.daily_at.split(":"))
+            candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            return candidate if candidate > now else candidate + timedelta(days=1)
+        return now + timedelta(seconds=self.interval)
+
+    def run_task(self):
+        self.runs += 1
+        started = time.perf_counter()
+        if not self.command:
+            print(f"[{datetime.now().isoformat()}] {TASK_NAME}: run {self.runs}")
+            return 0
+        try:
+            result = subprocess.run(self.command, shell=True, capture_output=True, text=True,
+                                    timeout=COMMAND_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            print(f"{TASK_NAME}: timed out after {COMMAND_TIMEOUT}s")
+            return -1
+        print(f"[{datetime.now().isoformat()}] {TASK_NAME}: exit {result.returncode} "
+              f"in {time.perf_counter() - started:.1f}s")
+        if result.stdout.strip():
+            print(result.stdout.strip())
+        if result.returncode:
+            print(result.stderr.strip())
+        return result.returncode
+
+    def run(self, max_runs=None):
+        self.running = True
+        due = datetime.now() if not self.daily_at else self.next_run(datetime.now())
+        print(f"{TASK_NAME} scheduled; first run at {due.isoformat(timespec='seconds')}")
+        while self.running and (max_runs is None or self.runs < max_runs):
+            wait = (due - datetime.now()).total_seconds()
+            if wait > 0:
+                time.sleep(min(wait, 60))
+                continue
+            self.run_task()
+            due = self.next_run(datetime.now())
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+
+def main():
+    agent = SchedulerAgent()
+    try:
+        agent.run()
+    except KeyboardInterrupt:
+        agent.stop()
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+BLUEPRINT = Blueprint(
+    blueprint_id="scheduler-v1",
+    name="Task scheduler",
+    description="Runs a command on a fixed interval or daily at a set time",
+    keywords={"scheduler": 3, "schedule": 3, "cron": 3, "task": 1, "job": 1, "every": 0.5,
+              "daily": 0.5, "nightly": 0.5, "hourly": 0.5, "backup": 1, "periodically": 1},
+    params=[
+        Param("task", str, "Scheduled task", "Name shown in the agent's output",
+              find_quoted("task", "job", "named", "called")),
+        Param("command", str, "", "Shell command to run; empty prints a heartbeat",
+              find_quoted("command", "run", "runs", "execute")),
+        Param("interval", int, 3600, "Seconds between runs when no daily time is given", find_interval),
+        Param("daily_at", str, "", "Clock time (HH:MM) to run once a day", find_clock),
+    ],
+    template=TEMPLATE,
+)
@@ -0,0 +1,134 @@
+"""
+Web scraper blueprint
+Fetches pages on an interval, extracts elements by CSS selector and appends new items to JSON lines
+"""
+from blueprints.engine import Blueprint, Param, find_interval, find_keyword, find_quoted, find_urls
+
+TEMPLATE = '''#!/usr/bin/env python3
+"""
+Web scraper agent (blueprint scraper-v1)
+Fetches pages, extracts matching elements and appends new items to a JSON-lines file
+"""
+import json
+import re
+import time
+from datetime import datetime
+
+import requests
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+PROMPT = $prompt
+URLS = $urls
+SELECTOR = $selector
+INTERVAL_SECONDS = $interval
+OUTPUT_FILE = $output
+USER_AGENT = "OperatorOS-ScraperAgent/1.0"
+
+
+class ScraperAgent:
+    """Scrapes URLS for SELECTOR every INTERVAL_SECONDS (0 = once)"""
+
+    def __init__(self, urls=URLS, selector=SELECTOR, interval=INTERVAL_SECONDS, output=OUTPUT_FILE):
+        self.urls = urls
+        self.selector = selector
+        self.interval = interval
+        self.output = output
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        self.seen = set()
+        self.running = False
+
+    def extract(self, html):
+        """Text of every element matching the selector"""
+        if BeautifulSoup is not None:
+            soup = BeautifulSoup(html, "html.parser")
+            return [element.get_text(" ", strip=True) for element in soup.select(self.selector)]
+        # Without BeautifulSoup only plain tag selectors are understood
+        tags = [part.strip().split(".")[0] for part in self.selector.split(",")]
+        items = []
+        for tag in filter(None, tags):
+            for inner in re.findall(rf"<{tag}\\b[^>]*>(.*?)</{tag}>", html, re.S | re.I):
+                items.append(re.sub(r"<[^>]+>|\\s+", " ", inner).strip())
+        return items
+
+    def scrape_once(self):
+        found = 0
+        with open(self.output, "a", encoding="utf-8") as f:
+            for url in self.urls:
+                try:
+                    response = self.session.get(url, timeout=15)
+                    response.raise_for_status()
+                except requests.RequestException as e:
+                    print(f"Failed to fetch {url}: {e}")
+                    continue
+                for text in self.extract(response.text):
+                    if not text or (url, text) in self.seen:
+                        continue
+                    self.seen.add((url, text))
+                    f.write(json.dumps({"url": url, "text": text, "scraped_at": datetime.now().isoformat()}) + "\\n")
+                    found += 1
+        print(f"Scraped {found} new items from {len(self.urls)} page(s) into {self.output}")
+        return found
+
+    def run(self):
+        self.running = True
+        while self.running:
+            self.scrape_once()
+            if not self.interval:
+                break
+            time.sleep(self.interval)
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+
+def main():
+    agent = ScraperAgent()
+    try:
+        agent.run()
+    except KeyboardInterrupt:
+        agent.stop()
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+SELECTORS = {
+    "headline": "h1, h2, h3",
+    "title": "h1, h2, h3",
+    "heading": "h1, h2, h3",
+    "price": "[class*=price]",
+    "link": "a",
+    "paragraph": "p",
+    "article": "article",
+    "table": "table tr",
+}
+QUOTED_SELECTOR = find_quoted("selector", "css")
+NAMED_SELECTOR = find_keyword(SELECTORS)
+
+
+def find_selector(prompt: str):
+    return QUOTED_SELECTOR(prompt) or NAMED_SELECTOR(prompt)
+
+
+BLUEPRINT = Blueprint(
+    blueprint_id="scraper-v1",
+    name="Web scraper",
+    description="Fetches pages on an interval and saves elements matching a CSS selector",
+    keywords={"scraper": 3, "scrape": 3, "crawl": 2, "crawler": 2, "extract": 1, "headline": 1,
+              "price": 1, "web page": 1, "website": 0.5, "fetch": 0.5},
+    params=[
+        Param("urls", list, ["https://example.com"], "Pages to fetch", find_urls),
+        Param("selector", str, "h1, h2, h3", "CSS selector of the elements to save", find_selector),
+        Param("interval", int, 0, "Seconds between scrapes, 0 to scrape once", find_interval),
+        Param("output", str, "scraped_items.jsonl", "JSON-lines file new items are appended to",
+              find_quoted("output", "save to", "into")),
+    ],
+    template=TEMPLATE,
+)
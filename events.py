@@ -0,0 +1,75 @@
+"""
+In-process event hub for deployment progress
+Events are serialized once and fanned out to per-client bounded queues
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Optional, Set
+
+# Messages buffered per connected client before the oldest is dropped
+CLIENT_QUEUE_SIZE = 256
+# Recent events replayed to newly connected consoles
+HISTORY_SIZE = 50
+
+
+class EventHub:
+    """Pub/sub hub; publish() is safe to call from any thread"""
+
+    def __init__(self, client_queue_size: int = CLIENT_QUEUE_SIZE, history_size: int = HISTORY_SIZE):
+        self.client_queue_size = client_queue_size
+        self.history = deque(maxlen=history_size)
+        self.clients: Set[asyncio.Queue] = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"published": 0, "dropped": 0}
+        self._lock = threading.Lock()
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Attach the event loop that owns the client queues"""
+        self.loop = loop
+
+    def publish(self, event_type: str, **data):
+        """Serialize an event once and deliver it to every subscriber"""
+        message = json.dumps({"type": event_type, "timestamp": datetime.now().isoformat(), **data}, default=str)
+        with self._lock:
+            self.stats["published"] += 1
+
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            self.history.append(message)
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fanout(message)
+        else:
+            loop.call_soon_threadsafe(self._fanout, message)
+
+    def _fanout(self, message: str):
+        self.history.append(message)
+        for queue in self.clients:
+            if queue.full():
+                # Slow consoles lose their oldest message rather than holding up the publisher
+                queue.get_nowait()
+                self.stats["dropped"] += 1
+            queue.put_nowait(message)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a client queue, pre-filled with recent history"""
+        if self.loop is None:
+            self.bind(asyncio.get_running_loop())
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.client_queue_size)
+        for message in list(self.history)[-self.client_queue_size:]:
+            queue.put_nowait(message)
+        self.clients.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.clients.discard(queue)
+
+    def status(self) -> dict:
+        return dict(self.stats, clients=len(self.clients), history=len(self.history))
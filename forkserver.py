@@ -0,0 +1,335 @@
+"""
+Fork-server launcher for agent runs
+Pre-imports common modules once and forks a copy-on-write child per agent run
+"""
+import asyncio
+import json
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+# Modules most generated agents import; override with AGENT_PRELOAD_MODULES=mod1,mod2
+DEFAULT_PRELOAD = ["requests", "bs4", "openai", "json", "datetime", "logging", "threading"]
+
+MAX_MESSAGE = 64 * 1024
+# Seconds the server may take to import its preload list and report ready
+START_TIMEOUT = float(os.getenv("AGENT_FORKSERVER_START_TIMEOUT", 60))
+
+
+def preload_modules_from_env() -> List[str]:
+    """Return the preload list configured through AGENT_PRELOAD_MODULES"""
+    value = os.getenv("AGENT_PRELOAD_MODULES")
+    if value is None:
+        return list(DEFAULT_PRELOAD)
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class ForkedProcess:
+    """Handle for an agent process forked by the fork server"""
+
+    def __init__(self, pid: int, status_sock: socket.socket, stdout, stderr):
+        self.pid = pid
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode: Optional[int] = None
+        self._status = status_sock
+        self._buffer = b""
+
+    def _read_status(self, timeout: Optional[float]) -> bool:
+        """Read the exit line sent by the fork server, if available"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b"\n" not in self._buffer:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._status], [], [], remaining)
+            if not ready:
+                return False
+            chunk = self._status.recv(4096)
+            if not chunk:
+                # Server went away without reporting; treat as killed
+                self._buffer += b"exit -9\n"
+                break
+            self._buffer += chunk
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        self.returncode = int(line.split()[1])
+        self._status.close()
+        return True
+
+    def poll(self) -> Optional[int]:
+        """Return the exit code if the process has finished, else None"""
+        if self.returncode is None:
+            self._read_status(0)
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """Wait for the process to exit and return its exit code"""
+        if self.returncode is None and not self._read_status(timeout):
+            raise subprocess.TimeoutExpired(f"forked agent {self.pid}", timeout)
+        return self.returncode
+
+    async def wait_async(self) -> int:
+        """Wait for exit on the running event loop without tying up a thread"""
+        if self.returncode is None:
+            loop = asyncio.get_running_loop()
+            self._status.setblocking(False)
+            while b"\n" not in self._buffer:
+                chunk = await loop.sock_recv(self._status, 4096)
+                if not chunk:
+                    self._buffer += b"exit -9\n"
+                    break
+                self._buffer += chunk
+            self._read_status(0)
+        return self.returncode
+
+    def kill(self, sig: int = signal.SIGTERM):
+        """Send a signal to the forked process"""
+        if self.returncode is None:
+            try:
+                os.kill(self.pid, sig)
+            except ProcessLookupError:
+                pass
+
+
+class ForkServer:
+    """Warm interpreter that forks a child for every agent run"""
+
+    def __init__(self, preload: Optional[Sequence[str]] = None, python: str = sys.executable):
+        self.preload = list(preload) if preload is not None else preload_modules_from_env()
+        self.python = python
+        self.process: Optional[subprocess.Popen] = None
+        self.loaded: List[str] = []
+        self._control: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self, timeout: float = START_TIMEOUT):
+        """Start the fork server process and wait until its imports are done
+
+        Raises RuntimeError if the server exits or stays silent past timeout.
+        """
+        if self.running:
+            return
+        parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        here = os.path.dirname(os.path.abspath(__file__))
+        code = f"import sys; sys.path.insert(0, {here!r}); import forkserver; forkserver._serve({child.fileno()})"
+        self.process = subprocess.Popen(
+            [self.python, "-c", code, *self.preload],
+            pass_fds=[child.fileno()],
+            stdin=subprocess.DEVNULL,
+        )
+        child.close()
+        self._control = parent
+        # The server sends one datagram once every preload import has been attempted
+        deadline = time.monotonic() + timeout
+        parent.settimeout(0.5)
+        while True:
+            try:
+                ready = json.loads(parent.recv(MAX_MESSAGE))
+                break
+            except socket.timeout:
+                pass
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                code = self.process.poll()
+                self._abandon()
+                raise RuntimeError("Fork server " + (f"exited with {code}" if code is not None else
+                                                     f"not ready after {timeout:.0f}s") + " during startup")
+        parent.settimeout(None)
+        self.loaded = ready.get("loaded", [])
+
+    def _abandon(self):
+        """Tear down a server that never became ready"""
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        self.process = None
+        self._control.close()
+        self._control = None
+
+    def launch(self, script: str, args: Sequence[str] = (), cwd: Optional[str] = None,
+               env: Optional[Dict[str, str]] = None) -> ForkedProcess:
+        """Fork a warm child that runs script as __main__"""
+        if not self.running:
+            with self._start_lock:
+                if not self.running:
+                    self.start()
+
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        status_ours, status_theirs = socket.socketpair()
+        request = {
+            "script": os.path.abspath(script),
+            "args": list(args),
+            "cwd": os.path.abspath(cwd or os.getcwd()),
+            "env": env or {},
+        }
+        try:
+            with self._lock:
+                socket.send_fds(self._control, [json.dumps(request).encode()],
+                                [out_w, err_w, status_theirs.fileno()])
+        finally:
+            os.close(out_w)
+            os.close(err_w)
+            status_theirs.close()
+
+        # First line on the status socket is the child pid
+        buffer = b""
+        while b"\n" not in buffer:
+            chunk = status_ours.recv(4096)
+            if not chunk:
+                raise RuntimeError("Fork server closed the status channel before reporting a pid")
+            buffer += chunk
+        line, _, rest = buffer.partition(b"\n")
+        proc = ForkedProcess(int(line.split()[1]), status_ours,
+                             os.fdopen(out_r, "rb", buffering=0), os.fdopen(err_r, "rb", buffering=0))
+        proc._buffer = rest
+        return proc
+
+    def stop(self):
+        """Shut down the fork server; running children are left to finish"""
+        if self._control is not None:
+            try:
+                self._control.send(json.dumps({"op": "shutdown"}).encode())
+            except OSError:
+                pass
+            self._control.close()
+            self._control = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+
+def _exit_code(status: int) -> int:
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _run_child(request: dict, fds: List[int], inherited: List[int]):
+    """Body of a forked child: rewire stdio and execute the agent script"""
+    import runpy
+    import traceback
+
+    code = 0
+    try:
+        for fd in inherited:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.set_wakeup_fd(-1)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(fds[0], 1)
+        os.dup2(fds[1], 2)
+        for fd in (devnull, fds[0], fds[1], fds[2]):
+            os.close(fd)
+
+        os.chdir(request["cwd"])
+        os.environ.update(request["env"])
+        script = request["script"]
+        sys.argv = [script, *request["args"]]
+        sys.path[0] = os.path.dirname(script)
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def _serve(control_fd: int):
+    """Fork server main loop; runs inside the warm interpreter"""
+    import importlib
+
+    control = socket.socket(fileno=control_fd)
+    loaded = []
+    for name in sys.argv[1:]:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception:
+            pass
+    control.send(json.dumps({"loaded": loaded}).encode())
+
+    # SIGCHLD wakes select() through the self-pipe so exits are reported promptly
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+    signal.set_wakeup_fd(wake_w)
+    parent_pid = os.getppid()
+
+    status_socks: Dict[int, socket.socket] = {}
+    running = True
+    while running or status_socks:
+        ready, _, _ = select.select([control, wake_r] if running else [wake_r], [], [], 1.0)
+
+        if wake_r in ready:
+            try:
+                os.read(wake_r, 1024)
+            except BlockingIOError:
+                pass
+
+        if control in ready:
+            try:
+                message, fds, _, _ = socket.recv_fds(control, MAX_MESSAGE, 3)
+            except OSError:
+                message, fds = b"", []
+            request = json.loads(message) if message else {"op": "shutdown"}
+            if request.get("op") == "shutdown":
+                running = False
+            elif len(fds) == 3:
+                inherited = [control.fileno(), wake_r, wake_w] + [s.fileno() for s in status_socks.values()]
+                pid = os.fork()
+                if pid == 0:
+                    _run_child(request, fds, inherited)
+                status = socket.socket(fileno=fds[2])
+                os.close(fds[0])
+                os.close(fds[1])
+                status.sendall(f"pid {pid}\n".encode())
+                status_socks[pid] = status
+
+        # Reap every finished child and report its exit code
+        while status_socks:
+            try:
+                pid, status_code = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            sock = status_socks.pop(pid, None)
+            if sock is not None:
+                try:
+                    sock.sendall(f"exit {_exit_code(status_code)}\n".encode())
+                except OSError:
+                    pass
+                sock.close()
+
+        if running and os.getppid() != parent_pid:
+            running = False
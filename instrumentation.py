@@ -0,0 +1,175 @@
+"""
+Lightweight request instrumentation
+Context-manager spans feed per-stage histograms and, inside an HTTP request, its Server-Timing header
+"""
+import contextvars
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import tracing
+
+# Upper bounds in seconds; an implicit +Inf bucket follows
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+SERVER_TIMING_NAME = re.compile(r"[^A-Za-z0-9_-]")
+
+# (stage, seconds) pairs of the request being handled, if any
+_request_timings: contextvars.ContextVar[Optional[List[tuple]]] = contextvars.ContextVar(
+    "request_timings", default=None)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; one short lock per observation"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = 0
+        for bound in self.buckets:
+            if seconds <= bound:
+                break
+            index += 1
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self) -> tuple:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given quantile"""
+        counts, _, count = self.snapshot()
+        if not count:
+            return None
+        target = fraction * count
+        seen = 0
+        for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+            seen += bucket
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def summary(self) -> dict:
+        counts, total, count = self.snapshot()
+        return {
+            "count": count,
+            "mean_ms": round(total / count * 1000, 3) if count else None,
+            "p50_le_ms": _ms(self.quantile(0.5)),
+            "p95_le_ms": _ms(self.quantile(0.95)),
+            "p99_le_ms": _ms(self.quantile(0.99)),
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    if seconds is None or seconds == float("inf"):
+        return seconds
+    return round(seconds * 1000, 3)
+
+
+class StageRegistry:
+    """Histogram per stage name, created on first use"""
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def summary(self) -> dict:
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+
+stages = StageRegistry()
+
+# Called as observer(method, route, status, seconds) after every HTTP request
+request_observers: List[Callable[[str, str, int, float], None]] = []
+
+
+def record(name: str, seconds: float):
+    """Record a stage duration measured elsewhere"""
+    stages.get(name).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def span(name: str):
+    """Time a block as stage `name`; inside a trace it is also recorded as a trace span
+
+        with span("openai"):
+            response = client.chat.completions.create(...)
+    """
+    start = time.perf_counter()
+    try:
+        with tracing.trace_span(name):
+            yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def server_timing(timings: List[tuple], total: float) -> str:
+    """Server-Timing header value; repeated stages are summed"""
+    merged: Dict[str, list] = {}
+    for name, seconds in timings:
+        entry = merged.setdefault(SERVER_TIMING_NAME.sub("_", name), [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    parts = [f"{name};dur={seconds * 1000:.2f}" + (f';desc="x{calls}"' if calls > 1 else "")
+             for name, (seconds, calls) in merged.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware: collects the request's spans into a Server-Timing header
+
+    Each request is also recorded as stage "http <METHOD> <route template>".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[tuple] = []
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                value = server_timing(timings, time.perf_counter() - start).encode("latin-1")
+                message = dict(message, headers=list(message.get("headers", [])) + [(b"server-timing", value)])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            stages.get(f"http {scope['method']} {path}").observe(elapsed)
+            for observer in request_observers:
+                observer(scope["method"], path, status, elapsed)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Streaming analytics for deployment and GitPushAgent logs
+Single generator pass over new lines only, with aggregates checkpointed by byte offset
+"""
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+DATA_DIR = Path(os.getenv("OPERATOR_DATA_DIR", "data"))
+
+DEPLOY_LOG = Path("logs/deployments.log")
+GIT_LOG = Path("logs/git_push.log")
+
+# Per-minute buckets older than this are pruned from the checkpoint
+MINUTE_RETENTION = timedelta(days=7)
+MAX_CLUSTERS = 1000
+MAX_PROMPTS = 1000
+RECENT_LATENCIES = 200
+
+LINE_PATTERN = re.compile(r"^\[(?P<ts>[^\]]+)\] (?P<level>[A-Z]+): (?P<message>.*)$")
+
+# Variable parts replaced so similar errors land in one cluster
+CLUSTER_RULES = [
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "<str>"),
+    (re.compile(r"(?:[\w.-]+/)+[\w.-]+"), "<path>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-f]{8,}\b"), "<hex>"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "<num>"),
+]
+
+DEPLOY_START = re.compile(r"^Starting deployment for prompt: '(?P<prompt>.*)'$")
+DEPLOY_WRITTEN = re.compile(r"^Agent code generated and saved to agents/(?P<file>[\w.-]+)\.py$")
+FALLBACK_USED = re.compile(r"^Using fallback template for prompt: (?P<prompt>.*)$")
+PUSH_SUCCESS = re.compile(r"^🚀 Agent '(?P<agent>.*)' successfully pushed to GitHub!$")
+
+
+def agent_title(filename: str) -> str:
+    """Agent name as GitPushAgent reports it"""
+    return filename.replace(".py", "").replace("-", " ").title()
+
+
+def cluster_key(message: str) -> str:
+    for pattern, replacement in CLUSTER_RULES:
+        message = pattern.sub(replacement, message)
+    return message[:200]
+
+
+def iter_entries(path: Path, offset: int = 0) -> Iterator[Tuple[int, Optional[datetime], str, str]]:
+    """Yield (end_offset, timestamp, level, message) for complete lines after offset
+
+    Lines that do not parse are yielded with a None timestamp so the offset still advances.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                # Partial line still being written; pick it up next time
+                return
+            offset += len(raw)
+            match = LINE_PATTERN.match(raw.decode("utf-8", errors="replace").rstrip("\n"))
+            try:
+                timestamp = datetime.fromisoformat(match["ts"]) if match else None
+            except ValueError:
+                timestamp = None
+            if timestamp is None:
+                yield offset, None, "", ""
+            else:
+                yield offset, timestamp, match["level"], match["message"]
+
+
+def _bump(counter: dict, key: str, limit: int, amount: int = 1):
+    if key in counter or len(counter) < limit:
+        counter[key] = counter.get(key, 0) + amount
+
+
+class LogAnalytics:
+    """Incremental aggregates over logs/deployments.log and logs/git_push.log"""
+
+    def __init__(self, deploy_log=DEPLOY_LOG, git_log=GIT_LOG, checkpoint_file=None):
+        self.logs = {"deployments": Path(deploy_log), "git_push": Path(git_log)}
+        self.checkpoint_file = Path(checkpoint_file) if checkpoint_file else DATA_DIR / "log_analytics.json"
+        self._lock = threading.Lock()
+        self.state = self._empty_state()
+        self.load()
+
+    @staticmethod
+    def _empty_state() -> dict:
+        return {
+            "offsets": {},
+            "per_minute": {},
+            "clusters": {},
+            "cluster_examples": {},
+            "failing_prompts": {},
+            "pending_deploys": {},
+            "latencies": [],
+            "latency_totals": {"count": 0, "sum": 0.0, "max": 0.0},
+            "current_prompt": None,
+        }
+
+    def load(self):
+        try:
+            with open(self.checkpoint_file, "r", encoding="utf-8") as f:
+                self.state.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        # Checkpoints written before examples were capped may hold examples of untracked clusters
+        clusters = self.state["clusters"]
+        self.state["cluster_examples"] = {key: example for key, example in self.state["cluster_examples"].items()
+                                          if key in clusters}
+
+    def save(self):
+        self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.checkpoint_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.checkpoint_file)
+
+    def _start_offset(self, name: str, path: Path) -> int:
+        """Resume from the checkpoint unless the file was rotated or truncated"""
+        saved = self.state["offsets"].get(name)
+        stat = path.stat()
+        if not saved or saved.get("inode") != stat.st_ino or saved.get("offset", 0) > stat.st_size:
+            return 0
+        return saved["offset"]
+
+    def refresh(self) -> int:
+        """Process lines appended since the last checkpoint; returns how many were read"""
+        with self._lock:
+            processed = 0
+            # Deployments first so pushes in the same pass can join against their deploys
+            for name in ("deployments", "git_push"):
+                path = self.logs[name]
+                if not path.exists():
+                    continue
+                offset = self._start_offset(name, path)
+                for offset, timestamp, level, message in iter_entries(path, offset):
+                    if timestamp is not None:
+                        self._consume(name, timestamp, level, message)
+                        processed += 1
+                self.state["offsets"][name] = {"offset": offset, "inode": path.stat().st_ino}
+            if processed:
+                self._prune()
+                self.save()
+            return processed
+
+    def _consume(self, log: str, timestamp: datetime, level: str, message: str):
+        minute = timestamp.strftime("%Y-%m-%dT%H:%M")
+        bucket = self.state["per_minute"].setdefault(log, {}).setdefault(minute, {})
+        bucket[level] = bucket.get(level, 0) + 1
+
+        if level == "ERROR":
+            key = cluster_key(message)
+            _bump(self.state["clusters"], key, MAX_CLUSTERS)
+            # Only clusters the cap let in keep an example
+            if key in self.state["clusters"]:
+                self.state["cluster_examples"].setdefault(key, message[:500])
+
+        if log == "deployments":
+            self._consume_deploy(timestamp, level, message)
+        else:
+            self._consume_push(timestamp, message)
+
+    def _consume_deploy(self, timestamp: datetime, level: str, message: str):
+        started = DEPLOY_START.match(message)
+        if started:
+            self.state["current_prompt"] = started["prompt"]
+            return
+
+        fallback = FALLBACK_USED.match(message)
+        if fallback:
+            _bump(self.state["failing_prompts"], fallback["prompt"][:200], MAX_PROMPTS)
+            return
+        failed = (level == "ERROR" and message.startswith("Deployment failed")) or \
+            message.startswith("Generated code failed validation")
+        if failed and self.state["current_prompt"]:
+            _bump(self.state["failing_prompts"], self.state["current_prompt"][:200], MAX_PROMPTS)
+            return
+
+        written = DEPLOY_WRITTEN.match(message)
+        if written:
+            self.state["pending_deploys"][agent_title(written["file"])] = timestamp.isoformat()
+
+    def _consume_push(self, timestamp: datetime, message: str):
+        pushed = PUSH_SUCCESS.match(message)
+        if not pushed:
+            return
+        deployed_at = self.state["pending_deploys"].pop(pushed["agent"], None)
+        if deployed_at is None:
+            return
+        latency = (timestamp - datetime.fromisoformat(deployed_at)).total_seconds()
+        totals = self.state["latency_totals"]
+        totals["count"] += 1
+        totals["sum"] += latency
+        totals["max"] = max(totals["max"], latency)
+        self.state["latencies"].append({"agent": pushed["agent"], "seconds": latency, "pushed_at": timestamp.isoformat()})
+        del self.state["latencies"][:-RECENT_LATENCIES]
+
+    def _prune(self):
+        cutoff = (datetime.now() - MINUTE_RETENTION).strftime("%Y-%m-%dT%H:%M")
+        for buckets in self.state["per_minute"].values():
+            for minute in [m for m in buckets if m < cutoff]:
+                del buckets[minute]
+        # Deploys that never got pushed within the retention window are abandoned
+        pending = self.state["pending_deploys"]
+        for agent in [a for a, ts in pending.items() if ts[:16] < cutoff]:
+            del pending[agent]
+
+    def summary(self, minutes: int = 60, top: int = 10) -> dict:
+        self.refresh()
+        with self._lock:
+            state = self.state
+            recent = {}
+            for log, buckets in state["per_minute"].items():
+                keys = sorted(buckets)[-minutes:]
+                recent[log] = {minute: buckets[minute] for minute in keys}
+
+            clusters = sorted(state["clusters"].items(), key=lambda item: item[1], reverse=True)[:top]
+            prompts = sorted(state["failing_prompts"].items(), key=lambda item: item[1], reverse=True)[:top]
+            seconds = sorted(entry["seconds"] for entry in state["latencies"])
+            totals = state["latency_totals"]
+            return {
+                "per_minute": recent,
+                "error_clusters": [
+                    {"pattern": key, "count": count, "example": state["cluster_examples"].get(key)}
+                    for key, count in clusters
+                ],
+                "failing_prompts": [{"prompt": prompt, "failures": count} for prompt, count in prompts],
+                "deploy_to_push": {
+                    "count": totals["count"],
+                    "mean_seconds": round(totals["sum"] / totals["count"], 3) if totals["count"] else None,
+                    "max_seconds": totals["max"] if totals["count"] else None,
+                    "recent_p50_seconds": seconds[len(seconds) // 2] if seconds else None,
+                    "pending": len(state["pending_deploys"]),
+                },
+            }
+
+
+def main():
+    """Print a summary of the local logs"""
+    analytics = LogAnalytics()
+    print(json.dumps(analytics.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
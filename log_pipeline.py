@@ -0,0 +1,160 @@
+"""
+Shared logging pipeline for the API and GitPushAgent
+Callers only enqueue records; one QueueListener thread formats them and writes every sink
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Comma-separated sinks: file (plain-text logs), console, json (structured JSON lines)
+SINKS = os.getenv("LOG_SINKS", "file,console")
+JSON_LOG = os.getenv("LOG_JSON_FILE", "logs/operator.jsonl")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+ROOT = "operator"
+
+# Plain-text log file per logger; these keep the "[timestamp] LEVEL: message" format the
+# analytics and rotation code parse
+LOG_FILES = {
+    f"{ROOT}.deploy": "logs/deployments.log",
+    f"{ROOT}.git_push": "logs/git_push.log",
+}
+
+# Structured fields callers may pass through `extra`
+FIELDS = ("agent", "git_op", "duration", "returncode", "deploy_id")
+
+SUCCESS = 25
+logging.addLevelName(SUCCESS, "SUCCESS")
+
+
+def level_number(name: str) -> int:
+    """Numeric level for names like "info" or "SUCCESS"; unknown names log as INFO"""
+    level = logging.getLevelName(name.upper())
+    return level if isinstance(level, int) else logging.INFO
+
+
+_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class LineFormatter(logging.Formatter):
+    """[2024-01-01T12:00:00.000000] INFO: message"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        timestamp = datetime.fromtimestamp(record.created).isoformat()
+        return f"[{timestamp}] {record.levelname}: {record.getMessage()}"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including the structured fields that were set"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        return json.dumps(entry, default=str)
+
+
+class RoutedFileHandler(logging.Handler):
+    """Writes each record to the plain-text file of its logger
+
+    Files are reopened when their inode changes, so log rotation can simply rename them.
+    """
+
+    def __init__(self, routes: Dict[str, str]):
+        super().__init__()
+        self.handlers = {}
+        for name, path in routes.items():
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            handler = logging.handlers.WatchedFileHandler(path, encoding="utf-8", delay=True)
+            handler.setFormatter(LineFormatter())
+            self.handlers[name] = handler
+
+    def emit(self, record: logging.LogRecord):
+        name = record.name
+        while name:
+            handler = self.handlers.get(name)
+            if handler is not None:
+                handler.handle(record)
+                return
+            name = name.rpartition(".")[0]
+
+    def close(self):
+        for handler in self.handlers.values():
+            handler.close()
+        super().close()
+
+
+def build_sinks(sinks: str = SINKS) -> List[logging.Handler]:
+    handlers = []
+    for sink in (s.strip() for s in sinks.split(",")):
+        if sink == "file":
+            handlers.append(RoutedFileHandler(LOG_FILES))
+        elif sink == "console":
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+            handlers.append(handler)
+        elif sink == "json":
+            os.makedirs(os.path.dirname(JSON_LOG) or ".", exist_ok=True)
+            handler = logging.handlers.WatchedFileHandler(JSON_LOG, encoding="utf-8", delay=True)
+            handler.setFormatter(JsonFormatter())
+            handlers.append(handler)
+        elif sink:
+            raise ValueError(f"Unknown log sink '{sink}'")
+    return handlers
+
+
+def configure(sinks: str = SINKS, level: str = LOG_LEVEL) -> logging.Logger:
+    """Attach the queue pipeline to the "operator" logger once; later calls are no-ops
+
+    Only this logger tree is touched, never the root logger of the host process.
+    """
+    global _listener
+    root = logging.getLogger(ROOT)
+    with _lock:
+        if _listener is not None:
+            return root
+        records = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(records, *build_sinks(sinks), respect_handler_level=True)
+        _listener.start()
+        root.addHandler(logging.handlers.QueueHandler(records))
+        root.setLevel(level)
+        root.propagate = False
+        atexit.register(shutdown)
+    return root
+
+
+def shutdown():
+    """Flush queued records and close the sinks"""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        root = logging.getLogger(ROOT)
+        for handler in list(root.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                root.removeHandler(handler)
+        _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the shared pipeline, e.g. get_logger("git_push")"""
+    configure()
+    return logging.getLogger(f"{ROOT}.{name}")
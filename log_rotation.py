@@ -0,0 +1,263 @@
+"""
+Log rotation with compressed, block-indexed archives
+Archived segments are written as independent compressed blocks with a sidecar index of time ranges,
+so historical queries only decompress the blocks they need
+"""
+import asyncio
+import gzip
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+MAX_AGE_HOURS = float(os.getenv("LOG_MAX_AGE_HOURS", 24))
+KEEP_BYTES = int(os.getenv("LOG_KEEP_BYTES", 200 * 1024 * 1024))
+COMPRESSION = os.getenv("LOG_COMPRESSION", "gzip")
+CHECK_INTERVAL = float(os.getenv("LOG_ROTATE_INTERVAL", 60))
+
+# Uncompressed bytes per independently decompressible block
+BLOCK_SIZE = 64 * 1024
+
+# Only untracked logs: rotating a file git tracks (e.g. test_log.md) would show up as its deletion
+ROTATED_LOGS = ["logs/deployments.log", "logs/git_push.log"]
+ARCHIVE_DIR = Path("logs/archive")
+
+TIMESTAMP = re.compile(rb"^\[([0-9T:.\-+]+)\]")
+
+
+def _line_time(line: bytes) -> Optional[str]:
+    match = TIMESTAMP.match(line)
+    return match.group(1).decode("ascii") if match else None
+
+
+class Codec:
+    """Block compression; concatenated blocks stay a valid .gz / .zst stream"""
+
+    def __init__(self, name: str):
+        if name == "zstd" and zstandard is None:
+            name = "gzip"
+        self.name = name
+        self.suffix = ".zst" if name == "zstd" else ".gz"
+
+    def compress(self, data: bytes) -> bytes:
+        if self.name == "zstd":
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def decompress(self, data: bytes) -> bytes:
+        if self.name == "zstd":
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read .zst log archives")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+
+class LogRotator:
+    """Rotates one log file into ARCHIVE_DIR/<name>.<stamp>.log.gz plus a .idx.json sidecar"""
+
+    def __init__(self, path, archive_dir=ARCHIVE_DIR, max_bytes: int = MAX_BYTES,
+                 max_age_hours: float = MAX_AGE_HOURS, keep_bytes: int = KEEP_BYTES,
+                 compression: str = COMPRESSION):
+        self.path = Path(path)
+        self.archive_dir = Path(archive_dir)
+        self.max_bytes = max_bytes
+        self.max_age_hours = max_age_hours
+        self.keep_bytes = keep_bytes
+        self.codec = Codec(compression)
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    def _first_timestamp(self) -> Optional[datetime]:
+        try:
+            with open(self.path, "rb") as f:
+                stamp = _line_time(f.readline())
+            return datetime.fromisoformat(stamp) if stamp else None
+        except (OSError, ValueError):
+            return None
+
+    def should_rotate(self) -> bool:
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            return False
+        if size == 0:
+            return False
+        if size >= self.max_bytes:
+            return True
+        first = self._first_timestamp()
+        return first is not None and (datetime.now() - first).total_seconds() >= self.max_age_hours * 3600
+
+    def rotate(self) -> Optional[Path]:
+        """Move the live file aside, archive it in compressed blocks and enforce the size budget"""
+        with self._lock:
+            if not self.path.exists():
+                return None
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+            staging = self.archive_dir / f"{self.name}.{stamp}.staging"
+            # Writers reopen on inode change (or append per entry), so the next write recreates the live file
+            os.replace(self.path, staging)
+
+            archive = self.archive_dir / f"{self.name}.{stamp}{self.codec.suffix}"
+            index = {"log": self.name, "codec": self.codec.name, "blocks": []}
+            with open(staging, "rb") as source, open(archive, "wb") as target:
+                for block in self._blocks(source):
+                    data = self.codec.compress(block["data"])
+                    index["blocks"].append({
+                        "offset": target.tell(),
+                        "length": len(data),
+                        "lines": block["lines"],
+                        "first_ts": block["first_ts"],
+                        "last_ts": block["last_ts"],
+                    })
+                    target.write(data)
+            blocks = index["blocks"]
+            index["first_ts"] = next((b["first_ts"] for b in blocks if b["first_ts"]), None)
+            index["last_ts"] = next((b["last_ts"] for b in reversed(blocks) if b["last_ts"]), None)
+            with open(self._index_path(archive), "w", encoding="utf-8") as f:
+                json.dump(index, f)
+            staging.unlink()
+
+            self.enforce_budget()
+            return archive
+
+    @staticmethod
+    def _blocks(source) -> Iterator[dict]:
+        """Group whole lines into ~BLOCK_SIZE chunks with their time range"""
+        lines: List[bytes] = []
+        size = 0
+        first_ts = last_ts = None
+        for line in source:
+            stamp = _line_time(line)
+            if stamp:
+                first_ts = first_ts or stamp
+                last_ts = stamp
+            lines.append(line)
+            size += len(line)
+            if size >= BLOCK_SIZE:
+                yield {"data": b"".join(lines), "lines": len(lines), "first_ts": first_ts, "last_ts": last_ts}
+                lines, size, first_ts = [], 0, None
+        if lines:
+            yield {"data": b"".join(lines), "lines": len(lines), "first_ts": first_ts, "last_ts": last_ts}
+
+    @staticmethod
+    def _index_path(archive: Path) -> Path:
+        return archive.with_name(archive.name + ".idx.json")
+
+    def archives(self) -> List[Path]:
+        """This log's archives, oldest first"""
+        found = [p for p in self.archive_dir.glob(f"{self.name}.*")
+                 if p.suffix in (".gz", ".zst")]
+        return sorted(found)
+
+    def enforce_budget(self):
+        """Delete the oldest archives once their total size exceeds keep_bytes"""
+        archives = self.archives()
+        total = sum(p.stat().st_size for p in archives)
+        for archive in archives:
+            if total <= self.keep_bytes:
+                break
+            total -= archive.stat().st_size
+            archive.unlink()
+            self._index_path(archive).unlink(missing_ok=True)
+
+    def query(self, start: Optional[str] = None, end: Optional[str] = None,
+              limit: Optional[int] = None) -> Iterator[str]:
+        """Lines with timestamps in [start, end], oldest first, across archives and the live file
+
+        Timestamps are ISO strings and compare lexicographically.
+        """
+        emitted = 0
+
+        def in_range(stamp: Optional[str]) -> bool:
+            return stamp is not None and (start is None or stamp >= start) and (end is None or stamp <= end)
+
+        def overlaps(first: Optional[str], last: Optional[str]) -> bool:
+            if first is None or last is None:
+                return False
+            return (end is None or first <= end) and (start is None or last >= start)
+
+        for archive in self.archives():
+            try:
+                with open(self._index_path(archive), "r", encoding="utf-8") as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not overlaps(index.get("first_ts"), index.get("last_ts")):
+                continue
+            codec = Codec(index["codec"])
+            with open(archive, "rb") as f:
+                for block in index["blocks"]:
+                    if not overlaps(block["first_ts"], block["last_ts"]):
+                        continue
+                    f.seek(block["offset"])
+                    for line in codec.decompress(f.read(block["length"])).splitlines():
+                        if in_range(_line_time(line)):
+                            yield line.decode("utf-8", errors="replace")
+                            emitted += 1
+                            if limit and emitted >= limit:
+                                return
+
+        if self.path.exists():
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if in_range(_line_time(line)):
+                        yield line.decode("utf-8", errors="replace").rstrip("\n")
+                        emitted += 1
+                        if limit and emitted >= limit:
+                            return
+
+
+class LogRotationService:
+    """Checks every rotated log periodically on the event loop"""
+
+    def __init__(self, paths=ROTATED_LOGS, interval: float = CHECK_INTERVAL, **options):
+        self.rotators = {Path(p).name: LogRotator(p, **options) for p in paths}
+        self.interval = interval
+        # Called before a log is moved aside, e.g. to let readers catch up on its tail
+        self.before_rotate: List[Callable[[Path], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def check(self) -> List[Path]:
+        rotated = []
+        for rotator in self.rotators.values():
+            if rotator.should_rotate():
+                for callback in self.before_rotate:
+                    try:
+                        callback(rotator.path)
+                    except Exception as e:
+                        print(f"Log rotation callback failed: {e}")
+                archive = rotator.rotate()
+                if archive is not None:
+                    rotated.append(archive)
+        return rotated
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.to_thread(self.check)
+            await asyncio.sleep(self.interval)
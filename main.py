@@ -1,10 +1,11 @@
 from fastapi import FastAPI, Request
 from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 import uvicorn
 import os
 from routes import router
+from instrumentation import ServerTimingMiddleware
+from static_assets import JSONCompressionMiddleware, PrecompressedStaticFiles, render_template
 
 app = FastAPI(title="OperatorGPT", description="Autonomous AI Agent Deployment Platform")
 
@@ -14,13 +15,22 @@ templates = Jinja2Templates(directory="templates")
 # Include API routes
 app.include_router(router)
 
+# Compress large JSON API responses; added first so Server-Timing includes the compression
+app.add_middleware(JSONCompressionMiddleware)
+
+# Server-Timing header and per-stage histograms for every request
+app.add_middleware(ServerTimingMiddleware)
+
 # Mount static files if they exist
 if os.path.exists("static"):
-    app.mount("/static", StaticFiles(directory="static"), name="static")
+    app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
+
+# The console has no per-request content: render and compress it once
+console = render_template(templates, "console.html")
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
-    return templates.TemplateResponse("console.html", {"request": request})
+    return console.response(request.headers)
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
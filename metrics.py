@@ -0,0 +1,203 @@
+"""
+Prometheus text-format metrics
+Labelled counters, gauges and histograms with one short uncontended lock per update
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from instrumentation import BUCKETS, Histogram, request_observers, stages
+from agent_health import sample_process
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+PROCESS_START = time.time()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self.values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+                                for key, value in items]
+
+
+class Gauge(Metric):
+    """Set directly, or computed at scrape time by a callback returning {label tuple: value}
+
+    Callback gauges can also expose counters kept elsewhere (kind="counter").
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 callback: Optional[Callable[[], Dict[tuple, float]]] = None, kind: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[tuple, float] = {}
+        self.callback = callback
+        self.kind = kind
+
+    def set(self, value: float, **labels):
+        self.values[self._key(labels)] = value
+
+    def render(self) -> List[str]:
+        values = dict(self.values)
+        if self.callback is not None:
+            try:
+                values.update(self.callback())
+            except Exception:
+                pass
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+                                for key, value in values.items()]
+
+
+class LabelledHistogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self.histograms: Dict[tuple, Histogram] = {}
+
+    def labels(self, **labels) -> Histogram:
+        key = self._key(labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, seconds: float, **labels):
+        self.labels(**labels).observe(seconds)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, histogram in list(self.histograms.items()):
+            lines.extend(render_histogram(self.name, self.labelnames, key, histogram))
+        return lines
+
+
+def render_histogram(name: str, labelnames: tuple, key: tuple, histogram: Histogram) -> List[str]:
+    counts, total, count = histogram.snapshot()
+    lines = []
+    cumulative = 0
+    for bound, bucket in zip(histogram.buckets + (float("inf"),), counts):
+        cumulative += bucket
+        le = 'le="%s"' % _number(bound)
+        lines.append(f"{name}_bucket{_labels(labelnames, key, le)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(labelnames, key)} {_number(total)}")
+    lines.append(f"{name}_count{_labels(labelnames, key)} {count}")
+    return lines
+
+
+class StageHistograms(Metric):
+    """Exports the instrumentation span histograms (deploy stages, OpenAI, git ops) by stage label"""
+    kind = "histogram"
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for stage, histogram in sorted(stages.histograms.items()):
+            if stage.startswith("http "):
+                continue
+            lines.extend(render_histogram(self.name, ("stage",), (stage,), histogram))
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def process_value(field: str) -> Callable[[], Dict[tuple, float]]:
+    def read():
+        sample = sample_process(os.getpid())
+        return {(): sample[field]} if sample else {}
+    return read
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "operator_http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")))
+http_duration = registry.register(LabelledHistogram(
+    "operator_http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")))
+deploys = registry.register(Counter(
+    "operator_deploys_total", "Deploys by outcome: blueprint, openai, fallback, reused or failed", ("outcome",)))
+openai_duration = registry.register(LabelledHistogram(
+    "operator_openai_request_duration_seconds", "OpenAI chat completion latency by model route", ("route",)))
+openai_tokens = registry.register(Counter(
+    "operator_openai_tokens_total", "OpenAI tokens used by model route and kind", ("route", "kind")))
+openai_errors = registry.register(Counter(
+    "operator_openai_errors_total", "OpenAI calls that failed, by model route", ("route",)))
+stage_duration = registry.register(StageHistograms(
+    "operator_stage_duration_seconds", "Instrumented stage latency (deploy steps, log writes, git_* operations)"))
+registry.register(Gauge("process_resident_memory_bytes", "Resident memory of the API server",
+                        callback=process_value("rss_bytes")))
+registry.register(Gauge("process_cpu_seconds_total", "User and system CPU time of the API server",
+                        callback=process_value("cpu_seconds"), kind="counter"))
+registry.register(Gauge("process_open_fds", "Open file descriptors of the API server",
+                        callback=process_value("open_fds")))
+registry.register(Gauge("process_start_time_seconds", "API server start time since the epoch",
+                        callback=lambda: {(): PROCESS_START}))
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    http_requests.inc(method=method, route=route, status=status)
+    http_duration.observe(seconds, method=method, route=route)
+
+
+request_observers.append(observe_request)
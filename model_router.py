@@ -0,0 +1,221 @@
+"""
+Complexity-aware model routing for agent generation
+Cheap local heuristics pick a model tier and max_tokens budget; latency, token usage and
+validation pass rate are recorded per route so the policy can be tuned from real data
+"""
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Optional
+
+DATA_DIR = Path(os.getenv("OPERATOR_DATA_DIR", "data"))
+
+# Tiers in increasing complexity: score ceiling, model, default and maximum max_tokens, temperature
+ROUTES = {
+    "simple": {"below": 1.5, "model": os.getenv("MODEL_SIMPLE", "gpt-4o-mini"),
+               "max_tokens": 900, "ceiling": 1500, "temperature": 0.2},
+    "standard": {"below": 5.0, "model": os.getenv("MODEL_STANDARD", "gpt-4o-mini"),
+                 "max_tokens": 1600, "ceiling": 2500, "temperature": 0.4},
+    "complex": {"below": float("inf"), "model": os.getenv("MODEL_COMPLEX", "gpt-4o"),
+                "max_tokens": 2500, "ceiling": 4000, "temperature": 0.7},
+}
+
+# Completion-token samples per route used to size the budget
+TOKEN_SAMPLES = 200
+LATENCY_SAMPLES = 200
+# Budget is this much above the observed p95 completion length
+TOKEN_HEADROOM = 1.25
+MIN_SAMPLES_FOR_ADAPTIVE = 5
+# Recent responses checked for finish_reason == "length"
+TRUNCATION_WINDOW = 50
+MAX_TRUNCATION_RATE = 0.05
+# Recorded outcomes are persisted at most this often (and at shutdown), never per request
+SAVE_INTERVAL = float(os.getenv("MODEL_STATS_SAVE_INTERVAL", 10))
+
+# Capabilities that each add real code: integrations, persistence, scheduling, parsing
+CAPABILITIES = {
+    "api": r"\b(api|rest|graphql|webhook|endpoint|http)\b",
+    "scraping": r"\b(scrap\w*|crawl\w*|html|selenium|beautifulsoup)\b",
+    "storage": r"\b(database|sql\w*|postgres\w*|mongo\w*|redis|csv|excel|s3|bucket|persist\w*)\b",
+    "messaging": r"\b(email|smtp|slack|discord|telegram|sms|notif\w*|alert\w*)\b",
+    "scheduling": r"\b(schedul\w*|cron|every|daily|hourly|interval|periodic\w*)\b",
+    "auth": r"\b(oauth|auth\w*|login|token|credential\w*)\b",
+    "analysis": r"\b(analy[sz]\w*|parse\w*|report\w*|statistic\w*|aggregat\w*|summari[sz]\w*)\b",
+    "ml": r"\b(machine learning|model|classif\w*|predict\w*|sentiment|llm|openai|gpt)\b",
+    "concurrency": r"\b(async\w*|concurren\w*|parallel|thread\w*|queue)\b",
+    "files": r"\b(file|folder|director\w*|upload\w*|download\w*|pdf|image)\b",
+}
+CAPABILITY_PATTERNS = {name: re.compile(pattern, re.IGNORECASE) for name, pattern in CAPABILITIES.items()}
+TRIVIAL = re.compile(r"\b(hello|test|demo|simple|basic|example|print\w*|ping|dummy)\b", re.IGNORECASE)
+CLAUSES = re.compile(r",|;|\band\b|\bthen\b|\bwhich\b|\bthat\b|\bwhen\b|\bif\b", re.IGNORECASE)
+
+
+def estimate_complexity(prompt: str) -> dict:
+    """Score a prompt from word count, requested capabilities and clause count"""
+    words = len(prompt.split())
+    capabilities = sorted(name for name, pattern in CAPABILITY_PATTERNS.items() if pattern.search(prompt))
+    clauses = len(CLAUSES.findall(prompt))
+    trivial = bool(TRIVIAL.search(prompt)) and not capabilities
+
+    score = 1.5 * len(capabilities) + 0.5 * clauses + words / 25
+    if trivial:
+        score = min(score, 1.0)
+    return {"score": round(score, 2), "words": words, "capabilities": capabilities,
+            "clauses": clauses, "trivial": trivial}
+
+
+def _percentile(values, fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class ModelRouter:
+    """Chooses a generation route per prompt and keeps per-route outcome statistics"""
+
+    def __init__(self, stats_file=None, routes: Optional[Dict[str, dict]] = None,
+                 save_interval: float = SAVE_INTERVAL):
+        self.routes = routes or ROUTES
+        self.stats_file = Path(stats_file) if stats_file else DATA_DIR / "model_routes.json"
+        self.save_interval = save_interval
+        self.dirty = False
+        self._saver: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.totals = {name: self._empty_totals() for name in self.routes}
+        self.completion_tokens = {name: deque(maxlen=TOKEN_SAMPLES) for name in self.routes}
+        self.latencies = {name: deque(maxlen=LATENCY_SAMPLES) for name in self.routes}
+        self.truncations = {name: deque(maxlen=TRUNCATION_WINDOW) for name in self.routes}
+        self.load()
+
+    @staticmethod
+    def _empty_totals() -> dict:
+        return {"requests": 0, "errors": 0, "truncated": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "latency_seconds": 0.0, "validated": 0, "valid": 0}
+
+    def load(self):
+        try:
+            with open(self.stats_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name, saved in data.items():
+            if name not in self.routes:
+                continue
+            self.totals[name].update(saved.get("totals", {}))
+            self.completion_tokens[name].extend(saved.get("completion_tokens", []))
+            self.latencies[name].extend(saved.get("latencies", []))
+            self.truncations[name].extend(saved.get("truncations", []))
+
+    def save(self):
+        # The periodic saver and a shutdown flush may overlap; the later snapshot must win
+        with self._save_lock:
+            with self._lock:
+                data = {
+                    name: {"totals": dict(self.totals[name]), "completion_tokens": list(self.completion_tokens[name]),
+                           "latencies": list(self.latencies[name]), "truncations": list(self.truncations[name])}
+                    for name in self.routes
+                }
+                self.dirty = False
+            self.stats_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.stats_file.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.stats_file)
+
+    def flush(self):
+        """Save if anything was recorded since the last save"""
+        if self.dirty:
+            try:
+                self.save()
+            except OSError as e:
+                print(f"Failed to save model route stats: {e}")
+
+    def _save_periodically(self):
+        while True:
+            time.sleep(self.save_interval)
+            self.flush()
+
+    def _changed(self):
+        """Called with the lock held after recording an outcome"""
+        self.dirty = True
+        if self._saver is None:
+            self._saver = threading.Thread(target=self._save_periodically, name="model-router-save", daemon=True)
+            self._saver.start()
+            atexit.register(self.flush)
+
+    def max_tokens(self, name: str) -> int:
+        """Observed p95 completion length plus headroom, within the route's bounds
+
+        Routes that recently kept hitting the limit are given their ceiling until the truncation rate drops.
+        """
+        route = self.routes[name]
+        samples = self.completion_tokens[name]
+        truncations = self.truncations[name]
+        if len(samples) < MIN_SAMPLES_FOR_ADAPTIVE:
+            return route["max_tokens"]
+        if truncations and sum(truncations) / len(truncations) > MAX_TRUNCATION_RATE:
+            return route["ceiling"]
+        budget = int(_percentile(samples, 0.95) * TOKEN_HEADROOM)
+        return max(256, min(route["ceiling"], budget))
+
+    def choose(self, prompt: str) -> dict:
+        complexity = estimate_complexity(prompt)
+        name = next(n for n, r in self.routes.items() if complexity["score"] < r["below"])
+        route = self.routes[name]
+        with self._lock:
+            max_tokens = self.max_tokens(name)
+        return {"route": name, "model": route["model"], "max_tokens": max_tokens,
+                "temperature": route["temperature"], "complexity": complexity}
+
+    def record_generation(self, route: str, latency: float, prompt_tokens: int = 0,
+                          completion_tokens: int = 0, truncated: bool = False, error: bool = False):
+        with self._lock:
+            totals = self.totals[route]
+            totals["requests"] += 1
+            if error:
+                totals["errors"] += 1
+            else:
+                totals["prompt_tokens"] += prompt_tokens
+                totals["completion_tokens"] += completion_tokens
+                totals["latency_seconds"] += latency
+                totals["truncated"] += int(truncated)
+                self.completion_tokens[route].append(completion_tokens)
+                self.latencies[route].append(round(latency, 3))
+                self.truncations[route].append(int(truncated))
+            self._changed()
+
+    def record_validation(self, route: str, valid: bool):
+        with self._lock:
+            self.totals[route]["validated"] += 1
+            self.totals[route]["valid"] += int(valid)
+            self._changed()
+
+    def stats(self) -> dict:
+        with self._lock:
+            report = {}
+            for name, route in self.routes.items():
+                totals = self.totals[name]
+                succeeded = totals["requests"] - totals["errors"]
+                latencies = list(self.latencies[name])
+                report[name] = {
+                    "model": route["model"],
+                    "max_tokens": self.max_tokens(name),
+                    "temperature": route["temperature"],
+                    "requests": totals["requests"],
+                    "errors": totals["errors"],
+                    "truncated": totals["truncated"],
+                    "latency_p50_seconds": _percentile(latencies, 0.5),
+                    "latency_p95_seconds": _percentile(latencies, 0.95),
+                    "mean_completion_tokens": round(totals["completion_tokens"] / succeeded, 1) if succeeded else None,
+                    "prompt_tokens": totals["prompt_tokens"],
+                    "completion_tokens": totals["completion_tokens"],
+                    "validation_pass_rate": round(totals["valid"] / totals["validated"], 3) if totals["validated"] else None,
+                }
+            return report
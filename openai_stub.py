@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+OpenAI-compatible stub server for offline load testing
+Speaks the chat-completions wire format (plain and streamed) with configurable latency,
+token rate, error/429 injection and canned responses
+
+    python openai_stub.py --port 8001 --latency lognormal:800:0.4 --tokens-per-second 60
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=stub python main.py
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+import uuid
+from typing import List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+TOKEN_PATTERN = re.compile(r"\s*\S+|\s+")
+
+DEFAULT_RESPONSE = '''```python
+#!/usr/bin/env python3
+"""
+{title}
+Stub response for: {prompt}
+"""
+import logging
+import time
+
+logging.basicConfig(level=logging.INFO)
+
+
+class {class_name}:
+    """Agent generated by the local OpenAI stub"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.running = False
+
+    def run(self):
+        self.running = True
+        self.logger.info("Running: {prompt}")
+        return {{"status": "success", "timestamp": time.time()}}
+
+    def stop(self):
+        self.running = False
+
+
+def main():
+    agent = {class_name}()
+    print(agent.run())
+
+
+if __name__ == "__main__":
+    main()
+```'''
+
+
+class Latency:
+    """Latency distribution in milliseconds
+
+    fixed:MS | uniform:LOW:HIGH | normal:MEAN:STDDEV | lognormal:MEDIAN:SIGMA
+    """
+
+    def __init__(self, spec: str):
+        kind, *params = spec.split(":")
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if expected.get(kind) != len(self.params):
+            raise ValueError(f"Invalid latency spec '{spec}'")
+        self.spec = spec
+
+    def sample(self) -> float:
+        """Seconds"""
+        if self.kind == "fixed":
+            ms = self.params[0]
+        elif self.kind == "uniform":
+            ms = random.uniform(*self.params)
+        elif self.kind == "normal":
+            ms = random.gauss(*self.params)
+        else:
+            median, sigma = self.params
+            ms = median * random.lognormvariate(0, sigma)
+        return max(0.0, ms) / 1000
+
+
+class StubConfig:
+    def __init__(self, latency: str = "fixed:0", tokens_per_second: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: float = 1.0, responses_file: Optional[str] = None):
+        # Time to first token; streaming then paces tokens at tokens_per_second (0 = unpaced)
+        self.latency = Latency(latency)
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.responses: List[tuple] = []
+        if responses_file:
+            with open(responses_file, "r", encoding="utf-8") as f:
+                for item in json.load(f):
+                    self.responses.append((re.compile(item["match"], re.IGNORECASE), item["content"]))
+
+    @classmethod
+    def from_env(cls) -> "StubConfig":
+        return cls(
+            latency=os.getenv("STUB_LATENCY", "fixed:0"),
+            tokens_per_second=float(os.getenv("STUB_TOKENS_PER_SECOND", 0)),
+            error_rate=float(os.getenv("STUB_ERROR_RATE", 0)),
+            rate_limit_rate=float(os.getenv("STUB_RATE_LIMIT_RATE", 0)),
+            retry_after=float(os.getenv("STUB_RETRY_AFTER", 1)),
+            responses_file=os.getenv("STUB_RESPONSES"),
+        )
+
+    def describe(self) -> dict:
+        return {"latency": self.latency.spec, "tokens_per_second": self.tokens_per_second,
+                "error_rate": self.error_rate, "rate_limit_rate": self.rate_limit_rate,
+                "retry_after": self.retry_after, "canned_responses": len(self.responses)}
+
+
+def tokenize(text: str) -> List[str]:
+    """Whitespace-delimited pieces; close enough to BPE counts for load shaping"""
+    return TOKEN_PATTERN.findall(text)
+
+
+def count_tokens(messages: List[dict]) -> int:
+    return sum(len(tokenize(str(m.get("content") or ""))) + 4 for m in messages)
+
+
+def error_body(message: str, kind: str, code: Optional[str] = None) -> dict:
+    return {"error": {"message": message, "type": kind, "param": None, "code": code}}
+
+
+def create_app(config: Optional[StubConfig] = None) -> FastAPI:
+    config = config or StubConfig.from_env()
+    app = FastAPI(title="OpenAI stub")
+    stats = {"requests": 0, "streamed": 0, "errors": 0, "rate_limited": 0, "completion_tokens": 0}
+
+    def respond_to(messages: List[dict]) -> str:
+        prompt = str(messages[-1].get("content") or "") if messages else ""
+        for pattern, content in config.responses:
+            if pattern.search(prompt):
+                return content
+        # Keep the prompt safe to embed in a string literal
+        subject = re.sub(r'[\\"\r\n{}]', " ", prompt.split(":", 1)[-1]).strip() or "stub agent"
+        words = re.findall(r"[A-Za-z0-9]+", subject)[:5] or ["Stub"]
+        return DEFAULT_RESPONSE.format(
+            title=subject.title(), prompt=subject,
+            class_name="".join(w.capitalize() for w in words) + "Agent",
+        )
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": m, "object": "model", "owned_by": "stub"}
+                                           for m in ("gpt-4o", "gpt-4o-mini")]}
+
+    @app.get("/stub/stats")
+    async def get_stats():
+        return {"config": config.describe(), **stats}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            stats["rate_limited"] += 1
+            return JSONResponse(error_body("Rate limit reached (stub)", "requests", "rate_limit_exceeded"),
+                                status_code=429, headers={"retry-after": str(config.retry_after)})
+        if roll < config.rate_limit_rate + config.error_rate:
+            stats["errors"] += 1
+            await asyncio.sleep(config.latency.sample())
+            return JSONResponse(error_body("Injected server error (stub)", "server_error"), status_code=500)
+
+        messages = body.get("messages", [])
+        model = body.get("model", "gpt-4o")
+        tokens = tokenize(respond_to(messages))
+        finish_reason = "stop"
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+        if max_tokens and len(tokens) > max_tokens:
+            tokens = tokens[:max_tokens]
+            finish_reason = "length"
+        stats["completion_tokens"] += len(tokens)
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        usage = {"prompt_tokens": count_tokens(messages), "completion_tokens": len(tokens)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        delay = 1 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+
+        if body.get("stream"):
+            stats["streamed"] += 1
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+            def chunk(delta: Optional[dict], finish: Optional[str] = None, **extra) -> str:
+                choices = [{"index": 0, "delta": delta, "finish_reason": finish}] if delta is not None else []
+                payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                           "model": model, "choices": choices, **extra}
+                return f"data: {json.dumps(payload)}\n\n"
+
+            async def events():
+                await asyncio.sleep(config.latency.sample())
+                yield chunk({"role": "assistant", "content": ""})
+                for token in tokens:
+                    if delay:
+                        await asyncio.sleep(delay)
+                    yield chunk({"content": token})
+                yield chunk({}, finish_reason)
+                if include_usage:
+                    yield chunk(None, usage=usage)
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(config.latency.sample() + delay * len(tokens))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)},
+                         "finish_reason": finish_reason, "logprobs": None}],
+            "usage": usage,
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", default=os.getenv("STUB_LATENCY", "fixed:0"),
+                        help="fixed:MS, uniform:LOW:HIGH, normal:MEAN:STDDEV or lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--tokens-per-second", type=float, default=float(os.getenv("STUB_TOKENS_PER_SECOND", 0)))
+    parser.add_argument("--error-rate", type=float, default=float(os.getenv("STUB_ERROR_RATE", 0)))
+    parser.add_argument("--rate-limit-rate", type=float, default=float(os.getenv("STUB_RATE_LIMIT_RATE", 0)))
+    parser.add_argument("--retry-after", type=float, default=float(os.getenv("STUB_RETRY_AFTER", 1)))
+    parser.add_argument("--responses", default=os.getenv("STUB_RESPONSES"),
+                        help='JSON file: [{"match": "regex", "content": "..."}]')
+    args = parser.parse_args()
+
+    import uvicorn
+    config = StubConfig(args.latency, args.tokens_per_second, args.error_rate,
+                        args.rate_limit_rate, args.retry_after, args.responses)
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
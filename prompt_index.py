@@ -0,0 +1,259 @@
+"""
+Near-duplicate detection for agent prompts
+MinHash signatures over prompt and code tokens with an LSH band index, refreshed incrementally from agents/
+"""
+import ast
+import builtins
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from agent_store import split_header
+
+DATA_DIR = Path(os.getenv("OPERATOR_DATA_DIR", "data"))
+# Similarity at which the deploy flow offers an existing agent instead of generating a new one
+REUSE_THRESHOLD = float(os.getenv("PROMPT_REUSE_THRESHOLD", 0.6))
+
+INDEX_VERSION = 2
+REFRESH_INTERVAL = 1.0
+
+NUM_PERM = 128
+# 64 bands of 2 rows: pairs down to ~0.3 Jaccard almost always share a bucket; candidates are
+# re-ranked by exact Jaccard on their token sets
+BANDS = 64
+ROWS = NUM_PERM // BANDS
+PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+PERMUTATIONS = [(_rng.randrange(1, PRIME), _rng.randrange(0, PRIME)) for _ in range(NUM_PERM)]
+
+# Words every prompt shares; they would make unrelated agents look alike
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "for", "to", "in", "on", "with", "that", "which", "from",
+    "by", "into", "me", "my", "please", "create", "build", "make", "write", "generate", "new",
+    "agent", "agents", "bot", "python", "script", "py",
+}
+
+# Names nearly every agent uses; as code tokens they say nothing about what the agent does
+CODE_STOPWORDS = {name for name in dir(builtins) if not name.startswith("_")} | {"self", "cls", "main"}
+
+CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> Set[str]:
+    """Lower-cased content words, with CamelCase and snake_case split and plurals folded"""
+    words = WORD.findall(CAMEL.sub(" ", text).lower())
+    tokens = set()
+    for word in words:
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.add(word)
+    return tokens
+
+
+def minhash(tokens: Set[str]) -> List[int]:
+    hashes = [int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "little")
+              for t in tokens]
+    return [min((a * h + b) % PRIME for h in hashes) for a, b in PERMUTATIONS]
+
+
+def band_keys(signature: List[int]) -> List[tuple]:
+    return [(band, *signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def code_tokens(body: str) -> Set[str]:
+    """Tokens of the identifiers that say what agent code does: imports, definitions and call targets"""
+    try:
+        tree = ast.parse(body)
+    except SyntaxError:
+        return set()
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(part for alias in node.names for part in alias.name.split("."))
+        elif isinstance(node, ast.ImportFrom):
+            names.extend((node.module or "").split("."))
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.append(node.name)
+        elif isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Name):
+                names.append(node.func.id)
+            elif isinstance(node.func, ast.Attribute):
+                names.append(node.func.attr)
+    return tokenize(" ".join(name for name in names if name not in CODE_STOPWORDS and not name.startswith("__")))
+
+
+def describe_source(source: str) -> tuple:
+    """(prompt, description text) for an agent file
+
+    Generated agents carry their prompt in the deploy header; hand-written ones are
+    described by their module docstring and class names.
+    """
+    header, body = split_header(source)
+    if header:
+        return header["prompt"], header["prompt"]
+    try:
+        tree = ast.parse(body)
+    except SyntaxError:
+        return None, ""
+    parts = [(ast.get_docstring(tree) or "").split("\n\n")[0]]
+    parts.extend(node.name for node in tree.body if isinstance(node, ast.ClassDef))
+    return None, " ".join(parts)
+
+
+class PromptIndex:
+    """Top-k similar agents for a prompt, via MinHash/LSH over prompts and agent descriptions and over agent code
+
+    Prompt and code tokens get a signature each, both banded into the same buckets, so an agent
+    is found by what it was asked to do or by what its code calls.
+    """
+
+    def __init__(self, agents_folder="agents", index_file=None):
+        self.agents_folder = Path(agents_folder)
+        self.index_file = Path(index_file) if index_file else DATA_DIR / "prompt_index.json"
+        self.entries: Dict[str, dict] = {}
+        self.buckets: Dict[tuple, Set[str]] = {}
+        self.last_refresh = 0.0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("num_perm") == NUM_PERM:
+                self.entries = data.get("entries", {})
+        except (OSError, ValueError):
+            self.entries = {}
+        self.buckets = {}
+        for name, entry in self.entries.items():
+            self._add_buckets(name, entry)
+
+    def save(self):
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "num_perm": NUM_PERM, "entries": self.entries}, f)
+        os.replace(tmp, self.index_file)
+
+    @staticmethod
+    def _band_keys(entry: dict) -> Set[tuple]:
+        keys = set()
+        for signature in (entry["signature"], entry["code_signature"]):
+            if signature:
+                keys.update(band_keys(signature))
+        return keys
+
+    def _add_buckets(self, name: str, entry: dict):
+        for key in self._band_keys(entry):
+            self.buckets.setdefault(key, set()).add(name)
+
+    def _remove(self, name: str):
+        entry = self.entries.pop(name, None)
+        if entry:
+            for key in self._band_keys(entry):
+                bucket = self.buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(name)
+                    if not bucket:
+                        del self.buckets[key]
+
+    def _put(self, name: str, prompt: Optional[str], text: str, source: str, **meta):
+        self._remove(name)
+        tokens = tokenize(text)
+        code = code_tokens(split_header(source)[1])
+        entry = {"prompt": prompt, "tokens": sorted(tokens),
+                 "signature": minhash(tokens) if tokens else None,
+                 "code_tokens": sorted(code), "code_signature": minhash(code) if code else None, **meta}
+        self.entries[name] = entry
+        self._add_buckets(name, entry)
+
+    def add(self, name: str, prompt: str, source: str):
+        """Index a freshly deployed agent without waiting for the next folder scan"""
+        path = self.agents_folder / name
+        meta = {"hash": hashlib.sha256(source.encode("utf-8")).hexdigest(), "mtime": None, "size": None}
+        if path.exists():
+            stat = path.stat()
+            meta.update(mtime=stat.st_mtime, size=stat.st_size)
+        with self._lock:
+            self._put(name, prompt, prompt, source, **meta)
+            self.save()
+
+    def _index_file(self, path: Path, stat: os.stat_result) -> bool:
+        previous = self.entries.get(path.name)
+        if previous and previous["mtime"] == stat.st_mtime and previous["size"] == stat.st_size:
+            return False
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if previous and previous["hash"] == digest:
+            previous.update(mtime=stat.st_mtime, size=stat.st_size)
+            return True
+        source = data.decode("utf-8", errors="replace")
+        prompt, text = describe_source(source)
+        self._put(path.name, prompt, text, source, hash=digest, mtime=stat.st_mtime, size=stat.st_size)
+        return True
+
+    def refresh(self, force: bool = False) -> bool:
+        """Re-index agent files that changed since the last scan"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self.last_refresh < REFRESH_INTERVAL:
+                return False
+            self.last_refresh = now
+
+            changed = False
+            seen = set()
+            if self.agents_folder.exists():
+                with os.scandir(self.agents_folder) as it:
+                    for item in it:
+                        if not item.name.endswith(".py") or item.name == "__init__.py" or not item.is_file():
+                            continue
+                        seen.add(item.name)
+                        changed |= self._index_file(Path(item.path), item.stat())
+            for name in set(self.entries) - seen:
+                self._remove(name)
+                changed = True
+            if changed:
+                self.save()
+            return changed
+
+    def similar(self, prompt: str, k: int = 5, min_score: float = 0.0) -> List[dict]:
+        """Up to k indexed agents most similar to prompt, best first"""
+        self.refresh()
+        tokens = tokenize(prompt)
+        if not tokens:
+            return []
+        signature = minhash(tokens)
+        with self._lock:
+            candidates = set()
+            for key in band_keys(signature):
+                candidates |= self.buckets.get(key, set())
+            scored = []
+            for name in candidates:
+                entry = self.entries[name]
+                # Best of the two views: the prompt or description, and the code
+                score = max(jaccard(tokens, set(entry["tokens"])), jaccard(tokens, set(entry["code_tokens"])))
+                if score > 0 and score >= min_score:
+                    scored.append({"agent": name, "file": f"{self.agents_folder.name}/{name}",
+                                   "prompt": entry["prompt"], "score": round(score, 3)})
+        scored.sort(key=lambda item: (-item["score"], item["agent"]))
+        return scored[:k]
+
+    def stats(self) -> dict:
+        return {"agents": len(self.entries), "buckets": len(self.buckets),
+                "num_perm": NUM_PERM, "bands": BANDS, "reuse_threshold": REUSE_THRESHOLD}
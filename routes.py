@@ -1,16 +1,93 @@
-from fastapi import APIRouter, Query, HTTPException, Body
-from pydantic import BaseModel
+from fastapi import APIRouter, Query, HTTPException, Body, Header, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
 from typing import List, Optional
 from datetime import datetime
 import os
 import re
 import json
+import time
+import uuid
+import asyncio
+import hashlib
+import tarfile
+from pathlib import Path
 from openai import OpenAI
+from validation import AgentValidator, check_static, extract_code
+from agent_index import AgentIndex
+from prompt_index import PromptIndex, REUSE_THRESHOLD
+from model_router import ModelRouter
+from instrumentation import span, stages
+import tracing
+import metrics
+from blueprints.fallback import render as fallback_agent_code, match as fallback_match
+import blueprints
+from agent_store import AgentStore
+import agent_archive
+from agent_runs import AgentRunner
+from agent_envs import AgentEnvironments
+from scheduler import AgentScheduler, Schedule
+from events import EventHub
+from agent_health import HealthMonitor
+from run_queue import FairRunQueue, PRIORITIES
+from run_store import RunStore
+from log_analytics import LogAnalytics
+from log_rotation import LogRotationService
+from log_pipeline import get_logger, level_number
 
 router = APIRouter()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Deployment log; shares its queue listener and sinks with GitPushAgent
+deploy_logger = get_logger("deploy")
+
+# Initialize OpenAI client; OPENAI_BASE_URL can point it at openai_stub.py for offline load tests
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=os.getenv("OPENAI_BASE_URL") or None)
+
+# Shared virtualenvs for agents importing packages the host lacks, installed from a local wheel cache
+agent_environments = AgentEnvironments() if os.getenv("AGENT_ENVIRONMENTS", "1") != "0" else None
+
+# Validation pipeline for generated code (process pool + hash-keyed cache); imports the host lacks
+# are left to the agent's environment when there is one
+agent_validator = AgentValidator(defer_imports=agent_environments is not None)
+
+# AST index over agents/ for search and dependency queries
+agent_index = AgentIndex()
+
+# Picks model tier and max_tokens per prompt; tracks latency, tokens and pass rate per route
+model_router = ModelRouter()
+
+# MinHash/LSH index of past prompts, consulted before spending tokens on generation
+prompt_index = PromptIndex()
+
+# Content-addressed store for agent source
+agent_store = AgentStore()
+
+# Deployment progress events, fanned out to every connected console
+event_hub = EventHub()
+
+# Agent execution layer, the fair-share queue in front of it, and the recurring-run scheduler
+agent_runner = AgentRunner(store=agent_store, environments=agent_environments)
+run_queue = FairRunQueue(agent_runner)
+agent_scheduler = AgentScheduler(run_queue)
+
+# Compressed history of finished runs, written off the event loop
+run_store = RunStore()
+
+def store_finished_run(run):
+    asyncio.get_running_loop().run_in_executor(None, run_store.append, run.record())
+
+agent_runner.on_finish.append(store_finished_run)
+
+# Incremental analytics over logs/deployments.log and logs/git_push.log
+log_analytics = LogAnalytics()
+
+# Size/age rotation of the plain-text logs into block-indexed compressed archives;
+# analytics reads each log's tail before it is moved aside
+log_rotation = LogRotationService()
+log_rotation.before_rotate.append(lambda path: log_analytics.refresh())
+
+# /proc resource sampling for running agent processes
+health_monitor = HealthMonitor(agent_runner)
 
 # Utility functions
 def create_slug(text: str) -> str:
@@ -19,20 +96,14 @@ def create_slug(text: str) -> str:
     slug = re.sub(r'[-\s]+', '-', slug)
     return slug.strip('-')[:50]
 
-def log_deployment(message: str, level: str = "info"):
-    """Log deployment actions to logs/deployments.log"""
-    timestamp = datetime.now().isoformat()
-    log_entry = f"[{timestamp}] {level.upper()}: {message}\n"
-    
-    # Ensure logs directory exists
-    os.makedirs("logs", exist_ok=True)
-    
-    # Append to deployment log
-    with open("logs/deployments.log", "a") as f:
-        f.write(log_entry)
+def log_deployment(message: str, level: str = "info", **fields):
+    """Log deployment actions to logs/deployments.log through the shared queue pipeline"""
+    with span("log"):
+        deploy_logger.log(level_number(level), message, extra=fields)
 
-def generate_agent_code(prompt: str) -> str:
-    """Use OpenAI GPT-4 to generate Python agent code from natural language"""
+def generate_agent_code(prompt: str, decision: Optional[dict] = None) -> str:
+    """Use OpenAI to generate Python agent code from natural language, on the route chosen for the prompt"""
+    decision = decision or model_router.choose(prompt)
     system_prompt = """You are an expert Python developer creating autonomous AI agents. 
 Generate clean, production-ready Python code based on the user's natural language description.
 
@@ -46,79 +117,45 @@ Requirements:
 
 Return only the Python code, no explanations."""
 
+    started = time.perf_counter()
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Create a Python agent for: {prompt}"}
-            ],
-            max_tokens=2000,
-            temperature=0.7
-        )
+        with span("openai"):
+            response = client.chat.completions.create(
+                model=decision["model"],
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": f"Create a Python agent for: {prompt}"}
+                ],
+                max_tokens=decision["max_tokens"],
+                temperature=decision["temperature"]
+            )
         
         if response.choices and response.choices[0].message.content:
+            usage = response.usage
+            elapsed = time.perf_counter() - started
+            metrics.openai_duration.observe(elapsed, route=decision["route"])
+            if usage:
+                metrics.openai_tokens.inc(usage.prompt_tokens, route=decision["route"], kind="prompt")
+                metrics.openai_tokens.inc(usage.completion_tokens, route=decision["route"], kind="completion")
+            model_router.record_generation(
+                decision["route"], elapsed,
+                prompt_tokens=usage.prompt_tokens if usage else 0,
+                completion_tokens=usage.completion_tokens if usage else 0,
+                truncated=response.choices[0].finish_reason == "length"
+            )
             return response.choices[0].message.content.strip()
         else:
             raise Exception("No response content received from OpenAI")
     
     except Exception as e:
+        model_router.record_generation(decision["route"], time.perf_counter() - started, error=True)
+        metrics.openai_errors.inc(route=decision["route"])
         # Log the OpenAI error for debugging
         log_deployment(f"OpenAI API error: {str(e)}", "error")
         
         # Generate a basic template agent when OpenAI fails
-        template_code = f'''#!/usr/bin/env python3
-"""
-Agent: {prompt}
-Generated as fallback template when OpenAI API unavailable
-"""
-
-import os
-import sys
-import time
-from datetime import datetime
-
-class Agent:
-    """Autonomous agent for: {prompt}"""
-    
-    def __init__(self):
-        self.name = "{prompt}"
-        self.status = "initialized"
-        self.created_at = datetime.now()
-    
-    def run(self):
-        """Main agent execution loop"""
-        print(f"Agent {{self.name}} starting...")
-        self.status = "running"
-        
-        # TODO: Implement agent logic here
-        print(f"Executing: {{self.name}}")
-        
-        self.status = "completed"
-        print(f"Agent {{self.name}} completed successfully")
-    
-    def stop(self):
-        """Stop agent execution"""
-        self.status = "stopped"
-        print(f"Agent {{self.name}} stopped")
-
-def main():
-    """Entry point for agent execution"""
-    agent = Agent()
-    try:
-        agent.run()
-    except KeyboardInterrupt:
-        agent.stop()
-    except Exception as e:
-        print(f"Agent error: {{e}}")
-        agent.status = "error"
-
-if __name__ == "__main__":
-    main()
-'''
-        
         log_deployment(f"Using fallback template for prompt: {prompt}", "warning")
-        return template_code
+        return fallback_agent_code(prompt)
 
 # Data models
 class Agent(BaseModel):
@@ -172,6 +209,222 @@ async def get_stats():
 async def get_agents():
     return sample_agents
 
+ENTRY_POINTS = {"main", "run", "stop"}
+
+@router.get("/api/agents/index")
+async def get_agent_index():
+    """Summary of the static-analysis index: file count, parse errors, import usage"""
+    # Refreshes first: a directory scan, AST parses and an index save, kept off the event loop
+    return await asyncio.to_thread(agent_index.summary)
+
+@router.get("/api/agents/search")
+async def search_agents(
+    imports: Optional[str] = Query(None, description="Module the agent imports, e.g. requests"),
+    defines: Optional[str] = Query(None, description="Class or top-level function the agent defines"),
+    has: Optional[List[str]] = Query(None, description="Entry points that must exist: main, run, stop"),
+    lacks: Optional[List[str]] = Query(None, description="Entry points that must be missing: main, run, stop")
+):
+    """Query agent code by imports, definitions and entry points"""
+    for point in (has or []) + (lacks or []):
+        if point not in ENTRY_POINTS:
+            raise HTTPException(status_code=400, detail=f"Unknown entry point '{point}', expected one of {sorted(ENTRY_POINTS)}")
+    
+    results = await asyncio.to_thread(agent_index.search, imports=imports, defines=defines, has=has, lacks=lacks)
+    return {"count": len(results), "agents": results}
+
+@router.get("/api/agents/similar")
+async def similar_agents(
+    prompt: str = Query(..., description="Prompt to compare against existing agents"),
+    k: int = Query(5, ge=1, le=50, description="Agents to return")
+):
+    """Existing agents whose prompts are most similar, with Jaccard scores"""
+    results = await asyncio.to_thread(prompt_index.similar, prompt, k)
+    return {"threshold": REUSE_THRESHOLD, "agents": results}
+
+@router.get("/api/agents/store")
+async def get_agent_store_stats():
+    """Dedup statistics for stored agent source; picks up agent files not yet stored"""
+    ingested = await asyncio.to_thread(agent_store.ingest_folder)
+    return dict(await asyncio.to_thread(agent_store.stats), ingested=ingested)
+
+def agent_file_name(agent: str) -> str:
+    """agents/ file name for a slug or file name; rejects anything path-like"""
+    name = agent if agent.endswith(".py") else f"{agent}.py"
+    if not re.fullmatch(r"[\w.-]+\.py", name) or name.startswith("."):
+        raise HTTPException(status_code=400, detail=f"Invalid agent name '{agent}'")
+    return name
+
+@router.get("/api/agents/{agent}/versions")
+async def get_agent_versions(agent: str, diffs: bool = Query(False, description="Include a unified diff per version")):
+    """Version history of an agent file, newest first, reconstructed from stored deltas"""
+    name = agent_file_name(agent)
+    versions = await asyncio.to_thread(agent_store.versions.list, name)
+    if not versions:
+        raise HTTPException(status_code=404, detail=f"No versions of {name}")
+    if diffs:
+        for version in versions:
+            version["diff"] = await asyncio.to_thread(agent_store.versions.diff, name, version["version"])
+    return {"agent": name, "versions": versions[::-1]}
+
+@router.get("/api/agents/{agent}/versions/{version}")
+async def get_agent_version(
+    agent: str,
+    version: int,
+    against: Optional[int] = Query(None, ge=0, description="Version to diff against (default: the previous one, 0 = empty)")
+):
+    """Source of one version and its diff"""
+    name = agent_file_name(agent)
+    source = await asyncio.to_thread(agent_store.versions.get, name, version)
+    if source is None:
+        raise HTTPException(status_code=404, detail=f"{name} has no version {version}")
+    diff = await asyncio.to_thread(agent_store.versions.diff, name, version, against)
+    if diff is None:
+        raise HTTPException(status_code=404, detail=f"{name} has no version {against}")
+    return {"agent": name, "version": version, "against": version - 1 if against is None else against,
+            "source": source, "diff": diff}
+
+@router.get("/api/agents/{agent}/environment")
+async def get_agent_environment(agent: str):
+    """Third-party imports of an agent, their distributions and the shared environment it runs in"""
+    if agent_environments is None:
+        raise HTTPException(status_code=404, detail="Agent environments are disabled")
+    try:
+        path = agent_runner.resolve(agent_file_name(agent))
+        plan = await asyncio.to_thread(agent_environments.plan_file, path)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except SyntaxError as e:
+        raise HTTPException(status_code=422, detail=f"SyntaxError: {e.msg} (line {e.lineno})")
+    key = plan["key"]
+    status = "host" if key is None else "ready" if agent_environments.is_ready(key) else \
+        "failed" if key in agent_environments.failures else "missing"
+    return dict(plan, agent=path.name, status=status,
+                environment=agent_environments.describe(key) if key else None)
+
+@router.post("/api/agents/{agent}/environment")
+async def build_agent_environment(agent: str):
+    """Build (or reuse) an agent's environment now instead of on its first run"""
+    if agent_environments is None:
+        raise HTTPException(status_code=404, detail="Agent environments are disabled")
+    try:
+        path = agent_runner.resolve(agent_file_name(agent))
+        python, plan = await asyncio.to_thread(agent_environments.python_for, path)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except SyntaxError as e:
+        raise HTTPException(status_code=422, detail=f"SyntaxError: {e.msg} (line {e.lineno})")
+    except RuntimeError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return dict(plan, agent=path.name, python=python,
+                environment=agent_environments.describe(plan["key"]) if plan["key"] else None)
+
+@router.get("/api/environments")
+async def get_environments():
+    """Shared agent environments, the wheel cache and how runs were served"""
+    if agent_environments is None:
+        return {"enabled": False}
+    return dict(await asyncio.to_thread(agent_environments.stats), enabled=True)
+
+@router.get("/api/agents/export")
+async def export_agents(
+    format: str = Query("tar.gz", description="tar, tar.gz or tar.zst"),
+    agents: Optional[str] = Query(None, description="Comma-separated agent slugs (default: all)")
+):
+    """Stream an archive of agent files plus registry metadata, rendered one agent at a time"""
+    try:
+        agent_archive.check_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await asyncio.to_thread(agent_store.ingest_folder)
+    names = None
+    if agents:
+        names = [agent_file_name(agent.strip()) for agent in agents.split(",") if agent.strip()]
+        missing = [name for name in names if name not in agent_store.manifest]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Unknown agents: {', '.join(missing)}")
+    registry = [agent.model_dump(mode="json") for agent in sample_agents]
+    _, suffix, media_type = agent_archive.FORMATS[format]
+    filename = f"operator-agents-{datetime.now():%Y%m%dT%H%M%S}{suffix}"
+    # A sync generator: Starlette iterates it on the threadpool, off the event loop
+    return StreamingResponse(agent_archive.export_archive(agent_store, names, format, registry),
+                             media_type=media_type,
+                             headers={"content-disposition": f'attachment; filename="{filename}"'})
+
+@router.post("/api/agents/import")
+async def import_agents(request: Request):
+    """Ingest an agent archive while it uploads; new and changed agents go out in one commit
+
+    Agents identical to the stored version are skipped and sources failing the static
+    validation checks are rejected.
+    """
+    import_id = uuid.uuid4().hex[:12]
+    # Files on disk but not yet in the store must count as existing for dedup
+    await asyncio.to_thread(agent_store.ingest_folder)
+    reader = agent_archive.ChunkReader()
+
+    def check(source: str) -> List[str]:
+        return check_static(source, agent_validator.forbidden)["errors"]
+
+    def check_registry(entry: dict) -> List[str]:
+        # Ids are reassigned on import
+        try:
+            Agent(**dict(entry, id=0))
+        except (ValidationError, TypeError) as e:
+            return [str(e).replace("\n", " ")]
+        return []
+
+    worker = asyncio.ensure_future(asyncio.to_thread(
+        agent_archive.import_archive, agent_store, reader, check, {"import_id": import_id}, check_registry))
+    try:
+        async for chunk in request.stream():
+            # Stops early if the parser gave up (bad archive) and closed the reader
+            if chunk and not await asyncio.to_thread(reader.feed, chunk):
+                break
+    finally:
+        await asyncio.to_thread(reader.feed, None)
+    try:
+        result = await worker
+    except (tarfile.TarError, ValueError, EOFError, OSError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid agent archive: {e}")
+
+    changed = result["added"] + result["updated"]
+    if changed:
+        def publish():
+            # Claimed first so GitPushAgent does not commit the files one by one as they appear
+            if git_push_agent is not None:
+                git_push_agent.claim(changed)
+            for name in changed:
+                agent_store.materialize(name)
+            agent_index.refresh(force=True)
+            prompt_index.refresh(force=True)
+        await asyncio.to_thread(publish)
+
+        metadata = result.pop("metadata") or {}
+        known = {agent.name for agent in sample_agents}
+        for entry in metadata.get("registry", []):
+            if entry.get("name") not in known:
+                try:
+                    agent = Agent(**dict(entry, id=max((agent.id for agent in sample_agents), default=0) + 1))
+                except (ValidationError, TypeError):
+                    continue
+                sample_agents.append(agent)
+                known.add(agent.name)
+
+        if git_push_agent is not None:
+            # Submitted to the executor now; the response does not wait for the push
+            asyncio.get_running_loop().run_in_executor(
+                None, git_push_agent.commit_batch, changed, f"Import {len(changed)} agents ({import_id})")
+    else:
+        result.pop("metadata", None)
+    log_deployment(f"Imported agents ({import_id}): {len(result['added'])} added, {len(result['updated'])} updated, "
+                   f"{len(result['unchanged'])} unchanged, {len(result['rejected'])} rejected", "info")
+    return dict(result, import_id=import_id, commit="queued" if changed and git_push_agent is not None else None)
+
+@router.get("/api/agents/health")
+async def get_agents_health():
+    """Latest resource sample of every running agent process, heaviest first"""
+    return {"monitoring": health_monitor.available, "processes": health_monitor.overview()}
+
 @router.get("/api/agents/{agent_id}", response_model=Agent)
 async def get_agent(agent_id: int):
     for agent in sample_agents:
@@ -179,8 +432,218 @@ async def get_agent(agent_id: int):
             return agent
     return {"error": "Agent not found"}
 
+def submitter_for(api_key: Optional[str]) -> str:
+    """Fair-share identity of a caller; keys are fingerprinted so metrics never expose them"""
+    if not api_key:
+        return "anonymous"
+    return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:8]
+
+@router.post("/api/agents/{agent}/runs")
+async def start_agent_run(
+    agent: str,
+    priority: str = Query("interactive", description="interactive or batch"),
+    x_api_key: Optional[str] = Header(None)
+):
+    """Queue a run of an agent file (by slug) and return its run record"""
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Unknown priority '{priority}', expected one of {list(PRIORITIES)}")
+    try:
+        run = run_queue.submit(agent, submitter=submitter_for(x_api_key), priority=priority)
+    except (FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return run.to_dict()
+
+@router.get("/api/runs/queue")
+async def get_run_queue():
+    """Worker usage, queue depth and queue-time percentiles of the fair-share run queue"""
+    return run_queue.metrics()
+
+@router.get("/api/agents/{agent}/runs")
+async def get_agent_runs(
+    agent: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=200),
+    include_output: bool = Query(False, description="Include captured stdout/stderr lines")
+):
+    """Page through an agent's finished runs, newest first"""
+    # Runs are keyed by the file's stem; accept the file name too
+    agent = Path(agent).stem
+    try:
+        return await asyncio.to_thread(run_store.page, agent, offset, limit, include_output)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/api/agents/{agent}/runs/{run_id}")
+async def get_agent_run(agent: str, run_id: str, tail: int = Query(100, ge=0, description="Output lines to include")):
+    agent = Path(agent).stem
+    run = agent_runner.get(run_id)
+    if run is not None and run.agent == agent:
+        return dict(run.to_dict(), output=run.output.tail(tail))
+    
+    # Older runs are only in the history store
+    try:
+        record = await asyncio.to_thread(run_store.get, agent, run_id)
+    except ValueError:
+        record = None
+    if record is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    record["output"] = [entry["line"] for entry in record.get("output", [])][-tail:] if tail else []
+    return record
+
+@router.get("/api/agents/{agent}/health")
+async def get_agent_health(agent: str, limit: int = Query(60, ge=1, description="Samples to return")):
+    """CPU, RSS, open file descriptors and threads sampled from /proc for an agent's processes"""
+    return health_monitor.health(agent, limit=limit)
+
+@router.websocket("/api/agents/{agent}/runs/{run_id}/stream")
+async def stream_agent_run(websocket: WebSocket, agent: str, run_id: str, replay: int = 100):
+    """
+    Stream a run's stdout/stderr lines. Late joiners get the last `replay` lines;
+    clients that fall behind the ring buffer receive a "dropped" message and skip ahead.
+    """
+    run = agent_runner.get(run_id)
+    if run is None or run.agent != Path(agent).stem:
+        await websocket.close(code=4404, reason="Run not found")
+        return
+    
+    await websocket.accept()
+    try:
+        await websocket.send_json({"type": "run", **run.to_dict()})
+        async for message in run.output.subscribe(replay=replay):
+            await websocket.send_json(message)
+        await websocket.send_json({"type": "status", **run.to_dict()})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+class ScheduleRequest(BaseModel):
+    agent: str
+    cron: Optional[str] = None
+    interval_seconds: Optional[float] = None
+    jitter: float = 0.0
+    misfire_grace: float = 60.0
+    misfire_policy: str = "run_once"
+    max_concurrent: int = 1
+
+@router.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of request, deploy, OpenAI, GitPushAgent and process metrics"""
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@router.get("/api/timings")
+async def get_stage_timings():
+    """Per-stage latency histograms (deploy stages, OpenAI, log writes, git ops, HTTP routes)"""
+    return stages.summary()
+
+@router.get("/api/traces")
+async def list_traces(limit: int = Query(20, ge=1, le=200)):
+    """Most recent traces held in memory, newest first"""
+    return {"traces": tracing.store.recent(limit)}
+
+@router.get("/api/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Waterfall of one deploy: request stages, then GitPushAgent's commit and push spans"""
+    trace = await asyncio.to_thread(tracing.view, trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    return trace
+
+@router.get("/api/blueprints")
+async def list_blueprints(prompt: Optional[str] = Query(None, description="Show which blueprint this prompt would use")):
+    """Agent blueprints with their typed parameters, and optionally the match for a prompt"""
+    result = {"blueprints": [blueprint.describe() for blueprint in blueprints.BLUEPRINTS]}
+    if prompt is not None:
+        found = blueprints.match_prompt(prompt)
+        result["match"] = found.describe() if found else None
+    return result
+
+@router.get("/api/models/routes")
+async def get_model_routes():
+    """Per-route model, current max_tokens budget, latency, token usage and validation pass rate"""
+    return model_router.stats()
+
+@router.get("/api/logs/analytics")
+async def get_log_analytics(
+    minutes: int = Query(60, ge=1, le=10080, description="Per-minute level counts to return"),
+    top: int = Query(10, ge=1, le=100, description="Error clusters and failing prompts to return")
+):
+    """Level counts per minute, error clusters, deploy-to-push latency and top failing prompts"""
+    return await asyncio.to_thread(log_analytics.summary, minutes, top)
+
+@router.get("/api/logs/history")
+async def get_log_history(
+    log: str = Query("deployments.log", description="deployments.log or git_push.log"),
+    start: Optional[str] = Query(None, description="ISO timestamp lower bound"),
+    end: Optional[str] = Query(None, description="ISO timestamp upper bound"),
+    limit: int = Query(1000, ge=1, le=100000)
+):
+    """Log lines in a time range, decompressing only the archived blocks that overlap it"""
+    rotator = log_rotation.rotators.get(log)
+    if rotator is None:
+        raise HTTPException(status_code=404, detail=f"Unknown log '{log}'")
+    lines = await asyncio.to_thread(lambda: list(rotator.query(start, end, limit)))
+    return {"log": log, "start": start, "end": end, "count": len(lines), "lines": lines}
+
+@router.get("/api/schedules")
+async def get_schedules():
+    return [s.to_dict() for s in agent_scheduler.schedules.values()]
+
+@router.post("/api/schedules")
+async def create_schedule(request: ScheduleRequest):
+    """Run an agent on a cron expression or a fixed interval"""
+    try:
+        agent_runner.resolve(request.agent)
+        schedule = Schedule.from_dict(request.model_dump())
+        agent_scheduler.add(schedule)
+    except (FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return schedule.to_dict()
+
+@router.delete("/api/schedules/{schedule_id}")
+async def delete_schedule(schedule_id: str):
+    if not agent_scheduler.remove(schedule_id):
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    return {"status": "deleted", "schedule_id": schedule_id}
+
+@router.websocket("/ws")
+async def deployment_events(websocket: WebSocket):
+    """Push deployment and GitPushAgent progress events to a console"""
+    await websocket.accept()
+    queue = event_hub.subscribe()
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=15)
+            except asyncio.TimeoutError:
+                message = '{"type": "ping"}'
+            await websocket.send_text(message)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        event_hub.unsubscribe(queue)
+
+@router.on_event("startup")
+async def start_scheduler():
+    event_hub.bind(asyncio.get_running_loop())
+    await asyncio.to_thread(run_store.apply_retention)
+    agent_scheduler.load()
+    agent_scheduler.start()
+    health_monitor.start()
+    log_rotation.start()
+
+@router.on_event("shutdown")
+async def stop_scheduler():
+    await agent_scheduler.stop()
+    await health_monitor.stop()
+    await log_rotation.stop()
+    agent_runner.shutdown()
+    await asyncio.to_thread(tracing.store.flush)
+    await asyncio.to_thread(model_router.flush)
+
 class DeployRequest(BaseModel):
     prompt: str
+    # Return an existing agent instead of generating when one is similar enough
+    reuse: bool = False
 
 class DeployResponse(BaseModel):
     status: str
@@ -190,11 +653,23 @@ class DeployResponse(BaseModel):
     slug: str
 
 @router.post("/api/deploy")
-async def deploy_agent(request: Optional[DeployRequest] = None, prompt: Optional[str] = Query(None, description="Natural language prompt for agent generation")):
+async def deploy_agent(
+    request: Optional[DeployRequest] = None,
+    prompt: Optional[str] = Query(None, description="Natural language prompt for agent generation"),
+    reuse: bool = Query(False, description="Reuse an existing agent above the similarity threshold")
+):
     """
     Deploy endpoint that accepts natural language input and converts it to Python agent code.
     Accepts both JSON body and query parameter ?prompt=
     """
+    # The deploy id doubles as the trace id; GitPushAgent's commit and push spans join it later
+    deploy_id = uuid.uuid4().hex[:12]
+    with tracing.trace_span("deploy", trace_id=deploy_id):
+        result = await _deploy_agent(deploy_id, request, prompt, reuse)
+    result["trace_id"] = deploy_id
+    return result
+
+async def _deploy_agent(deploy_id: str, request: Optional[DeployRequest], prompt: Optional[str], reuse: bool):
     try:
         # Get prompt from either JSON body or query parameter
         user_prompt = None
@@ -206,29 +681,96 @@ async def deploy_agent(request: Optional[DeployRequest] = None, prompt: Optional
         if not user_prompt:
             raise HTTPException(status_code=400, detail="Prompt is required via JSON body or ?prompt= query parameter")
         
-        # Log the deployment start
-        log_deployment(f"Starting deployment for prompt: '{user_prompt[:100]}'", "info")
-        
-        # Generate agent code using OpenAI GPT-4
-        log_deployment("Generating agent code with OpenAI GPT-4", "info")
-        agent_code = generate_agent_code(user_prompt)
-        
         # Create slug for filename
-        slug = create_slug(user_prompt)
+        with span("slug"):
+            slug = create_slug(user_prompt)
         if not slug:
             slug = f"agent-{len(sample_agents) + 1}"
+        agent_filename = f"agents/{slug}.py"
+        
+        # Log the deployment start
+        log_deployment(f"Starting deployment for prompt: '{user_prompt[:100]}'", "info", deploy_id=deploy_id)
+        event_hub.publish("prompt_received", deploy_id=deploy_id, slug=slug, prompt=user_prompt[:100])
+        
+        # Look for near-duplicates before spending tokens on generation
+        with span("similar"):
+            similar = await asyncio.to_thread(prompt_index.similar, user_prompt, 5)
+        match = similar[0] if similar and similar[0]["score"] >= REUSE_THRESHOLD else None
+        if match and (reuse or (request and request.reuse)):
+            log_deployment(f"Reusing {match['file']} (similarity {match['score']}) for prompt: '{user_prompt[:100]}'",
+                           "info", deploy_id=deploy_id, agent=match["agent"])
+            event_hub.publish("reused", deploy_id=deploy_id, slug=slug, agent_file=match["file"], score=match["score"])
+            metrics.deploys.inc(outcome="reused")
+            return {
+                "status": "reused",
+                "agent_id": None,
+                "message": f"Reused existing agent {match['file']} (similarity {match['score']})",
+                "agent_file": match["file"],
+                "slug": match["agent"][:-3],
+                "similar": similar
+            }
+        
+        # Common requests render from a blueprint without an API call
+        with span("blueprint"):
+            blueprint = blueprints.match_prompt(user_prompt)
+        if blueprint:
+            decision = {"route": "blueprint", "model": None, **blueprint.describe()}
+            log_deployment(f"Rendering agent from blueprint {blueprint.blueprint.id} "
+                           f"with {decision['params']}", "info", deploy_id=deploy_id)
+            event_hub.publish("generating", deploy_id=deploy_id, slug=slug, route="blueprint",
+                              blueprint=blueprint.blueprint.id)
+            agent_code = blueprint.render()
+        else:
+            # Generate agent code using OpenAI GPT-4 (off the event loop so progress keeps flowing)
+            decision = model_router.choose(user_prompt)
+            log_deployment(f"Generating agent code with {decision['model']} ({decision['route']} route, "
+                           f"max_tokens={decision['max_tokens']})", "info", deploy_id=deploy_id)
+            event_hub.publish("generating", deploy_id=deploy_id, slug=slug, route=decision["route"], model=decision["model"])
+            with span("generate"):
+                agent_code = extract_code(await asyncio.to_thread(generate_agent_code, user_prompt, decision))
+        
+        # Validate before anything touches disk; fall back to the template on failure
+        with span("validate"):
+            validation = await agent_validator.validate_async(agent_code)
+        if not blueprint and fallback_match(agent_code) is None:
+            # Only model output counts towards a route's pass rate, not templates
+            model_router.record_validation(decision["route"], validation["valid"])
+        if not validation["valid"]:
+            log_deployment(f"Generated code failed validation: {'; '.join(validation['errors'])}", "warning")
+            agent_code = fallback_agent_code(user_prompt)
+        log_deployment(f"Validation timings (ms): {validation['timings']}", "info")
+        event_hub.publish("validated", deploy_id=deploy_id, slug=slug,
+                          valid=validation["valid"], errors=validation["errors"])
         
         # Ensure agents directory exists
         os.makedirs("agents", exist_ok=True)
         
-        # Save agent code to file
-        agent_filename = f"agents/{slug}.py"
-        with open(agent_filename, "w") as f:
-            f.write(f"# Agent generated from prompt: {user_prompt}\n")
-            f.write(f"# Generated on: {datetime.now().isoformat()}\n\n")
-            f.write(agent_code)
+        # Save agent code to the deduplicated store and materialize it for GitPushAgent
+        agent_source = (
+            f"# Agent generated from prompt: {user_prompt}\n"
+            f"# Generated on: {datetime.now().isoformat()}\n\n"
+            f"{agent_code}"
+        )
+        # Registered before the file appears so GitPushAgent cannot pick it up untraced
+        tracing.hand_off(f"{slug}.py")
+        def write():
+            # Blob, version log and manifest writes; off the event loop like the other store calls
+            stored = agent_store.put(f"{slug}.py", agent_source, meta={"deploy_id": deploy_id})
+            agent_store.materialize(f"{slug}.py")
+            return stored
+        with span("write"):
+            stored = await asyncio.to_thread(write)
         
-        log_deployment(f"Agent code generated and saved to {agent_filename}", "success")
+        log_deployment(f"Agent code generated and saved to {agent_filename}", "success", deploy_id=deploy_id, agent=slug)
+        def index():
+            agent_index.update_file(agent_filename)
+            prompt_index.add(f"{slug}.py", user_prompt, agent_source)
+        with span("index"):
+            await asyncio.to_thread(index)
+        event_hub.publish("written", deploy_id=deploy_id, slug=slug, agent_file=agent_filename)
+        if agent_environments is not None:
+            # Installs whatever the agent needs now, so its first run starts without waiting
+            asyncio.get_running_loop().run_in_executor(None, agent_environments.prepare, agent_filename)
         
         # Create new agent ID (ensure it's always a valid integer)
         import time
@@ -250,7 +792,12 @@ async def deploy_agent(request: Optional[DeployRequest] = None, prompt: Optional
         )
         sample_agents.append(new_agent)
         
-        log_deployment(f"Agent {new_agent_id} successfully deployed as {slug}", "success")
+        log_deployment(f"Agent {new_agent_id} successfully deployed as {slug}", "success", deploy_id=deploy_id, agent=slug)
+        if fallback_match(agent_code) is not None:
+            metrics.deploys.inc(outcome="fallback")
+        else:
+            metrics.deploys.inc(outcome="blueprint" if blueprint else "openai")
+        event_hub.publish("deployed", deploy_id=deploy_id, slug=slug, agent_id=new_agent_id)
         
         # Return simple format for frontend compatibility
         return {
@@ -258,7 +805,18 @@ async def deploy_agent(request: Optional[DeployRequest] = None, prompt: Optional
             "agent_id": new_agent_id,
             "message": f"Agent successfully generated and deployed from prompt: '{user_prompt[:50]}...'",
             "agent_file": agent_filename,
-            "slug": slug
+            "slug": slug,
+            "version": stored["version"],
+            "similar": similar,
+            "reuse_available": match is not None,
+            "route": decision,
+            "validation": {
+                "valid": validation["valid"],
+                "errors": validation["errors"],
+                "deferred_imports": validation.get("deferred_imports", []),
+                "cached": validation["cached"],
+                "timings": validation["timings"]
+            }
         }
         
     except HTTPException:
@@ -266,6 +824,8 @@ async def deploy_agent(request: Optional[DeployRequest] = None, prompt: Optional
     except Exception as e:
         error_msg = f"Deployment failed: {str(e)}"
         log_deployment(error_msg, "error")
+        event_hub.publish("failed", deploy_id=deploy_id, error=error_msg)
+        metrics.deploys.inc(outcome="failed")
         raise HTTPException(status_code=500, detail=error_msg)
 
 # Also support /api/deployments endpoint (as mentioned by user)
@@ -277,7 +837,7 @@ async def create_deployment(request: DeployRequest):
     """
     try:
         # Use the existing deploy logic
-        result = await deploy_agent(request=request)
+        result = await deploy_agent(request=request, prompt=None, reuse=request.reuse)
         
         # Return simplified format as requested by user
         return {
@@ -293,6 +853,17 @@ async def create_deployment(request: DeployRequest):
 # Initialize GitPushAgent on startup
 git_push_agent = None
 
+def agents_on_disk():
+    with os.scandir("agents") as it:
+        count = sum(1 for item in it if item.name.endswith(".py") and item.name != "__init__.py")
+    return {(): count}
+
+metrics.registry.register(metrics.Gauge(
+    "operator_agents_on_disk", "Agent files in agents/", callback=agents_on_disk))
+metrics.registry.register(metrics.Gauge(
+    "operator_git_push_pending", "New agent files GitPushAgent has detected but not yet pushed",
+    callback=lambda: {(): git_push_agent.pending} if git_push_agent else {}))
+
 def initialize_git_push_agent():
     """Initialize and start the GitPushAgent"""
     global git_push_agent
@@ -313,7 +884,7 @@ def initialize_git_push_agent():
         spec.loader.exec_module(git_push_module)
         GitPushAgent = git_push_module.GitPushAgent
         
-        git_push_agent = GitPushAgent()
+        git_push_agent = GitPushAgent(on_event=event_hub.publish)
         git_push_agent.start()
         
         log_deployment("GitPushAgent initialized and started successfully", "info")
@@ -0,0 +1,171 @@
+"""
+Fair-share queue in front of agent execution
+Weighted fair queuing per submitter, interactive/batch priorities and per-agent/per-key concurrency caps
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from agent_runs import AgentRun
+
+PRIORITIES = ("interactive", "batch")
+
+MAX_WORKERS = int(os.getenv("AGENT_MAX_WORKERS", (os.cpu_count() or 1) * 2))
+MAX_PER_AGENT = int(os.getenv("AGENT_MAX_PER_AGENT", 2))
+MAX_PER_KEY = int(os.getenv("AGENT_MAX_PER_KEY", 4))
+# Worker slots batch runs may never take, so interactive runs start immediately
+INTERACTIVE_RESERVE = int(os.getenv("AGENT_INTERACTIVE_RESERVE", 1))
+
+# Queue-time samples kept per priority for percentiles
+QUEUE_TIME_SAMPLES = 1000
+# Smoothing for the per-agent run duration estimate used as the fair-queue cost
+DURATION_ALPHA = 0.3
+DEFAULT_COST = 1.0
+MIN_COST = 0.05
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 4)
+
+
+class FairRunQueue:
+    """Dispatches queued runs to an AgentRunner in weighted-fair order"""
+
+    def __init__(self, runner, max_workers: int = MAX_WORKERS, max_per_agent: int = MAX_PER_AGENT,
+                 max_per_key: int = MAX_PER_KEY, interactive_reserve: int = INTERACTIVE_RESERVE):
+        self.runner = runner
+        self.max_workers = max(1, max_workers)
+        self.max_per_agent = max(1, max_per_agent)
+        self.max_per_key = max(1, max_per_key)
+        self.interactive_reserve = min(max(0, interactive_reserve), self.max_workers - 1)
+        self.weights: Dict[str, float] = {}
+
+        self._heaps: Dict[str, List[tuple]] = {priority: [] for priority in PRIORITIES}
+        self._counter = itertools.count()
+        self._virtual_time = {priority: 0.0 for priority in PRIORITIES}
+        self._last_finish: Dict[tuple, float] = {}
+        self._avg_duration: Dict[str, float] = {}
+
+        self.running = 0
+        self.running_by_agent: Dict[str, int] = {}
+        self.running_by_key: Dict[str, int] = {}
+        self.queued_by_agent: Dict[str, int] = {}
+        self.queue_times = {priority: deque(maxlen=QUEUE_TIME_SAMPLES) for priority in PRIORITIES}
+        self.stats = {"submitted": 0, "started": 0, "failed_to_start": 0}
+
+    def set_weight(self, submitter: str, weight: float):
+        """Give a submitter a larger (or smaller) share of the workers"""
+        self.weights[submitter] = max(0.01, float(weight))
+
+    def cost(self, agent: str) -> float:
+        return max(MIN_COST, self._avg_duration.get(agent, DEFAULT_COST))
+
+    def submit(self, agent: str, submitter: str = "anonymous", priority: str = "interactive",
+               trigger: str = "manual") -> AgentRun:
+        """Queue a run; it starts as soon as fair share and caps allow"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {PRIORITIES}")
+        path = self.runner.resolve(agent)
+
+        run = AgentRun(path.stem, trigger)
+        run.status = "queued"
+        self.runner.track(run)
+
+        # Virtual finish tag: a submitter's runs are spaced by cost / weight
+        flow = (priority, submitter)
+        start_tag = max(self._virtual_time[priority], self._last_finish.get(flow, 0.0))
+        finish_tag = start_tag + self.cost(run.agent) / self.weights.get(submitter, 1.0)
+        self._last_finish[flow] = finish_tag
+
+        entry = (finish_tag, next(self._counter), run, submitter, priority, time.monotonic())
+        heapq.heappush(self._heaps[priority], entry)
+        self.queued_by_agent[run.agent] = self.queued_by_agent.get(run.agent, 0) + 1
+        self.stats["submitted"] += 1
+        self._dispatch()
+        return run
+
+    async def start_run(self, agent: str, trigger: str = "manual") -> AgentRun:
+        """Runner-compatible entry point used by the scheduler: background batch work"""
+        return self.submit(agent, submitter="scheduler", priority="batch", trigger=trigger)
+
+    def running_count(self, agent: str) -> int:
+        """Runs of an agent that are queued or executing"""
+        return self.running_by_agent.get(agent, 0) + self.queued_by_agent.get(agent, 0)
+
+    def _eligible(self, run: AgentRun, submitter: str) -> bool:
+        return (self.running_by_agent.get(run.agent, 0) < self.max_per_agent
+                and self.running_by_key.get(submitter, 0) < self.max_per_key)
+
+    def _pick(self) -> Optional[tuple]:
+        for priority in PRIORITIES:
+            if priority == "batch" and self.running >= self.max_workers - self.interactive_reserve:
+                continue
+            heap = self._heaps[priority]
+            skipped = []
+            chosen = None
+            while heap:
+                entry = heapq.heappop(heap)
+                if self._eligible(entry[2], entry[3]):
+                    chosen = entry
+                    break
+                skipped.append(entry)
+            for entry in skipped:
+                heapq.heappush(heap, entry)
+            if chosen is not None:
+                return chosen
+        return None
+
+    def _dispatch(self):
+        while self.running < self.max_workers:
+            entry = self._pick()
+            if entry is None:
+                return
+            finish_tag, _, run, submitter, priority, enqueued = entry
+            self._virtual_time[priority] = max(self._virtual_time[priority], finish_tag)
+            self.queue_times[priority].append(time.monotonic() - enqueued)
+            self.queued_by_agent[run.agent] -= 1
+            self.running += 1
+            self.running_by_agent[run.agent] = self.running_by_agent.get(run.agent, 0) + 1
+            self.running_by_key[submitter] = self.running_by_key.get(submitter, 0) + 1
+            asyncio.create_task(self._execute(run, submitter))
+
+    async def _execute(self, run: AgentRun, submitter: str):
+        try:
+            await self.runner.start_run(run.agent, run.trigger, run=run)
+            self.stats["started"] += 1
+            await run.done.wait()
+            if run.duration is not None:
+                previous = self._avg_duration.get(run.agent, run.duration)
+                self._avg_duration[run.agent] = previous + DURATION_ALPHA * (run.duration - previous)
+        except Exception as e:
+            self.stats["failed_to_start"] += 1
+            # Resolving the agent can fail before the runner tracks the run; it must still finish
+            self.runner.fail(run, f"failed to start: {e}")
+        finally:
+            self.running -= 1
+            self.running_by_agent[run.agent] -= 1
+            self.running_by_key[submitter] -= 1
+            self._dispatch()
+
+    def metrics(self) -> dict:
+        return {
+            "workers": {"max": self.max_workers, "busy": self.running,
+                        "interactive_reserve": self.interactive_reserve},
+            "caps": {"per_agent": self.max_per_agent, "per_key": self.max_per_key},
+            "queued": {priority: len(heap) for priority, heap in self._heaps.items()},
+            "queue_time_seconds": {
+                priority: {"p50": _percentile(list(times), 0.5), "p95": _percentile(list(times), 0.95),
+                           "samples": len(times)}
+                for priority, times in self.queue_times.items()
+            },
+            "running_by_key": {k: v for k, v in self.running_by_key.items() if v},
+            "running_by_agent": {k: v for k, v in self.running_by_agent.items() if v},
+            "stats": dict(self.stats),
+        }
@@ -0,0 +1,178 @@
+"""
+Run history store
+Compressed run results in append-only segment files with a fixed-width per-agent index for paging
+"""
+import json
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import List, Optional
+
+DATA_DIR = Path(os.getenv("OPERATOR_DATA_DIR", "data"))
+
+SEGMENT_SIZE = int(os.getenv("RUN_SEGMENT_BYTES", 8 * 1024 * 1024))
+RETENTION_DAYS = float(os.getenv("RUN_RETENTION_DAYS", 30))
+RETENTION_BYTES = int(os.getenv("RUN_RETENTION_BYTES", 512 * 1024 * 1024))
+
+# Segment record: length, crc32, then the zlib-compressed JSON payload
+RECORD_HEADER = struct.Struct("<II")
+# Index entry: segment id, offset, record length, finished-at timestamp, run id
+INDEX_ENTRY = struct.Struct("<IQId12s")
+
+SAFE_NAME = re.compile(r"^[\w.-]+$")
+
+
+class RunStore:
+    """Append-only, compressed store of finished agent runs"""
+
+    def __init__(self, root=None, segment_size: int = SEGMENT_SIZE,
+                 retention_days: float = RETENTION_DAYS, retention_bytes: int = RETENTION_BYTES):
+        self.root = Path(root) if root else DATA_DIR / "runs"
+        self.segment_dir = self.root / "segments"
+        self.index_dir = self.root / "index"
+        self.segment_size = segment_size
+        self.retention_days = retention_days
+        self.retention_bytes = retention_bytes
+        self._lock = threading.Lock()
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        segments = self.segments()
+        self.current_segment = segments[-1] if segments else 0
+
+    def segments(self) -> List[int]:
+        return sorted(int(p.stem.split("-")[1]) for p in self.segment_dir.glob("seg-*.log"))
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.segment_dir / f"seg-{segment:08d}.log"
+
+    def _index_path(self, agent: str) -> Path:
+        if not SAFE_NAME.match(agent):
+            raise ValueError(f"Invalid agent name: {agent}")
+        return self.index_dir / f"{agent}.idx"
+
+    def append(self, record: dict):
+        """Compress and append a finished run, then index it under its agent"""
+        payload = zlib.compress(json.dumps(record, default=str).encode("utf-8"), 6)
+        header = RECORD_HEADER.pack(len(payload), zlib.crc32(payload))
+        run_id = record["run_id"].encode("ascii")[:12].ljust(12, b"\0")
+
+        with self._lock:
+            path = self._segment_path(self.current_segment)
+            if path.exists() and path.stat().st_size >= self.segment_size:
+                self.current_segment += 1
+                path = self._segment_path(self.current_segment)
+                self._apply_retention()
+            with open(path, "ab") as f:
+                offset = f.tell()
+                f.write(header + payload)
+            entry = INDEX_ENTRY.pack(self.current_segment, offset, len(header) + len(payload), time.time(), run_id)
+            with open(self._index_path(record["agent"]), "ab") as f:
+                f.write(entry)
+
+    def _read_record(self, segment: int, offset: int, length: int) -> Optional[dict]:
+        try:
+            with open(self._segment_path(segment), "rb") as f:
+                f.seek(offset)
+                data = f.read(length)
+        except OSError:
+            return None
+        size, crc = RECORD_HEADER.unpack_from(data)
+        payload = data[RECORD_HEADER.size:RECORD_HEADER.size + size]
+        if len(payload) != size or zlib.crc32(payload) != crc:
+            return None
+        return json.loads(zlib.decompress(payload))
+
+    def count(self, agent: str) -> int:
+        try:
+            return self._index_path(agent).stat().st_size // INDEX_ENTRY.size
+        except OSError:
+            return 0
+
+    def page(self, agent: str, offset: int = 0, limit: int = 20, include_output: bool = False) -> dict:
+        """Newest-first page of an agent's runs, reading only the index entries it needs"""
+        total = self.count(agent)
+        end = max(0, total - offset)
+        start = max(0, end - limit)
+        runs = []
+        if end > start:
+            with open(self._index_path(agent), "rb") as f:
+                f.seek(start * INDEX_ENTRY.size)
+                block = f.read((end - start) * INDEX_ENTRY.size)
+            for i in range(end - start - 1, -1, -1):
+                segment, record_offset, length, _, _ = INDEX_ENTRY.unpack_from(block, i * INDEX_ENTRY.size)
+                record = self._read_record(segment, record_offset, length)
+                if record is None:
+                    continue
+                if not include_output:
+                    record.pop("output", None)
+                runs.append(record)
+        return {"agent": agent, "total": total, "offset": offset, "limit": limit, "runs": runs}
+
+    def get(self, agent: str, run_id: str) -> Optional[dict]:
+        """Look up one run by id, scanning the agent's index from newest to oldest"""
+        wanted = run_id.encode("ascii", errors="ignore")[:12].ljust(12, b"\0")
+        try:
+            data = self._index_path(agent).read_bytes()
+        except OSError:
+            return None
+        for i in range(len(data) // INDEX_ENTRY.size - 1, -1, -1):
+            segment, offset, length, _, entry_id = INDEX_ENTRY.unpack_from(data, i * INDEX_ENTRY.size)
+            if entry_id == wanted:
+                return self._read_record(segment, offset, length)
+        return None
+
+    def _apply_retention(self):
+        """Drop whole segments older than the age limit or beyond the size budget"""
+        segments = [s for s in self.segments() if s != self.current_segment]
+        cutoff = time.time() - self.retention_days * 86400
+        sizes = {s: self._segment_path(s).stat().st_size for s in segments}
+        total = sum(sizes.values())
+        if self._segment_path(self.current_segment).exists():
+            total += self._segment_path(self.current_segment).stat().st_size
+
+        removed = []
+        for segment in segments:
+            path = self._segment_path(segment)
+            if path.stat().st_mtime < cutoff or total > self.retention_bytes:
+                total -= sizes[segment]
+                path.unlink()
+                removed.append(segment)
+            else:
+                break
+        if removed:
+            self._compact_indexes(max(removed) + 1)
+        return removed
+
+    def _compact_indexes(self, first_live_segment: int):
+        """Rewrite index files without entries that point at deleted segments"""
+        for path in self.index_dir.glob("*.idx"):
+            data = path.read_bytes()
+            keep = bytearray()
+            for i in range(len(data) // INDEX_ENTRY.size):
+                entry = data[i * INDEX_ENTRY.size:(i + 1) * INDEX_ENTRY.size]
+                if INDEX_ENTRY.unpack(entry)[0] >= first_live_segment:
+                    keep += entry
+            if not keep:
+                path.unlink()
+            elif len(keep) != len(data):
+                tmp = path.with_suffix(".tmp")
+                tmp.write_bytes(bytes(keep))
+                os.replace(tmp, path)
+
+    def apply_retention(self) -> List[int]:
+        with self._lock:
+            return self._apply_retention()
+
+    def stats(self) -> dict:
+        segments = self.segments()
+        return {
+            "segments": len(segments),
+            "bytes": sum(self._segment_path(s).stat().st_size for s in segments),
+            "agents": len(list(self.index_dir.glob("*.idx"))),
+            "retention_days": self.retention_days,
+            "retention_bytes": self.retention_bytes,
+        }
@@ -0,0 +1,88 @@
+"""
+Live output streaming for agent runs
+Bounded ring buffer per run; subscribers keep their own cursor so slow clients skip instead of blocking
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, Optional
+
+# Lines kept per run for replay and for slow subscribers to catch up
+STREAM_BUFFER = int(os.getenv("AGENT_STREAM_BUFFER", 1000))
+# Largest batch of lines sent in one message
+BATCH_SIZE = 100
+# Idle subscribers get a heartbeat this often, which also detects closed sockets
+HEARTBEAT = 15.0
+
+
+class RunOutputBuffer:
+    """Ring buffer of (seq, stream, line) with broadcast wakeups"""
+
+    def __init__(self, capacity: int = STREAM_BUFFER):
+        self.lines = deque(maxlen=capacity)
+        self.next_seq = 0
+        self.closed = False
+        self._changed = asyncio.Event()
+
+    @property
+    def first_seq(self) -> int:
+        return self.next_seq - len(self.lines)
+
+    def append(self, stream: str, line: str):
+        """Add a line; never blocks, the oldest line falls off when full"""
+        self.lines.append((self.next_seq, stream, line, time.time()))
+        self.next_seq += 1
+        self._wake()
+
+    def close(self):
+        self.closed = True
+        self._wake()
+
+    def _wake(self):
+        # Swap in a fresh event so every waiter of the old one is released exactly once
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def tail(self, count: Optional[int] = None) -> list:
+        """Last lines as plain strings"""
+        items = list(self.lines) if count is None else list(self.lines)[-count:]
+        return [line for _, _, line, _ in items]
+
+    def read(self, cursor: int, limit: int = BATCH_SIZE):
+        """Return (lines, dropped, new_cursor) for a subscriber positioned at cursor"""
+        dropped = 0
+        if cursor < self.first_seq:
+            dropped = self.first_seq - cursor
+            cursor = self.first_seq
+        start = cursor - self.first_seq
+        items = list(islice(self.lines, start, start + limit))
+        return items, dropped, cursor + len(items)
+
+    async def subscribe(self, replay: Optional[int] = None) -> AsyncIterator[dict]:
+        """Yield messages for one subscriber, starting with up to `replay` buffered lines"""
+        if replay is None:
+            cursor = self.first_seq
+        else:
+            cursor = max(self.first_seq, self.next_seq - max(0, replay))
+
+        while True:
+            changed = self._changed
+            items, dropped, cursor = self.read(cursor)
+            if dropped:
+                yield {"type": "dropped", "count": dropped}
+            if items:
+                yield {
+                    "type": "lines",
+                    "lines": [{"seq": seq, "stream": stream, "line": line, "ts": ts}
+                              for seq, stream, line, ts in items],
+                }
+                continue
+            if self.closed:
+                yield {"type": "end"}
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield {"type": "ping"}
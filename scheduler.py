@@ -0,0 +1,272 @@
+"""
+Asyncio scheduler for recurring agent runs
+Cron and interval triggers share one heap-ordered timer queue on the event loop
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DATA_DIR = Path(os.getenv("OPERATOR_DATA_DIR", "data"))
+
+MISFIRE_POLICIES = ("run_once", "skip")
+
+
+class IntervalTrigger:
+    """Fires every N seconds"""
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = float(seconds)
+
+    def next_after(self, timestamp: float) -> float:
+        return timestamp + self.seconds
+
+    def to_dict(self) -> dict:
+        return {"interval_seconds": self.seconds}
+
+
+class CronTrigger:
+    """Standard five-field cron expression: minute hour day-of-month month day-of-week"""
+
+    # Day-of-week accepts 0-7 with both 0 and 7 meaning Sunday
+    RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {len(fields)}: '{expression}'")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            self._parse(field, low, high) for field, (low, high) in zip(fields, self.RANGES)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        # Cron semantics: if both day fields are restricted, either may match
+        self.day_or = fields[2] != "*" and fields[4] != "*"
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> set:
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/", 1)
+                step = int(step_text)
+                if step <= 0:
+                    raise ValueError(f"Invalid cron step in '{field}'")
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = (int(v) for v in part.split("-", 1))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron value out of range in '{field}'")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        dom = moment.day in self.days
+        dow = (moment.weekday() + 1) % 7 in self.weekdays
+        return (dom or dow) if self.day_or else (dom and dow)
+
+    def next_after(self, timestamp: float) -> float:
+        moment = datetime.fromtimestamp(timestamp).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                year = moment.year + (moment.month == 12)
+                moment = moment.replace(year=year, month=moment.month % 12 + 1, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+                continue
+            if moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+                continue
+            return moment.timestamp()
+        raise ValueError(f"Cron expression never fires: '{self.expression}'")
+
+    def to_dict(self) -> dict:
+        return {"cron": self.expression}
+
+
+class Schedule:
+    """A recurring run of one agent"""
+
+    def __init__(self, agent: str, trigger, jitter: float = 0.0, misfire_grace: float = 60.0,
+                 misfire_policy: str = "run_once", max_concurrent: int = 1, schedule_id: Optional[str] = None):
+        if misfire_policy not in MISFIRE_POLICIES:
+            raise ValueError(f"Unknown misfire policy '{misfire_policy}', expected one of {MISFIRE_POLICIES}")
+        self.schedule_id = schedule_id or uuid.uuid4().hex[:12]
+        self.agent = agent
+        self.trigger = trigger
+        self.jitter = max(0.0, float(jitter))
+        self.misfire_grace = max(0.0, float(misfire_grace))
+        self.misfire_policy = misfire_policy
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.next_run: Optional[float] = None
+        # Trigger time before jitter; the next due time is computed from it so jitter never accumulates
+        self.scheduled_run: Optional[float] = None
+        self.last_run: Optional[float] = None
+        self.stats = {"dispatched": 0, "misfired": 0, "skipped_concurrency": 0, "errors": 0}
+
+    def to_dict(self) -> dict:
+        return dict(
+            self.trigger.to_dict(),
+            schedule_id=self.schedule_id,
+            agent=self.agent,
+            jitter=self.jitter,
+            misfire_grace=self.misfire_grace,
+            misfire_policy=self.misfire_policy,
+            max_concurrent=self.max_concurrent,
+            next_run=datetime.fromtimestamp(self.next_run).isoformat() if self.next_run else None,
+            last_run=datetime.fromtimestamp(self.last_run).isoformat() if self.last_run else None,
+            stats=dict(self.stats),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Schedule":
+        if data.get("cron"):
+            trigger = CronTrigger(data["cron"])
+        elif data.get("interval_seconds"):
+            trigger = IntervalTrigger(data["interval_seconds"])
+        else:
+            raise ValueError("Schedule needs either cron or interval_seconds")
+        return cls(
+            agent=data["agent"],
+            trigger=trigger,
+            jitter=data.get("jitter", 0.0),
+            misfire_grace=data.get("misfire_grace", 60.0),
+            misfire_policy=data.get("misfire_policy", "run_once"),
+            max_concurrent=data.get("max_concurrent", 1),
+            schedule_id=data.get("schedule_id"),
+        )
+
+
+class AgentScheduler:
+    """Single-task scheduler: one heap of due times, no thread per schedule"""
+
+    def __init__(self, runner, schedules_file=None):
+        self.runner = runner
+        self.schedules_file = Path(schedules_file) if schedules_file else DATA_DIR / "schedules.json"
+        self.schedules: Dict[str, Schedule] = {}
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self):
+        try:
+            with open(self.schedules_file, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for data in saved:
+            try:
+                self.add(Schedule.from_dict(data), persist=False)
+            except (KeyError, ValueError):
+                continue
+
+    def save(self):
+        self.schedules_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.schedules_file.with_suffix(".tmp")
+        keys = ("schedule_id", "agent", "cron", "interval_seconds", "jitter",
+                "misfire_grace", "misfire_policy", "max_concurrent")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump([{k: v for k, v in s.to_dict().items() if k in keys} for s in self.schedules.values()], f)
+        os.replace(tmp, self.schedules_file)
+
+    def _push(self, schedule: Schedule, scheduled: float):
+        due = scheduled
+        if schedule.jitter:
+            due += random.uniform(0, schedule.jitter)
+        schedule.scheduled_run = scheduled
+        schedule.next_run = due
+        heapq.heappush(self._heap, (due, next(self._counter), schedule.schedule_id))
+
+    def add(self, schedule: Schedule, persist: bool = True) -> Schedule:
+        # Raises ValueError for a cron that never fires, before the schedule is registered
+        scheduled = schedule.trigger.next_after(time.time())
+        self.schedules[schedule.schedule_id] = schedule
+        self._push(schedule, scheduled)
+        if persist:
+            self.save()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return schedule
+
+    def remove(self, schedule_id: str) -> bool:
+        """Drop a schedule; its heap entry is discarded lazily when it surfaces"""
+        if self.schedules.pop(schedule_id, None) is None:
+            return False
+        self.save()
+        return True
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                due, _, schedule_id = heapq.heappop(self._heap)
+                schedule = self.schedules.get(schedule_id)
+                # Stale entry: schedule removed or rescheduled since this entry was pushed
+                if schedule is None or schedule.next_run != due:
+                    continue
+                self._fire(schedule, due, now)
+
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _fire(self, schedule: Schedule, due: float, now: float):
+        late = now - due
+        scheduled = schedule.trigger.next_after(schedule.scheduled_run)
+        if scheduled <= now:
+            # Missed whole periods while late: resume from now rather than firing each one
+            scheduled = schedule.trigger.next_after(now)
+        self._push(schedule, scheduled)
+        if late > schedule.misfire_grace:
+            schedule.stats["misfired"] += 1
+            if schedule.misfire_policy == "skip":
+                return
+        if self.runner.running_count(schedule.agent) >= schedule.max_concurrent:
+            schedule.stats["skipped_concurrency"] += 1
+            return
+        schedule.last_run = now
+        schedule.stats["dispatched"] += 1
+        asyncio.create_task(self._dispatch(schedule))
+
+    async def _dispatch(self, schedule: Schedule):
+        try:
+            await self.runner.start_run(schedule.agent, trigger=f"schedule:{schedule.schedule_id}")
+        except Exception:
+            schedule.stats["errors"] += 1
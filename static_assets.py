@@ -0,0 +1,185 @@
+"""
+Precompressed, cacheable responses for the console and static assets
+Bodies are compressed once (gzip, and brotli when installed) and served by Accept-Encoding
+with strong ETags; JSON API responses above a size threshold are compressed on the fly
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Dict, Iterable, Optional
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+JSON_LEVEL = int(os.getenv("COMPRESS_JSON_LEVEL", 5))
+# Larger files are streamed from disk by StaticFiles as before
+MAX_ASSET_BYTES = int(os.getenv("STATIC_MAX_CACHED_BYTES", 8 * 1024 * 1024))
+
+# Preference order when the client accepts several
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Content-hashed build output such as app.3f9c2b1de0.js or Vite's index-B2x9Kq1m.js
+HASHED_NAME = re.compile(r"[.-](?:[0-9a-f]{8,}|(?=[^.]*\d)[A-Za-z0-9_-]{8})\.[A-Za-z0-9]+$")
+COMPRESSIBLE = re.compile(r"^(text/|application/(json|javascript|xml|wasm|manifest\+json)|image/svg\+xml)")
+
+
+def encode(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress with `encoding`; without a level, the slowest/smallest setting (for precompression)"""
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if level is None else level)
+    return gzip.compress(data, compresslevel=9 if level is None else level, mtime=0)
+
+
+def negotiate(accept_encoding: str, available: Iterable[str]) -> Optional[str]:
+    """Preferred encoding in `available` that Accept-Encoding allows (q=0 excludes)"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    for encoding in ENCODINGS:
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+class Asset:
+    """An immutable response body with its precompressed variants and ETag"""
+
+    def __init__(self, body: bytes, content_type: str, cache_control: str = REVALIDATE, mtime: float = 0.0):
+        self.body = body
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.mtime = mtime
+        self.etag = hashlib.sha256(body).hexdigest()[:20]
+        self.variants: Dict[str, bytes] = {}
+        if len(body) >= MIN_BYTES and COMPRESSIBLE.match(content_type):
+            for encoding in ENCODINGS:
+                compressed = encode(body, encoding)
+                # Not worth a Content-Encoding for a few percent
+                if len(compressed) < len(body) * 0.95:
+                    self.variants[encoding] = compressed
+
+    def response(self, headers: Headers) -> Response:
+        encoding = negotiate(headers.get("accept-encoding", ""), self.variants)
+        # Each representation needs its own strong validator
+        etag = f'"{self.etag}-{encoding}"' if encoding else f'"{self.etag}"'
+        response_headers = {"etag": etag, "cache-control": self.cache_control, "vary": "Accept-Encoding"}
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in
+                              (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))):
+            return Response(status_code=304, headers=response_headers)
+        if encoding:
+            response_headers["content-encoding"] = encoding
+        return Response(self.variants[encoding] if encoding else self.body,
+                        media_type=self.content_type, headers=response_headers)
+
+
+def render_template(templates, name: str) -> Asset:
+    """Render a template without per-request context once, e.g. the console at startup"""
+    html = templates.get_template(name).render()
+    return Asset(html.encode("utf-8"), "text/html; charset=utf-8")
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles serving in-memory precompressed copies, with ETag/If-None-Match
+
+    Every file is loaded and compressed when the app is built; one that changes on disk is
+    reloaded on its next request. Hashed file names get immutable caching, the rest revalidate.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.assets: Dict[str, Asset] = {}
+        if self.directory is not None and os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    full_path = os.path.realpath(os.path.join(root, name))
+                    stat_result = os.stat(full_path)
+                    if stat_result.st_size <= MAX_ASSET_BYTES:
+                        self.load(full_path, stat_result)
+
+    def load(self, full_path: str, stat_result: os.stat_result) -> Asset:
+        with open(full_path, "rb") as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type == "application/javascript":
+            content_type += "; charset=utf-8"
+        cache_control = IMMUTABLE if HASHED_NAME.search(os.path.basename(full_path)) else REVALIDATE
+        asset = self.assets[full_path] = Asset(body, content_type, cache_control, stat_result.st_mtime)
+        return asset
+
+    async def get_response(self, path: str, scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+        full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path)
+        if stat_result is None or not os.path.isfile(full_path) or stat_result.st_size > MAX_ASSET_BYTES:
+            return await super().get_response(path, scope)
+        full_path = os.path.realpath(full_path)
+        asset = self.assets.get(full_path)
+        if asset is None or asset.mtime != stat_result.st_mtime:
+            asset = await anyio.to_thread.run_sync(self.load, full_path, stat_result)
+        return asset.response(Headers(scope=scope))
+
+
+class JSONCompressionMiddleware:
+    """Pure ASGI middleware: compresses complete JSON responses of at least `minimum_size` bytes
+
+    Streaming bodies, other content types and already-encoded responses pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = MIN_BYTES, level: int = JSON_LEVEL):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope, receive, send):
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), ENCODINGS) \
+            if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        held = None
+
+        async def send_compressed(message):
+            nonlocal held
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if headers.get("content-type", "").startswith("application/json") and "content-encoding" not in headers:
+                    # Headers depend on the body; wait for it
+                    held = message
+                    return
+            elif held is not None:
+                start, held = held, None
+                body = message.get("body", b"")
+                if not message.get("more_body", False) and len(body) >= self.minimum_size:
+                    # Brotli's fast settings beat gzip at similar speed; quality 4 is its sweet spot
+                    body = encode(body, encoding, 4 if encoding == "br" else self.level)
+                    headers = MutableHeaders(raw=list(start["headers"]))
+                    headers["content-encoding"] = encoding
+                    headers["content-length"] = str(len(body))
+                    headers.add_vary_header("Accept-Encoding")
+                    start = dict(start, headers=headers.raw)
+                    message = dict(message, body=body)
+                await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,238 @@
+"""
+Local trace spans for the deploy -> commit -> push lifecycle
+Spans propagate through a context variable within a request and are handed to GitPushAgent by agent file,
+then kept in a rolling JSON-lines store for /api/traces/{id}
+"""
+import atexit
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DATA_DIR = Path(os.getenv("OPERATOR_DATA_DIR", "data"))
+MAX_TRACES = int(os.getenv("TRACE_MEMORY_TRACES", 500))
+SEGMENT_BYTES = int(os.getenv("TRACE_SEGMENT_BYTES", 8 * 1024 * 1024))
+# Handoffs nobody adopts (e.g. GitPushAgent not running) are dropped after this long
+HANDOFF_TTL = 3600
+
+# (trace_id, span_id) of the innermost open span
+_current: contextvars.ContextVar[Optional[tuple]] = contextvars.ContextVar("trace_span", default=None)
+
+
+class TraceStore:
+    """Recent traces in memory, every span appended to spans.jsonl (rolled over to spans.1.jsonl)
+
+    Callers only enqueue finished spans; one writer thread serializes them and writes in batches,
+    like the log pipeline's QueueListener.
+    """
+
+    def __init__(self, root=None, max_traces: int = MAX_TRACES, segment_bytes: int = SEGMENT_BYTES):
+        self.root = Path(root) if root else DATA_DIR / "traces"
+        self.max_traces = max_traces
+        self.segment_bytes = segment_bytes
+        self.traces: "OrderedDict[str, List[dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._file = None
+        # Each writer thread has its own queue, so flush() can stop exactly the one it swapped out
+        self._pending: "queue.SimpleQueue[Optional[dict]]" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+
+    @property
+    def segment(self) -> Path:
+        return self.root / "spans.jsonl"
+
+    @property
+    def previous_segment(self) -> Path:
+        return self.root / "spans.1.jsonl"
+
+    def _write(self, lines: List[str]):
+        if self._file is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.segment, "a", encoding="utf-8")
+        self._file.write("".join(lines))
+        self._file.flush()
+        if self._file.tell() >= self.segment_bytes:
+            self._file.close()
+            self._file = None
+            os.replace(self.segment, self.previous_segment)
+
+    def _drain(self, pending: queue.SimpleQueue):
+        """Writer thread: everything queued since the last write goes out in one write; None stops it"""
+        running = True
+        while running:
+            spans = [pending.get()]
+            while True:
+                try:
+                    spans.append(pending.get_nowait())
+                except queue.Empty:
+                    break
+            if None in spans:
+                running = False
+            lines = [json.dumps(span, default=str) + "\n" for span in spans if span is not None]
+            if lines:
+                try:
+                    with self._write_lock:
+                        self._write(lines)
+                except OSError:
+                    pass
+
+    def flush(self):
+        """Write every queued span and stop the writer (a later span starts a new one)"""
+        with self._lock:
+            writer, pending = self._writer, self._pending
+            self._writer, self._pending = None, queue.SimpleQueue()
+            pending.put(None)
+        if writer is not None:
+            writer.join()
+
+    def add(self, span: dict):
+        with self._lock:
+            spans = self.traces.get(span["trace_id"])
+            if spans is None:
+                spans = self.traces[span["trace_id"]] = []
+                while len(self.traces) > self.max_traces:
+                    self.traces.popitem(last=False)
+            else:
+                self.traces.move_to_end(span["trace_id"])
+            spans.append(span)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._drain, args=(self._pending,),
+                                                name="trace-writer", daemon=True)
+                self._writer.start()
+            self._pending.put(span)
+
+    def get(self, trace_id: str) -> List[dict]:
+        with self._lock:
+            spans = self.traces.get(trace_id)
+            if spans is not None:
+                return list(spans)
+        # Older traces: scan the on-disk segments
+        found = []
+        marker = f'"trace_id": "{trace_id}"'
+        for path in (self.previous_segment, self.segment):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    found.extend(json.loads(line) for line in f if marker in line)
+            except (OSError, ValueError):
+                continue
+        return found
+
+    def recent(self, limit: int = 20) -> List[dict]:
+        with self._lock:
+            items = list(self.traces.items())[-limit:]
+        return [summarize(trace_id, spans) for trace_id, spans in reversed(items)]
+
+
+def summarize(trace_id: str, spans: List[dict]) -> dict:
+    start = min(s["start"] for s in spans)
+    end = max(s["start"] + s["duration_ms"] / 1000 for s in spans)
+    roots = [s["name"] for s in spans if s["parent_id"] is None]
+    return {"trace_id": trace_id, "start": start, "duration_ms": round((end - start) * 1000, 3),
+            "spans": len(spans), "roots": roots, "errors": sum(1 for s in spans if s["status"] != "ok")}
+
+
+store = TraceStore()
+atexit.register(store.flush)
+
+# agent file -> (trace_id, parent span id, handed off at)
+_handoffs: Dict[str, tuple] = {}
+_handoff_lock = threading.Lock()
+
+
+def current_trace_id() -> Optional[str]:
+    current = _current.get()
+    return current[0] if current else None
+
+
+@contextmanager
+def trace_span(name: str, trace_id: Optional[str] = None, parent_id: Optional[str] = None, **attrs):
+    """Record a span under the active trace, or start trace `trace_id`
+
+    Without an active trace and without trace_id this is a no-op, so instrumented code
+    costs one context-variable lookup outside traced work. Yields the span's attribute dict.
+    """
+    current = _current.get()
+    if trace_id is None:
+        if current is None:
+            yield attrs
+            return
+        trace_id, parent_id = current[0], parent_id or current[1]
+    elif parent_id is None and current is not None and current[0] == trace_id:
+        parent_id = current[1]
+
+    span_id = os.urandom(8).hex()
+    token = _current.set((trace_id, span_id))
+    wall = time.time()
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield attrs
+    except BaseException as e:
+        status = "error"
+        attrs.setdefault("error", f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current.reset(token)
+        store.add({"trace_id": trace_id, "span_id": span_id, "parent_id": parent_id, "name": name,
+                   "start": wall, "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                   "status": status, "attrs": attrs})
+
+
+def hand_off(key: str):
+    """Let another thread continue the active trace for `key` (e.g. an agent file path)"""
+    current = _current.get()
+    if current is None:
+        return
+    now = time.time()
+    with _handoff_lock:
+        for stale in [k for k, v in _handoffs.items() if now - v[2] > HANDOFF_TTL]:
+            del _handoffs[stale]
+        _handoffs[key] = (current[0], current[1], now)
+
+
+def adopt(key: str) -> Optional[tuple]:
+    with _handoff_lock:
+        return _handoffs.pop(key, None)
+
+
+@contextmanager
+def resume(handoff: Optional[tuple], name: str, **attrs):
+    """Continue a handed-off trace; the time spent waiting for pickup is its own span"""
+    if handoff is None:
+        yield attrs
+        return
+    trace_id, parent_id, handed_off_at = handoff
+    waited = time.time() - handed_off_at
+    store.add({"trace_id": trace_id, "span_id": os.urandom(8).hex(), "parent_id": parent_id,
+               "name": "handoff_wait", "start": handed_off_at, "duration_ms": round(waited * 1000, 3),
+               "status": "ok", "attrs": {}})
+    with trace_span(name, trace_id=trace_id, parent_id=parent_id, **attrs) as span_attrs:
+        yield span_attrs
+
+
+def view(trace_id: str) -> Optional[dict]:
+    """Spans ordered as a waterfall, with offsets from the trace start and nesting depth"""
+    spans = store.get(trace_id)
+    if not spans:
+        return None
+    start = min(s["start"] for s in spans)
+    by_id = {s["span_id"]: s for s in spans}
+
+    def depth(span: dict) -> int:
+        level = 0
+        while span["parent_id"] in by_id and level < 50:
+            span = by_id[span["parent_id"]]
+            level += 1
+        return level
+
+    ordered = sorted(spans, key=lambda s: s["start"])
+    result = summarize(trace_id, spans)
+    result["spans"] = [dict(s, offset_ms=round((s["start"] - start) * 1000, 3), depth=depth(s)) for s in ordered]
+    return result
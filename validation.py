@@ -0,0 +1,270 @@
+"""
+Validation pipeline for generated agent code
+Runs compile, forbidden-import and sandboxed import checks on a process pool
+"""
+import ast
+import asyncio
+import hashlib
+import importlib.util
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+# Modules generated agents may not import; override with AGENT_FORBIDDEN_IMPORTS=mod1,mod2
+DEFAULT_FORBIDDEN_IMPORTS = ["ctypes", "pty", "telnetlib", "ftplib", "shelve", "marshal"]
+
+DRY_RUN_TIMEOUT = 15
+CACHE_SIZE = 1024
+
+FENCE_PATTERN = re.compile(r"^```[\w+-]*\s*\n(.*?)\n?```\s*$", re.DOTALL | re.MULTILINE)
+
+# Modules named after the path are stubbed: third-party packages the host lacks, which the
+# agent's own environment provides at run time (agent_envs)
+DRY_RUN_SCRIPT = """
+import importlib.abc, importlib.machinery, importlib.util, sys, types
+
+class Stub:
+    def __call__(self, *args, **kwargs):
+        return self
+    def __getattr__(self, name):
+        return self
+    def __mro_entries__(self, bases):
+        return (object,)
+    def __iter__(self):
+        return iter(())
+
+class StubModule(types.ModuleType):
+    def __getattr__(self, name):
+        return Stub()
+
+class StubFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def __init__(self, names):
+        self.names = set(names)
+    def find_spec(self, name, path=None, target=None):
+        if name.split(".")[0] in self.names:
+            return importlib.machinery.ModuleSpec(name, self, is_package=True)
+    def create_module(self, spec):
+        return StubModule(spec.name)
+    def exec_module(self, module):
+        module.__path__ = []
+
+sys.meta_path.insert(0, StubFinder(sys.argv[2:]))
+spec = importlib.util.spec_from_file_location("agent_under_test", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+print("main" if hasattr(module, "main") else "no-main")
+"""
+
+
+def forbidden_imports_from_env() -> List[str]:
+    """Return the forbidden module list configured through AGENT_FORBIDDEN_IMPORTS"""
+    value = os.getenv("AGENT_FORBIDDEN_IMPORTS")
+    if value is None:
+        return list(DEFAULT_FORBIDDEN_IMPORTS)
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def extract_code(text: str) -> str:
+    """Strip markdown fences that models like to wrap code in"""
+    text = text.strip()
+    match = FENCE_PATTERN.search(text)
+    if match:
+        return match.group(1).strip() + "\n"
+    return text + "\n"
+
+
+def code_hash(code: str) -> str:
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def imported_modules(tree: ast.AST) -> List[str]:
+    """Return every module name imported anywhere in the tree"""
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            modules.append(node.module)
+    return modules
+
+
+def check_static(code: str, forbidden: List[str]) -> dict:
+    """Compile the code and reject forbidden imports (runs in a pool worker)"""
+    timings = {}
+    errors = []
+
+    start = time.perf_counter()
+    try:
+        tree = ast.parse(code, filename="<agent>")
+        compile(tree, "<agent>", "exec")
+    except SyntaxError as e:
+        timings["compile"] = _elapsed_ms(start)
+        return {"valid": False, "errors": [f"SyntaxError: {e.msg} (line {e.lineno})"], "timings": timings}
+    timings["compile"] = _elapsed_ms(start)
+
+    start = time.perf_counter()
+    blocked = set(forbidden)
+    for module in imported_modules(tree):
+        if module in blocked or module.split(".")[0] in blocked:
+            errors.append(f"Forbidden import: {module}")
+    timings["imports"] = _elapsed_ms(start)
+
+    return {"valid": not errors, "errors": errors, "timings": timings}
+
+
+def deferred_imports(code: str) -> List[str]:
+    """Third-party modules the code imports that are not installed on the host"""
+    # Imported here: agent_envs pulls in venv and importlib.metadata, which only this path needs
+    from agent_envs import find_imports
+    return [name for name in find_imports(code)[0] if importlib.util.find_spec(name) is None]
+
+
+def check_dry_run(code: str, timeout: float = DRY_RUN_TIMEOUT, defer_imports: bool = False) -> dict:
+    """Import the agent in a sandbox subprocess without calling main() (runs in a pool worker)
+
+    With defer_imports, third-party modules missing on the host are stubbed instead of failing the
+    import; they are listed under "deferred_imports" for the agent's environment to provide.
+    """
+    start = time.perf_counter()
+    deferred = deferred_imports(code) if defer_imports else []
+    with tempfile.TemporaryDirectory(prefix="agent-validate-") as workdir:
+        path = os.path.join(workdir, "agent_under_test.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(code)
+
+        # Minimal environment: no API keys or tokens leak into untrusted code
+        env = {"PATH": os.environ.get("PATH", ""), "HOME": workdir, "PYTHONDONTWRITEBYTECODE": "1"}
+        try:
+            result = subprocess.run(
+                [sys.executable, "-I", "-c", DRY_RUN_SCRIPT, path, *deferred],
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                cwd=workdir,
+                env=env,
+                stdin=subprocess.DEVNULL,
+            )
+        except subprocess.TimeoutExpired:
+            return {"valid": False, "errors": [f"Import timed out after {timeout}s"],
+                    "deferred_imports": deferred, "timings": {"dry_run": _elapsed_ms(start)}}
+
+    errors = []
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1:] or ["unknown error"]
+        errors.append(f"Import failed: {last_line[0]}")
+    elif result.stdout.strip().splitlines()[-1:] != ["main"]:
+        errors.append("Agent does not define main()")
+    return {"valid": not errors, "errors": errors, "deferred_imports": deferred,
+            "timings": {"dry_run": _elapsed_ms(start)}}
+
+
+def _validate_in_worker(code: str, forbidden: List[str], dry_run: bool, defer_imports: bool = False) -> dict:
+    """Full pipeline for one piece of code; stops at the first failing stage"""
+    result = check_static(code, forbidden)
+    result["deferred_imports"] = []
+    if result["valid"] and dry_run:
+        sandbox = check_dry_run(code, defer_imports=defer_imports)
+        result["valid"] = sandbox["valid"]
+        result["errors"].extend(sandbox["errors"])
+        result["deferred_imports"] = sandbox["deferred_imports"]
+        result["timings"].update(sandbox["timings"])
+    return result
+
+
+class AgentValidator:
+    """Validates generated agent code on a process pool with a hash-keyed result cache"""
+
+    def __init__(self, max_workers: Optional[int] = None, forbidden: Optional[List[str]] = None,
+                 dry_run: bool = True, cache_size: int = CACHE_SIZE, defer_imports: bool = False):
+        self.max_workers = max_workers or int(os.getenv("AGENT_VALIDATION_WORKERS", min(4, os.cpu_count() or 1)))
+        self.forbidden = forbidden if forbidden is not None else forbidden_imports_from_env()
+        self.dry_run = dry_run
+        # Stub third-party imports the host lacks in the dry run; per-agent environments install them
+        self.defer_imports = defer_imports
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # The server already runs threads (log listener, GitPushAgent, trace writer); forking it
+            # could hand a worker a lock held by one of them, so workers start from a clean process
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context(method))
+        return self._pool
+
+    def _remember(self, key: str, future: Future):
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            self._cache[key] = future.result()
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def submit(self, code: str) -> Future:
+        """Queue code for validation; identical code shares one cached result"""
+        key = code_hash(code)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                done: Future = Future()
+                done.set_result(dict(self._cache[key], cached=True))
+                return done
+            if key in self._pending:
+                return self._pending[key]
+            future = self._get_pool().submit(_validate_in_worker, code, self.forbidden, self.dry_run,
+                                             self.defer_imports)
+            self._pending[key] = future
+        future.add_done_callback(lambda f: self._remember(key, f))
+        return future
+
+    def validate(self, code: str) -> dict:
+        """Validate code and return {"valid", "errors", "deferred_imports", "timings", "code_hash", "cached"}"""
+        start = time.perf_counter()
+        result = dict(self.submit(code).result())
+        result.setdefault("cached", False)
+        result["code_hash"] = code_hash(code)
+        result["timings"] = dict(result["timings"], total=_elapsed_ms(start))
+        return result
+
+    def validate_many(self, codes: List[str]) -> List[dict]:
+        """Validate several pieces of code in parallel"""
+        futures = [self.submit(code) for code in codes]
+        results = []
+        for code, future in zip(codes, futures):
+            result = dict(future.result())
+            result.setdefault("cached", False)
+            result["code_hash"] = code_hash(code)
+            results.append(result)
+        return results
+
+    async def validate_async(self, code: str) -> dict:
+        """Awaitable variant of validate() for request handlers"""
+        start = time.perf_counter()
+        result = dict(await asyncio.wrap_future(self.submit(code)))
+        result.setdefault("cached", False)
+        result["code_hash"] = code_hash(code)
+        result["timings"] = dict(result["timings"], total=_elapsed_ms(start))
+        return result
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None